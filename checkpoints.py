@@ -0,0 +1,92 @@
+"""Resumable, checkpointed migrations of keyed tables and views."""
+
+from loaders import UpsertLoader
+from partitioning import marker
+from state_store import CheckpointStore
+from streaming import StreamReader
+from sync import ensure_unique_key
+
+
+def keyset_query(sgbd, table_name, key, last_key):
+    """Select the rows after last_key in key order (all rows when None)."""
+    if last_key is None:
+        return f"SELECT * FROM {table_name} ORDER BY {key}", None
+    return f"SELECT * FROM {table_name} WHERE {key} > {marker(sgbd, 1)} ORDER BY {key}", [last_key]
+
+
+class CheckpointingLoader:
+    """Wrap a loader and record the last committed key after every chunk.
+
+    Rows must arrive in key order, so the job must run with a single reader
+    and a single writer.
+    """
+
+    def __init__(self, loader, store, job, key_index, rows_done=0, replay_loader=None):
+        self.loader = loader
+        self.store = store
+        self.job = job
+        self.key_index = key_index
+        self.rows_done = rows_done
+        self.replay_loader = replay_loader
+
+    def load(self, rows):
+        loader = self.replay_loader or self.loader
+        self.replay_loader = None
+        written = loader.load(rows)
+        self.rows_done += written
+        self.store.save(self.job, rows[-1][self.key_index], self.rows_done)
+        return written
+
+
+class ResumableMigration:
+    """Copy a view in key order and resume from the last checkpoint after a failure.
+
+    The target commit and the checkpoint cannot be saved atomically, so a run
+    that died may have committed one chunk more than its checkpoint says. On
+    resume that first chunk (same chunk size as the interrupted run) is
+    applied as an upsert so it cannot be duplicated.
+    """
+
+    def __init__(self, source_conn, source_sgbd, target_conn, target_sgbd, view_name, table_name,
+                 key, job, chunk_size, store=None):
+        self.source_conn = source_conn
+        self.source_sgbd = source_sgbd
+        self.target_conn = target_conn
+        self.target_sgbd = target_sgbd
+        self.view_name = view_name
+        self.table_name = table_name
+        self.key = key
+        self.job = job
+        self.chunk_size = chunk_size
+        self.store = store or CheckpointStore()
+        self.checkpoint = None
+
+    @property
+    def resuming(self):
+        return self.checkpoint is not None
+
+    def open_reader(self):
+        """Open the source reader, positioned after the last checkpoint if any."""
+        checkpoint = self.store.get(self.job)
+        if checkpoint and checkpoint["status"] == "running":
+            self.checkpoint = checkpoint
+            self.chunk_size = checkpoint["chunk_size"]
+            last_key = checkpoint["last_key"]
+        else:
+            self.store.start(self.job, self.chunk_size)
+            last_key = None
+        query, params = keyset_query(self.source_sgbd, self.view_name, self.key, last_key)
+        return StreamReader(self.source_conn, self.source_sgbd, query, params, self.chunk_size).open()
+
+    def wrap_loader(self, loader, col_names):
+        key_index = [col.lower() for col in col_names].index(self.key.lower())
+        replay_loader = None
+        rows_done = 0
+        if self.resuming:
+            rows_done = self.checkpoint["rows_done"]
+            ensure_unique_key(self.target_conn, self.target_sgbd, self.table_name, self.key)
+            replay_loader = UpsertLoader(self.target_conn, self.target_sgbd, self.table_name, col_names, self.key)
+        return CheckpointingLoader(loader, self.store, self.job, key_index, rows_done, replay_loader)
+
+    def finish(self):
+        self.store.finish(self.job)
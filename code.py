@@ -1,9 +1,12 @@
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import sqlite3
-import psycopg2
-import mysql.connector
+from connections import connection_manager
+from streaming import DEFAULT_CHUNK_SIZE
+from loaders import LOAD_METHODS
+from engine import EventQueue, MigrationEngine, format_event
+from state_store import CheckpointStore
+from lobs import DEFAULT_LOB_CHUNK_SIZE
 
 class DBMigrationApp:
     def __init__(self, root):
@@ -19,6 +22,14 @@ class DBMigrationApp:
         self.view_name = tk.StringVar()
         self.source_config = {}
         self.target_config = {}
+        self.chunk_size = tk.IntVar(value=DEFAULT_CHUNK_SIZE)
+        self.lob_chunk_size = tk.IntVar(value=DEFAULT_LOB_CHUNK_SIZE)
+        self.load_method = tk.StringVar()
+        self.key_column = tk.StringVar()
+        self.resumable = tk.BooleanVar(value=False)
+        self.checkpoints = CheckpointStore()
+        self.engine = None
+        self.engine_events = EventQueue()
 
         # Flags for connectivity
         self.source_connected = False
@@ -58,6 +69,18 @@ class DBMigrationApp:
         self.connect_target_button = ttk.Button(self.target_fields_frame, text="Test Target Connectivity", command=self.connect_target)
         self.connect_target_button.grid(row=0, column=0, columnspan=2, pady=10)
 
+        chunk_frame = ttk.Frame(self.root)
+        chunk_frame.pack(fill=tk.X, padx=20)
+        ttk.Label(chunk_frame, text="Chunk Size (rows):").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(chunk_frame, textvariable=self.chunk_size, width=10).grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(chunk_frame, text="Load Method:").grid(row=1, column=0, sticky=tk.W)
+        ttk.OptionMenu(chunk_frame, self.load_method, LOAD_METHODS[0], *LOAD_METHODS).grid(row=1, column=1, sticky=tk.W)
+        ttk.Label(chunk_frame, text="Key Column:").grid(row=2, column=0, sticky=tk.W)
+        ttk.Entry(chunk_frame, textvariable=self.key_column, width=20).grid(row=2, column=1, sticky=tk.W)
+        ttk.Checkbutton(chunk_frame, text="Resumable (checkpoint on Key Column)", variable=self.resumable).grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(chunk_frame, text="LOB Chunk Size (rows):").grid(row=4, column=0, sticky=tk.W)
+        ttk.Entry(chunk_frame, textvariable=self.lob_chunk_size, width=10).grid(row=4, column=1, sticky=tk.W)
+
         self.migrate_button = ttk.Button(self.root, text="Migrate View to Tables", command=self.migrate_view_to_tables, state=tk.DISABLED)
         self.migrate_button.pack(pady=20)
 
@@ -99,6 +122,16 @@ class DBMigrationApp:
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
 
+    def config_details(self, config):
+        """Connection details of the connections module from the entry fields."""
+        return {
+            "host": config["host"].get(),
+            "port": config["port"].get(),
+            "database": config["database_name"].get(),
+            "user": config["username"].get(),
+            "password": config["password"].get(),
+        }
+
     def connect_source(self):
         sgbd = self.source_sgbd.get()
         view_name = self.view_name.get()
@@ -106,38 +139,32 @@ class DBMigrationApp:
             messagebox.showerror("Error", "Please enter the view name.")
             return
 
+        previous = self.source_details
         try:
             if sgbd == "SQLite":
                 file_path = filedialog.askopenfilename(filetypes=[("SQLite Files", "*.db")])
                 if file_path:
                     self.source_details = {
-                        "connection": sqlite3.connect(file_path),
-                        "view_name": view_name
+                        "connection": connection_manager.acquire(sgbd, {"path": file_path}),
+                        "view_name": view_name,
+                        "path": file_path,
+                        "endpoint": (sgbd, {"path": file_path}),
                     }
                     self.source_connected = True
                     self.log(f"Connected to SQLite database at {file_path}.")
             elif sgbd == "PostgreSQL":
-                conn = psycopg2.connect(
-                    dbname=self.source_config["database_name"].get(),
-                    user=self.source_config["username"].get(),
-                    password=self.source_config["password"].get(),
-                    host=self.source_config["host"].get(),
-                    port=self.source_config["port"].get()
-                )
-                self.source_details = {"connection": conn, "view_name": view_name}
+                endpoint = (sgbd, self.config_details(self.source_config))
+                self.source_details = {"connection": connection_manager.acquire(*endpoint), "view_name": view_name,
+                                       "endpoint": endpoint}
                 self.source_connected = True
                 self.log("Connected to PostgreSQL database.")
             elif sgbd == "MySQL":
-                conn = mysql.connector.connect(
-                    database=self.source_config["database_name"].get(),
-                    user=self.source_config["username"].get(),
-                    password=self.source_config["password"].get(),
-                    host=self.source_config["host"].get(),
-                    port=self.source_config["port"].get()
-                )
-                self.source_details = {"connection": conn, "view_name": view_name}
+                endpoint = (sgbd, self.config_details(self.source_config))
+                self.source_details = {"connection": connection_manager.acquire(*endpoint), "view_name": view_name,
+                                       "endpoint": endpoint}
                 self.source_connected = True
                 self.log("Connected to MySQL database.")
+            self.release_previous(previous, self.source_details)
         except Exception as e:
             self.source_connected = False
             self.log(f"Error connecting to source database: {e}")
@@ -146,42 +173,44 @@ class DBMigrationApp:
 
     def connect_target(self):
         sgbd = self.target_sgbd.get()
+        previous = self.target_details
         try:
             if sgbd == "SQLite":
                 file_path = filedialog.asksaveasfilename(defaultextension=".db", filetypes=[("SQLite Files", "*.db")])
                 if file_path:
-                    conn = sqlite3.connect(file_path)
-                    self.target_details = {"connection": conn}
+                    endpoint = (sgbd, {"path": file_path})
+                    self.target_details = {"connection": connection_manager.acquire(*endpoint), "path": file_path,
+                                           "endpoint": endpoint}
                     self.target_connected = True
                     self.log(f"Connected to SQLite database at {file_path}.")
             elif sgbd == "PostgreSQL":
-                conn = psycopg2.connect(
-                    dbname=self.target_config["database_name"].get(),
-                    user=self.target_config["username"].get(),
-                    password=self.target_config["password"].get(),
-                    host=self.target_config["host"].get(),
-                    port=self.target_config["port"].get()
-                )
-                self.target_details = {"connection": conn}
+                endpoint = (sgbd, self.config_details(self.target_config))
+                self.target_details = {"connection": connection_manager.acquire(*endpoint), "endpoint": endpoint}
                 self.target_connected = True
                 self.log("Connected to PostgreSQL database.")
             elif sgbd == "MySQL":
-                conn = mysql.connector.connect(
-                    database=self.target_config["database_name"].get(),
-                    user=self.target_config["username"].get(),
-                    password=self.target_config["password"].get(),
-                    host=self.target_config["host"].get(),
-                    port=self.target_config["port"].get()
-                )
-                self.target_details = {"connection": conn}
+                endpoint = (sgbd, self.config_details(self.target_config))
+                self.target_details = {"connection": connection_manager.acquire(*endpoint), "endpoint": endpoint}
                 self.target_connected = True
                 self.log("Connected to MySQL database.")
+            self.release_previous(previous, self.target_details)
         except Exception as e:
             self.target_connected = False
             self.log(f"Error connecting to target database: {e}")
 
         self.update_migrate_button_state()
 
+    def release_previous(self, previous, details):
+        # Reconnecting hands the former connection back to its pool
+        if previous is not details and previous.get("connection"):
+            previous["connection"].close()
+
+    def endpoint_name(self, sgbd, details, config):
+        """Identify a database for the checkpoint store."""
+        if "path" in details:
+            return f"{sgbd}:{details['path']}"
+        return f"{sgbd}:{config['host'].get()}:{config['port'].get()}/{config['database_name'].get()}"
+
     def update_migrate_button_state(self):
         if self.source_connected and self.target_connected:
             self.migrate_button.config(state=tk.NORMAL)
@@ -189,53 +218,58 @@ class DBMigrationApp:
             self.migrate_button.config(state=tk.DISABLED)
 
     def migrate_view_to_tables(self):
-        try:
-            source_conn = self.source_details.get("connection")
-            view_name = self.source_details.get("view_name")
-            target_conn = self.target_details.get("connection")
-
-            if not source_conn or not target_conn:
-                messagebox.showerror("Error", "Please connect to both source and target databases.")
-                return
-
-            # Extract view structure and data
-            cursor = source_conn.cursor()
-            sgbd = self.source_sgbd.get()
-
-            if sgbd == "SQLite":
-                cursor.execute(f"PRAGMA table_info({view_name})")
-                columns = cursor.fetchall()
-                column_definitions = ", ".join([f"{col[1]} {col[2]}" for col in columns])
-                cursor.execute(f"SELECT * FROM {view_name}")
-            elif sgbd == "PostgreSQL":
-                cursor.execute(f"SELECT column_name, data_type FROM information_schema.columns WHERE table_name = '{view_name}'")
-                columns = cursor.fetchall()
-                column_definitions = ", ".join([f"{col[0]} {col[1]}" for col in columns])
-                cursor.execute(f"SELECT * FROM {view_name}")
-            elif sgbd == "MySQL":
-                cursor.execute(f"DESCRIBE {view_name}")
-                columns = cursor.fetchall()
-                column_definitions = ", ".join([f"{col[0]} {col[1]}" for col in columns])
-                cursor.execute(f"SELECT * FROM {view_name}")
-
-            rows = cursor.fetchall()
-
-            # Create table in target database
-            target_cursor = target_conn.cursor()
-            target_table_name = view_name + "_migrated"
-            target_cursor.execute(f"CREATE TABLE {target_table_name} ({column_definitions})")
-
-            # Copy data from view to table
-            placeholders = ", ".join(["%s" for _ in columns])
-            target_cursor.executemany(f"INSERT INTO {target_table_name} VALUES ({placeholders})", rows)
-
-            target_conn.commit()
-            self.log(f"Migration complete. Data copied to table: {target_table_name}")
+        """Hand the copy to a MigrationEngine; the window only follows its events."""
+        view_name = self.source_details.get("view_name")
+        if not self.source_details.get("connection") or not self.target_details.get("connection"):
+            messagebox.showerror("Error", "Please connect to both source and target databases.")
+            return
 
-        except Exception as e:
-            self.log(f"Error during migration: {e}")
+        sgbd = self.source_sgbd.get()
+        target_sgbd = self.target_sgbd.get()
+        target_table_name = view_name + "_migrated"
+        key_column = self.key_column.get().strip()
+        # Columns are translated to native target types, BLOB/CLOB tables move
+        # fewer rows per chunk and LOBs are streamed in pieces
+        options = {
+            "chunk_size": self.chunk_size.get(),
+            "lob_chunk_size": self.lob_chunk_size.get(),
+            "load_method": self.load_method.get(),
+            "key": key_column or None,
+        }
+        if self.resumable.get() and key_column:
+            options["checkpoints"] = self.checkpoints
+            options["checkpoint_name"] = (
+                f"{self.endpoint_name(sgbd, self.source_details, self.source_config)}.{view_name}->"
+                f"{self.endpoint_name(target_sgbd, self.target_details, self.target_config)}.{target_table_name}")
+            checkpoint = self.checkpoints.get(options["checkpoint_name"])
+            if checkpoint and checkpoint["status"] == "running":
+                self.log(f"Resuming after {checkpoint['rows_done']} rows already copied.")
+
+        self.engine = MigrationEngine()
+        self.engine.subscribe(self.engine_events)
+        self.engine.add_copy(target_table_name, self.source_details["endpoint"], self.target_details["endpoint"],
+                             view_name, target_table_name, **options)
+        self.migrate_button.config(state=tk.DISABLED)
+        self.engine.start()
+        self.root.after(500, self.poll_engine)
+
+    def poll_engine(self):
+        # Checked first: every event of a finished engine is already queued
+        finished = not self.engine.running()
+        for event in self.engine_events.poll():
+            if event["status"] == "done":
+                self.log(f"Migration complete. {event['result']} rows copied to table: {event['job']}")
+            elif event["status"] in ("failed", "cancelled", "timeout"):
+                self.log(f"Error during migration: {event['error']}")
+            else:
+                self.log(format_event(event))
+        if not finished:
+            self.root.after(500, self.poll_engine)
+            return
+        self.update_migrate_button_state()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = DBMigrationApp(root)
     root.mainloop()
+    connection_manager.close_all()
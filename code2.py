@@ -1,10 +1,24 @@
 import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import sqlite3
-import psycopg2
-import mysql.connector
-import cx_Oracle
+from connections import connection_manager
+from streaming import DEFAULT_CHUNK_SIZE, StreamReader, copy_in_chunks
+from loaders import LOAD_METHODS, make_loader
+from pipeline import Pipeline
+from partitioning import PartitionedReader, quantile_ranges
+from state_store import CheckpointStore, WatermarkStore
+from checkpoints import ResumableMigration
+from schema import column_definitions, get_columns, get_foreign_keys, get_tables
+from scheduler import DEFAULT_TABLE_WORKERS, MigrationScheduler, dependency_graph
+from constraints import ConstraintBuilder, read_constraints
+from identities import (get_identity_columns, identity_references, keyed_identities, rebase_identity,
+                        without_inline_key)
+from lobs import DEFAULT_LOB_CHUNK_SIZE, lob_columns, lob_reader
+from engine import EventQueue, MigrationEngine, format_event
+from jobs import copy_table
+from sync import DEFAULT_WATERMARK_COLUMNS, DiffSync, current_watermark, incremental_sync, sync_name
 
 class DBMigrationApp:
     def __init__(self, root):
@@ -15,6 +29,18 @@ class DBMigrationApp:
         self.source_sgbd = tk.StringVar()
         self.target_sgbd = tk.StringVar()
         self.view_name = tk.StringVar()
+        self.chunk_size = tk.IntVar(value=DEFAULT_CHUNK_SIZE)
+        self.lob_chunk_size = tk.IntVar(value=DEFAULT_LOB_CHUNK_SIZE)
+        self.load_method = tk.StringVar()
+        self.key_column = tk.StringVar()
+        self.partitions = tk.IntVar(value=1)
+        self.writers = tk.IntVar(value=1)
+        self.update_mode = tk.StringVar()
+        self.watermark_columns = tk.StringVar(value=", ".join(DEFAULT_WATERMARK_COLUMNS))
+        self.watermarks = WatermarkStore()
+        self.checkpoints = CheckpointStore()
+        self.resumable_var = tk.BooleanVar(value=False)
+        self.resumable = None
         
         self.source_details = {}
         self.target_details = {}
@@ -22,6 +48,20 @@ class DBMigrationApp:
         self.source_connected = False
         self.target_connected = False
 
+        self.pipeline = None
+        self.schema_name = tk.StringVar()
+        self.table_workers = tk.IntVar(value=DEFAULT_TABLE_WORKERS)
+        self.deferred_constraints = tk.BooleanVar(value=True)
+        self.scheduler = None
+        self.builder = None
+        self.schema_settings = None
+        self.schema_events = queue.Queue()
+        self.pipeline_thread = None
+        self.pipeline_outcome = ""
+        self.engine = None
+        self.engine_events = EventQueue()
+        self.extra_connections = []
+
         self.create_widgets()
 
     def create_widgets(self):
@@ -37,6 +77,23 @@ class DBMigrationApp:
         
         ttk.Label(self.root, text="View Name:").pack(pady=5)
         ttk.Entry(self.root, textvariable=self.view_name, width=30).pack()
+        ttk.Label(self.root, text="Chunk Size (rows):").pack(pady=5)
+        ttk.Entry(self.root, textvariable=self.chunk_size, width=10).pack()
+        ttk.Label(self.root, text="LOB Chunk Size (rows, tables with BLOB/CLOB columns):").pack(pady=5)
+        ttk.Entry(self.root, textvariable=self.lob_chunk_size, width=10).pack()
+        ttk.Label(self.root, text="Load Method:").pack(pady=5)
+        ttk.OptionMenu(self.root, self.load_method, LOAD_METHODS[0], *LOAD_METHODS).pack()
+
+        parallel_frame = ttk.Frame(self.root)
+        parallel_frame.pack(pady=5)
+        ttk.Label(parallel_frame, text="Key Column:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(parallel_frame, textvariable=self.key_column, width=15).grid(row=0, column=1)
+        ttk.Label(parallel_frame, text="Readers:").grid(row=0, column=2, sticky=tk.W)
+        ttk.Spinbox(parallel_frame, from_=1, to=32, textvariable=self.partitions, width=4).grid(row=0, column=3)
+        ttk.Label(parallel_frame, text="Writers:").grid(row=0, column=4, sticky=tk.W)
+        ttk.Spinbox(parallel_frame, from_=1, to=16, textvariable=self.writers, width=4).grid(row=0, column=5)
+        ttk.Checkbutton(parallel_frame, text="Resumable (checkpoint on Key Column)",
+                        variable=self.resumable_var).grid(row=1, column=0, columnspan=6, sticky=tk.W)
         
         ttk.Label(self.root, text="Target Database", font=("Arial", 14)).pack(pady=10)
         target_frame = ttk.Frame(self.root)
@@ -48,7 +105,29 @@ class DBMigrationApp:
         
         self.migrate_button = ttk.Button(self.root, text="Migrate View to Table", command=self.migrate_view_to_table, state=tk.DISABLED)
         self.migrate_button.pack(pady=10)
+
+        schema_frame = ttk.Frame(self.root)
+        schema_frame.pack(pady=5)
+        ttk.Label(schema_frame, text="Schema:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(schema_frame, textvariable=self.schema_name, width=20).grid(row=0, column=1)
+        ttk.Label(schema_frame, text="Table Workers:").grid(row=0, column=2, sticky=tk.W)
+        ttk.Spinbox(schema_frame, from_=1, to=32, textvariable=self.table_workers, width=4).grid(row=0, column=3)
+        self.schema_button = ttk.Button(schema_frame, text="Migrate Schema", command=self.migrate_schema, state=tk.DISABLED)
+        self.schema_button.grid(row=0, column=4, padx=5)
+        ttk.Checkbutton(schema_frame, text="Build keys, indexes and foreign keys after the load",
+                        variable=self.deferred_constraints).grid(row=1, column=0, columnspan=5, sticky=tk.W)
+
+        self.cancel_button = ttk.Button(self.root, text="Cancel Migration", command=self.cancel_migration, state=tk.DISABLED)
+        self.cancel_button.pack(pady=10)
         
+        update_frame = ttk.Frame(self.root)
+        update_frame.pack(pady=5)
+        ttk.Label(update_frame, text="Update Mode:").grid(row=0, column=0, sticky=tk.W)
+        update_modes = ["incremental", "diff", "full"]
+        ttk.OptionMenu(update_frame, self.update_mode, update_modes[0], *update_modes).grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(update_frame, text="Watermark Columns:").grid(row=0, column=2, sticky=tk.W)
+        ttk.Entry(update_frame, textvariable=self.watermark_columns, width=30).grid(row=0, column=3)
+
         self.update_button = ttk.Button(self.root, text="Update Table", command=self.update_table, state=tk.DISABLED)
         self.update_button.pack(pady=10)
         
@@ -88,17 +167,18 @@ class DBMigrationApp:
         }
         try:
             sgbd = self.source_sgbd.get() if db_type == "source" else self.target_sgbd.get()
+            details["sgbd"] = sgbd
+            previous = self.source_details if db_type == "source" else self.target_details
             if sgbd == "SQLite":
                 file_path = filedialog.askopenfilename(filetypes=[["SQLite Files", "*.db"]])
                 if file_path:
-                    details["conn"] = sqlite3.connect(file_path)
+                    details["path"] = file_path
+                    details["conn"] = self.open_connection(sgbd, details)
             else:
-                connection_classes = {"PostgreSQL": psycopg2.connect, "MySQL": mysql.connector.connect, "Oracle": cx_Oracle.connect}
-                if sgbd == "Oracle":
-                    dsn = cx_Oracle.makedsn(details["host"], details["port"], service_name=details["database"])
-                    details["conn"] = cx_Oracle.connect(dsn=dsn, user=details["user"], password=details["password"])
-                else:
-                    details["conn"] = connection_classes[sgbd](**details)
+                details["conn"] = self.open_connection(sgbd, details)
+            if details.get("conn") and previous.get("conn"):
+                # Back to its pool: reconnecting to the same database reuses it
+                previous["conn"].close()
             
             if db_type == "source":
                 self.source_details = details
@@ -112,6 +192,10 @@ class DBMigrationApp:
             self.log(f"{db_type.capitalize()} connection failed: {e}")
         self.update_migrate_button_state()
     
+    def open_connection(self, sgbd, details):
+        """A pooled connection from saved connection details; close() returns it to the pool."""
+        return connection_manager.acquire(sgbd, details)
+    
     def log(self, message):
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
@@ -120,67 +204,393 @@ class DBMigrationApp:
         if self.source_connected and self.target_connected:
             self.migrate_button.config(state=tk.NORMAL)
             self.update_button.config(state=tk.NORMAL)
+            self.schema_button.config(state=tk.NORMAL)
     
+    def target_columns(self, columns, col_names):
+        """Column definitions of the target table, in native target types."""
+        if not columns:
+            # Not visible in the catalog (synonym, other owner...): keep everything as text
+            return ", ".join([f"{col} TEXT" for col in col_names])
+        return column_definitions(self.source_sgbd.get(), columns, self.target_sgbd.get())
+
+    def chunk_size_for(self, columns):
+        """Rows per chunk: LOB-bearing tables use the smaller LOB chunk size."""
+        if lob_columns(columns):
+            return self.lob_chunk_size.get()
+        return self.chunk_size.get()
+
+    def open_reader(self, source_conn, view_name, columns):
+        source_sgbd = self.source_sgbd.get()
+        key_column = self.key_column.get().strip()
+        partitions = self.partitions.get()
+        chunk_size = self.chunk_size_for(columns)
+        if key_column and partitions > 1:
+            # Several ranges per reader keeps the workers busy when ranges are uneven
+            ranges = quantile_ranges(source_conn, source_sgbd, view_name, key_column, partitions * 4)
+            self.log(f"Reading {view_name} as {len(ranges)} key ranges over {partitions} connections.")
+            reader = PartitionedReader(lambda: self.open_connection(source_sgbd, self.source_details),
+                                       source_sgbd, view_name, key_column, ranges,
+                                       workers=partitions, chunk_size=chunk_size)
+        elif lob_columns(columns):
+            self.log(f"{view_name} has LOB columns, copying {chunk_size} rows per chunk.")
+            reader = lob_reader(source_conn, source_sgbd, view_name, columns, key_column, chunk_size)
+        else:
+            reader = StreamReader(source_conn, source_sgbd, f"SELECT * FROM {view_name}", chunk_size=chunk_size)
+        return reader.open()
+
+    def open_loaders(self, target_conn, table_name, col_names):
+        target_sgbd = self.target_sgbd.get()
+        loaders = [make_loader(target_conn, target_sgbd, table_name, col_names, self.load_method.get())]
+        # SQLite serialises writers, extra connections would only wait on the lock
+        if target_sgbd != "SQLite":
+            for _ in range(self.writers.get() - 1):
+                conn = self.open_connection(target_sgbd, self.target_details)
+                self.extra_connections.append(conn)
+                loaders.append(make_loader(conn, target_sgbd, table_name, col_names, self.load_method.get()))
+        return loaders
+
     def migrate_view_to_table(self):
+        self.extra_connections = []
         try:
             source_conn = self.source_details["conn"]
             target_conn = self.target_details["conn"]
             view_name = self.view_name.get()
-            cursor = source_conn.cursor()
-            cursor.execute(f"SELECT * FROM {view_name}")
-            rows = cursor.fetchall()
-            col_names = [desc[0] for desc in cursor.description]
-            
-            create_table_query = f"CREATE TABLE IF NOT EXISTS {view_name} (" + ", ".join([f"{col} TEXT" for col in col_names]) + ")"
-            target_cursor = target_conn.cursor()
-            target_cursor.execute(create_table_query)
-            target_conn.commit()
-            
-            target_cursor.executemany(f"INSERT INTO {view_name} VALUES (" + ", ".join(["%s"] * len(col_names)) + ")", rows)
-            target_conn.commit()
-            
-            self.log("Migration completed successfully.")
+            key_column = self.key_column.get().strip()
+            columns = get_columns(source_conn, self.source_sgbd.get(), view_name)
+            if self.resumable_var.get() and key_column:
+                # Checkpointed runs read in key order with one reader and one writer
+                self.resumable = ResumableMigration(
+                    source_conn, self.source_sgbd.get(), target_conn, self.target_sgbd.get(),
+                    view_name, view_name, key_column,
+                    sync_name(self.source_details, self.target_details, view_name, view_name),
+                    self.chunk_size_for(columns), store=self.checkpoints)
+                reader = self.resumable.open_reader()
+                if self.resumable.resuming:
+                    self.log(f"Resuming after {self.resumable.checkpoint['rows_done']} rows already copied.")
+            else:
+                self.resumable = None
+                reader = self.open_reader(source_conn, view_name, columns)
+            try:
+                col_names = reader.columns
+
+                create_table_query = f"CREATE TABLE IF NOT EXISTS {view_name} ({self.target_columns(columns, col_names)})"
+                target_cursor = target_conn.cursor()
+                target_cursor.execute(create_table_query)
+                target_conn.commit()
+
+                if self.resumable:
+                    loader = make_loader(target_conn, self.target_sgbd.get(), view_name, col_names, self.load_method.get())
+                    loaders = [self.resumable.wrap_loader(loader, col_names)]
+                else:
+                    loaders = self.open_loaders(target_conn, view_name, col_names)
+            except Exception:
+                reader.close()
+                self.close_extra_connections()
+                raise
         except Exception as e:
             self.log(f"Migration failed: {e}")
-    
+            return
 
-    def update_table(self):
-        self.log("Updating table with new or modified records...")
+        # Source reads and target writes overlap in worker threads
+        self.pipeline = Pipeline(reader, loaders)
+        self.pipeline_thread = threading.Thread(target=self.run_pipeline, daemon=True)
+        self.migrate_button.config(state=tk.DISABLED)
+        self.update_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.pipeline_thread.start()
+        self.root.after(500, self.poll_pipeline, 0)
+
+    def run_pipeline(self):
+        try:
+            total = self.pipeline.run()
+            if self.resumable:
+                self.resumable.finish()
+            self.pipeline_outcome = f"Migration completed successfully ({total} rows)."
+        except Exception as e:
+            self.pipeline_outcome = f"Migration failed: {e}"
+        finally:
+            self.close_extra_connections()
+
+    def close_extra_connections(self):
+        for conn in self.extra_connections:
+            conn.close()
+        self.extra_connections = []
+
+    def poll_pipeline(self, last_logged):
+        rows_written = self.pipeline.rows_written
+        if rows_written != last_logged:
+            self.log(f"{rows_written} rows copied...")
+        if self.pipeline_thread.is_alive():
+            self.root.after(500, self.poll_pipeline, rows_written)
+            return
+        self.log(self.pipeline_outcome)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_migrate_button_state()
+
+    def cancel_migration(self):
+        if self.pipeline is not None:
+            self.log("Cancelling migration...")
+            self.pipeline.cancel()
+        if self.scheduler is not None:
+            self.log("Cancelling schema migration after the running tables...")
+            self.scheduler.cancel()
+        if self.engine is not None:
+            self.log("Cancelling update...")
+            self.engine.cancel()
+
+    def migrate_schema(self):
+        """Migrate every table of the source schema with its keys, indexes and foreign keys.
+
+        In deferred mode tables are created bare and loaded all at once, then
+        keys, indexes and foreign keys are built in a final phase. Otherwise
+        each table gets its constraints before its rows, parents before children.
+        """
+        source_sgbd = self.source_sgbd.get()
+        schema = self.schema_name.get().strip() or None
         try:
             source_conn = self.source_details["conn"]
-            target_conn = self.target_details["conn"]
-            view_name = self.view_name.get()
-            cursor = source_conn.cursor()
-            cursor.execute(f"SELECT * FROM {view_name}")
-            rows = cursor.fetchall()
-            col_names = [desc[0] for desc in cursor.description]
-            
-            # on supprime d'abord 
-            create_table_query = f"DROP TABLE IF EXISTS {view_name}"
-            target_cursor = target_conn.cursor()
-            target_cursor.execute(create_table_query)
-            target_conn.commit()
+            tables = get_tables(source_conn, source_sgbd, schema)
+            constraints = {table: read_constraints(source_conn, source_sgbd, f"{schema}.{table}" if schema else table)
+                           for table in tables}
+            # Trigger + sequence keys become identity columns, re-based after the load
+            identities = keyed_identities(get_identity_columns(source_conn, source_sgbd, schema), constraints)
+            references = identity_references(identities, constraints)
+            for table in identities:
+                constraints[table] = without_inline_key(self.target_sgbd.get(), constraints[table])
+            deferred = self.deferred_constraints.get()
+            if deferred:
+                # No foreign key exists on the target while loading: no order to respect
+                parents = {table: set() for table in tables}
+            else:
+                parents = dependency_graph(tables, get_foreign_keys(source_conn, source_sgbd, schema))
+            workers = self.table_workers.get()
+            if self.target_sgbd.get() == "SQLite":
+                # One writer at a time: SQLite locks the whole database file
+                workers = 1
+            settings = {
+                "source_sgbd": source_sgbd,
+                "target_sgbd": self.target_sgbd.get(),
+                "schema": schema,
+                "chunk_size": self.chunk_size.get(),
+                "lob_chunk_size": self.lob_chunk_size.get(),
+                "load_method": self.load_method.get(),
+                "deferred": deferred,
+                "constraints": constraints,
+                "identities": identities,
+                "identity_references": references,
+            }
+            self.schema_settings = settings
+            self.builder = ConstraintBuilder(lambda: self.open_connection(settings["target_sgbd"], self.target_details),
+                                             settings["target_sgbd"], workers=workers, on_event=self.schema_event)
+            self.scheduler = MigrationScheduler(parents, lambda table: self.migrate_schema_table(table, settings),
+                                                workers=workers, on_event=self.schema_event)
+        except Exception as e:
+            self.log(f"Schema migration failed: {e}")
+            return
 
-            
-            # et on cree a nouveau pour inserer les donee mises a jour
-            create_table_query = f"CREATE TABLE IF NOT EXISTS {view_name} (" + ", ".join([f"{col} TEXT" for col in col_names]) + ")"
-            target_cursor = target_conn.cursor()
-            target_cursor.execute(create_table_query)
-            target_conn.commit()
-            
-            target_cursor.executemany(f"INSERT INTO {view_name} VALUES (" + ", ".join(["%s"] * len(col_names)) + ")", rows)
-            target_conn.commit()
-            
-            self.log("Update completed successfully.")
+        self.log(f"Migrating {len(tables)} tables with {workers} workers.")
+        self.pipeline_thread = threading.Thread(target=self.run_scheduler, daemon=True)
+        self.migrate_button.config(state=tk.DISABLED)
+        self.update_button.config(state=tk.DISABLED)
+        self.schema_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.pipeline_thread.start()
+        self.root.after(500, self.poll_scheduler)
+
+    def migrate_schema_table(self, table_name, settings):
+        """Copy one table over its own pair of connections (runs in a worker thread)."""
+        source_sgbd, target_sgbd = settings["source_sgbd"], settings["target_sgbd"]
+        source_table = f"{settings['schema']}.{table_name}" if settings["schema"] else table_name
+        source_conn = self.open_connection(source_sgbd, self.source_details)
+        try:
+            target_conn = self.open_connection(target_sgbd, self.target_details)
+            try:
+                columns = get_columns(source_conn, source_sgbd, source_table)
+                target_cursor = target_conn.cursor()
+                identity = settings["identities"].get(table_name)
+                definitions = column_definitions(source_sgbd, columns, target_sgbd, identity=identity,
+                                                 identity_references=settings["identity_references"].get(table_name, ()))
+                target_cursor.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({definitions})")
+                target_conn.commit()
+                constraints = settings["constraints"][table_name]
+                if not settings["deferred"]:
+                    self.builder.build({table_name: constraints}, existing=settings["constraints"])
+                # A single-column primary key lets PostgreSQL LOBs be read in pieces
+                primary_key = constraints["primary_key"]
+                key = identity or (primary_key[1][0] if primary_key and len(primary_key[1]) == 1 else None)
+                chunk_size = settings["lob_chunk_size"] if lob_columns(columns) else settings["chunk_size"]
+                with lob_reader(source_conn, source_sgbd, source_table, columns, key, chunk_size) as reader:
+                    loader = make_loader(target_conn, target_sgbd, table_name, reader.columns, settings["load_method"])
+                    return copy_in_chunks(reader, loader)
+            finally:
+                target_conn.close()
+        finally:
+            source_conn.close()
+
+    def schema_event(self, table_name, status, detail):
+        # Called from worker threads: the Tk log is only touched by poll_scheduler
+        self.schema_events.put((table_name, status, detail))
+
+    def run_scheduler(self):
+        settings = self.schema_settings
+        try:
+            results = self.scheduler.run()
+            failed = [table for table, result in results.items() if isinstance(result, Exception)]
+            loaded = {table: settings["constraints"][table] for table in results if table not in failed}
+            if settings["deferred"] and loaded:
+                self.schema_events.put(("Keys, indexes and foreign keys", "started", None))
+                self.builder.build(loaded)
+            self.rebase_identities([table for table in loaded if table in settings["identities"]])
+            outcome = f"Schema migration finished: {len(loaded)} of {len(results)} tables migrated"
+            if failed:
+                outcome += f", not migrated: {', '.join(failed)}"
+            if self.builder.errors:
+                outcome += f", constraints not built: {', '.join(self.builder.errors)}"
+            self.pipeline_outcome = outcome + "."
         except Exception as e:
-            self.log(f"update failed: {e}")
+            self.pipeline_outcome = f"Schema migration failed: {e}"
+
+    def rebase_identities(self, tables):
+        """Restart each identity after the highest loaded key (runs in the scheduler thread)."""
+        if not tables:
+            return
+        settings = self.schema_settings
+        conn = self.open_connection(settings["target_sgbd"], self.target_details)
+        try:
+            for table_name in tables:
+                try:
+                    next_value = rebase_identity(conn, settings["target_sgbd"], table_name,
+                                                 settings["identities"][table_name])
+                    self.schema_events.put((table_name, "rebased", next_value))
+                except Exception as e:
+                    self.schema_events.put((table_name, "failed", e))
+        finally:
+            conn.close()
+
+    def poll_scheduler(self):
+        while True:
+            try:
+                table_name, status, detail = self.schema_events.get_nowait()
+            except queue.Empty:
+                break
+            if status == "done":
+                self.log(f"{table_name}: {detail} rows copied.")
+            elif status == "rebased":
+                self.log(f"{table_name}: identity restarts at {detail}.")
+            elif status in ("started", "built"):
+                self.log(f"{table_name}: {status}.")
+            else:
+                self.log(f"{table_name}: {status} ({detail}).")
+        if self.pipeline_thread.is_alive():
+            self.root.after(500, self.poll_scheduler)
+            return
+        self.log(self.pipeline_outcome)
+        self.scheduler = None
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_migrate_button_state()
+    
+
+    def update_table(self):
+        """Run the selected update mode as an engine job; the window only follows its events."""
+        settings = {
+            "mode": self.update_mode.get(),
+            "view_name": self.view_name.get(),
+            "key_column": self.key_column.get().strip(),
+            "watermark_columns": [col.strip() for col in self.watermark_columns.get().split(",") if col.strip()],
+            "source": (self.source_sgbd.get(), self.source_details),
+            "target": (self.target_sgbd.get(), self.target_details),
+            "chunk_size": self.chunk_size.get(),
+            "lob_chunk_size": self.lob_chunk_size.get(),
+            "load_method": self.load_method.get(),
+        }
+        self.log("Updating table with new or modified records...")
+        self.engine = MigrationEngine()
+        self.engine.subscribe(self.engine_events)
+        self.engine.add_task(settings["view_name"], self.run_update, settings,
+                             endpoints=[settings["source"], settings["target"]])
+        self.migrate_button.config(state=tk.DISABLED)
+        self.update_button.config(state=tk.DISABLED)
+        self.schema_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.engine.start()
+        self.root.after(500, self.poll_engine)
+
+    def run_update(self, job, settings):
+        # Runs in an engine thread: no Tk variable or widget is touched here
+        if settings["mode"] == "full":
+            return self.rebuild_table(job, settings)
+        if settings["mode"] == "diff":
+            return self.diff_table(job, settings)
+        return self.sync_table(job, settings)
+
+    def poll_engine(self):
+        # Checked first: every event of a finished engine is already queued
+        finished = not self.engine.running()
+        for event in self.engine_events.poll():
+            if event["status"] == "done":
+                self.log("Update completed successfully.")
+            elif event["status"] in ("failed", "cancelled", "timeout"):
+                self.log(f"update failed: {event['error']}")
+            elif event["status"] != "started":
+                self.log(format_event(event))
+        if not finished:
+            self.root.after(500, self.poll_engine)
+            return
+        self.engine = None
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_migrate_button_state()
 
+    def sync_table(self, job, settings):
+        view_name = settings["view_name"]
+        key_column = settings["key_column"]
+        if not key_column:
+            raise ValueError("Key Column is required for an incremental update.")
+        columns = settings["watermark_columns"]
+        (source_sgbd, source_details), (target_sgbd, target_details) = settings["source"], settings["target"]
+        name = sync_name(source_details, target_details, view_name, view_name)
 
+        with self.open_connection(source_sgbd, source_details) as source_conn, \
+                self.open_connection(target_sgbd, target_details) as target_conn:
+            total = incremental_sync(source_conn, source_sgbd, target_conn, target_sgbd,
+                                     view_name, view_name, key_column, self.watermarks, name,
+                                     watermark_columns=columns, chunk_size=settings["chunk_size"])
+            if total is None:
+                # First load: full copy, then start tracking from the mark seen before it
+                self.engine.notify(job, "No watermark stored yet, running a full load first.")
+                mark = current_watermark(source_conn, view_name, columns)
+        if total is None:
+            total = self.rebuild_table(job, settings)
+            if mark is not None:
+                self.watermarks.set(name, mark)
+        else:
+            self.engine.notify(job, f"{total} new or modified rows applied.")
+        return total
 
+    def diff_table(self, job, settings):
+        """Ship only the rows that differ, for sources without a usable timestamp."""
+        key_column = settings["key_column"]
+        if not key_column:
+            raise ValueError("Key Column is required for a diff update.")
+        view_name = settings["view_name"]
+        (source_sgbd, source_details), (target_sgbd, target_details) = settings["source"], settings["target"]
+        with self.open_connection(source_sgbd, source_details) as source_conn, \
+                self.open_connection(target_sgbd, target_details) as target_conn:
+            stats = DiffSync(source_conn, source_sgbd, target_conn, target_sgbd,
+                             view_name, view_name, key_column).run()
+        self.engine.notify(job, f"{stats['ranges']} ranges compared: {stats['inserted']} inserted, "
+                                f"{stats['updated']} updated, {stats['deleted']} deleted.")
+        return stats
 
+    def rebuild_table(self, job, settings):
+        # Drop and recreate the table, then copy every row again
+        return copy_table(job, settings["source"], settings["target"], settings["view_name"], replace=True,
+                          chunk_size=settings["chunk_size"], lob_chunk_size=settings["lob_chunk_size"],
+                          load_method=settings["load_method"], key=settings["key_column"] or None,
+                          on_chunk=lambda job, total, chunk: self.engine.notify(job, f"{total} rows copied..."))
 
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = DBMigrationApp(root)
     root.mainloop()
+    connection_manager.close_all()
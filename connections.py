@@ -0,0 +1,288 @@
+"""Pooled database connections shared by every front end.
+
+Connections are keyed by endpoint (engine, host, port, database, user or
+SQLite file), opened lazily up to a maximum, health-checked before reuse and
+handed out as PooledConnection proxies: close() gives the connection back to
+its pool instead of closing it, so code written for plain driver connections
+(readers, loaders, ConstraintBuilder, PartitionedReader) reuses warm ones.
+"""
+
+import hashlib
+import threading
+import time
+
+DEFAULT_MIN_SIZE = 0
+DEFAULT_MAX_SIZE = 32
+# A connection idle for longer than this is pinged before being reused
+DEFAULT_CHECK_AFTER = 30.0
+DEFAULT_ACQUIRE_TIMEOUT = 60.0
+
+def reset_session(sgbd, conn):
+    """Put a connection's session back to its defaults before it is reused.
+
+    Settings changed by a previous user (psycopg2 set_session(), SET
+    foreign_key_checks = 0, ...) would otherwise leak to the next one.
+    """
+    if sgbd == "PostgreSQL":
+        conn.reset()  # ABORT, RESET ALL, SET SESSION AUTHORIZATION DEFAULT
+        conn.set_session(isolation_level="DEFAULT", readonly="DEFAULT", deferrable="DEFAULT", autocommit=False)
+    elif sgbd == "MySQL":
+        conn.reset_session()  # COM_RESET_CONNECTION: session variables back to the global values
+
+
+PING_QUERIES = {
+    "PostgreSQL": "SELECT 1",
+    "MySQL": "SELECT 1",
+    "Oracle": "SELECT 1 FROM DUAL",
+}
+
+
+def connect(sgbd, details):
+    """Open a new driver connection from connection details.
+
+    details holds "path" for SQLite, otherwise "host", "port", "database",
+    "user" and "password". Drivers are imported on first use so a front end
+    only needs the ones it actually connects with.
+    """
+    if sgbd == "SQLite":
+        import sqlite3
+        # Pooled connections move between worker threads
+        return sqlite3.connect(details["path"], check_same_thread=False)
+    if sgbd == "Oracle":
+        import cx_Oracle
+        dsn = cx_Oracle.makedsn(details["host"], details["port"], service_name=details["database"])
+        return cx_Oracle.connect(dsn=dsn, user=details["user"], password=details["password"])
+    params = {key: details[key] for key in ("host", "port", "database", "user", "password") if details.get(key)}
+    if sgbd == "MySQL":
+        import mysql.connector
+        # LOCAL INFILE is needed by the LOAD DATA fast path
+        return mysql.connector.connect(allow_local_infile=True, **params)
+    if sgbd == "PostgreSQL":
+        import psycopg2
+        return psycopg2.connect(**params)
+    raise ValueError(f"Unsupported database type: {sgbd}")
+
+
+def endpoint_key(sgbd, details):
+    """Identify the database a pool connects to; the password is left out."""
+    if sgbd == "SQLite":
+        return (sgbd, details["path"])
+    return (sgbd, details.get("host"), str(details.get("port") or ""), details.get("database"), details.get("user"))
+
+
+def pool_key(sgbd, details):
+    """endpoint_key() plus a hash of the password: changed credentials get a new pool."""
+    password = hashlib.sha256(str(details.get("password") or "").encode("utf-8")).hexdigest()
+    return endpoint_key(sgbd, details) + (password,)
+
+
+class PooledConnection:
+    """A pooled driver connection; close() returns it to its pool."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise AttributeError(f"Connection already returned to its pool ({name})")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+    def discard(self):
+        """Close the underlying connection for good, e.g. after a network error."""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, broken=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Connections to one endpoint, opened on demand and reused.
+
+    At most max_size connections exist at once; acquire() waits up to
+    timeout seconds for one to come back once that many are out. Returned
+    connections are rolled back, have their session reset (reset_session())
+    and stay open for the next caller; one that cannot be reset is closed.
+    fill() opens min_size of them ahead of use.
+    """
+
+    def __init__(self, sgbd, details, min_size=DEFAULT_MIN_SIZE, max_size=DEFAULT_MAX_SIZE,
+                 check_after=DEFAULT_CHECK_AFTER, connect=connect):
+        self.sgbd = sgbd
+        self.details = dict(details)
+        self.min_size = min_size
+        self.max_size = max(1, max_size, min_size)
+        self.check_after = check_after
+        self._connect = connect
+        self._idle = []  # (connection, time returned)
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Condition()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _open(self):
+        return self._connect(self.sgbd, self.details)
+
+    def fill(self):
+        """Open connections up to min_size ahead of use."""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._open()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                raise
+            self.release(conn)
+
+    def _healthy(self, conn, idle_since):
+        query = PING_QUERIES.get(self.sgbd)
+        if query is None or time.monotonic() - idle_since < self.check_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        """Return a PooledConnection, reusing an idle connection when one is healthy."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        conn, idle_since = None, None
+                        self._size += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No free connection to {self.sgbd} after {timeout} seconds")
+                    self._lock.wait(remaining)
+            if conn is None:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+                return PooledConnection(self, conn)
+            if self._healthy(conn, idle_since):
+                return PooledConnection(self, conn)
+            # Dropped by the server or the network: replace it
+            self._close_quietly(conn)
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                # Never hand out a connection in the middle of someone else's transaction or settings
+                conn.rollback()
+                reset_session(self.sgbd, conn)
+            except Exception:
+                broken = True
+        with self._lock:
+            if broken or self._closed:
+                self._size -= 1
+                self._lock.notify()
+                keep = False
+            else:
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+                keep = True
+        if not keep:
+            self._close_quietly(conn)
+
+    def close(self):
+        """Close the idle connections; connections still out are closed when returned."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._lock.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+
+class ConnectionManager:
+    """One ConnectionPool per endpoint and credentials, created on first use and filled to min_size."""
+
+    def __init__(self, min_size=DEFAULT_MIN_SIZE, max_size=DEFAULT_MAX_SIZE, check_after=DEFAULT_CHECK_AFTER,
+                 connect=connect):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.check_after = check_after
+        self._connect = connect
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool(self, sgbd, details):
+        key = pool_key(sgbd, details)
+        with self._lock:
+            pool = self._pools.get(key)
+            created = pool is None or pool.closed
+            if created:
+                pool = ConnectionPool(sgbd, details, self.min_size, self.max_size, self.check_after, self._connect)
+                self._pools[key] = pool
+        if created:
+            # Opened outside the lock: other endpoints need not wait for this one
+            pool.fill()
+        return pool
+
+    def acquire(self, sgbd, details, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        """A pooled connection to the endpoint; close() it to give it back."""
+        return self.pool(sgbd, details).acquire(timeout)
+
+    def check(self, sgbd, details):
+        """Open (or reuse) one connection to validate the details, and keep it warm."""
+        self.acquire(sgbd, details).close()
+
+    def close_all(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+# Shared by the front ends of one process
+connection_manager = ConnectionManager()
@@ -0,0 +1,173 @@
+"""Primary keys, indexes and foreign keys built on the target after the bulk load."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from schema import get_indexes, get_primary_key, get_table_foreign_keys
+
+DEFAULT_BUILD_WORKERS = 4
+
+
+def read_constraints(conn, sgbd, source_table):
+    """Primary key, indexes and foreign keys of a source table, ready for ConstraintBuilder.build()."""
+    return {
+        "primary_key": get_primary_key(conn, sgbd, source_table),
+        "indexes": get_indexes(conn, sgbd, source_table),
+        "foreign_keys": get_table_foreign_keys(conn, sgbd, source_table),
+    }
+
+
+def primary_key_statement(sgbd, table_name, name, columns):
+    if sgbd == "SQLite":
+        # SQLite cannot add a primary key to an existing table; a unique index enforces the same
+        return f"CREATE UNIQUE INDEX {name} ON {table_name} ({', '.join(columns)})"
+    return f"ALTER TABLE {table_name} ADD CONSTRAINT {name} PRIMARY KEY ({', '.join(columns)})"
+
+
+def index_statement(table_name, index):
+    unique = "UNIQUE " if index["unique"] else ""
+    return f"CREATE {unique}INDEX {index['name']} ON {table_name} ({', '.join(index['columns'])})"
+
+
+def orphan_query(table_name, foreign_key):
+    """Count, in one anti-join, the child rows whose parent row is missing."""
+    not_null = " AND ".join(f"c.{col} IS NOT NULL" for col in foreign_key["columns"])
+    join = " AND ".join(f"p.{ref} = c.{col}" for col, ref in zip(foreign_key["columns"], foreign_key["ref_columns"]))
+    return (f"SELECT COUNT(*) FROM {table_name} c WHERE {not_null} "
+            f"AND NOT EXISTS (SELECT 1 FROM {foreign_key['ref_table']} p WHERE {join})")
+
+
+def foreign_key_statements(sgbd, table_name, foreign_key):
+    """Statements adding a foreign key without checking rows, then validating it in one pass.
+
+    Returns (statements, validation query): the query, when not None, must
+    count no orphans. SQLite cannot add a foreign key to an existing table,
+    so there the rows are only checked.
+    """
+    name = foreign_key["name"]
+    definition = (f"FOREIGN KEY ({', '.join(foreign_key['columns'])}) "
+                  f"REFERENCES {foreign_key['ref_table']} ({', '.join(foreign_key['ref_columns'])})")
+    add = f"ALTER TABLE {table_name} ADD CONSTRAINT {name} {definition}"
+    if sgbd == "PostgreSQL":
+        return [add + " NOT VALID", f"ALTER TABLE {table_name} VALIDATE CONSTRAINT {name}"], None
+    if sgbd == "Oracle":
+        return [add + " ENABLE NOVALIDATE", f"ALTER TABLE {table_name} MODIFY CONSTRAINT {name} VALIDATE"], None
+    if sgbd == "MySQL":
+        # With checks off InnoDB adds the key in place instead of re-checking row by row
+        return (["SET foreign_key_checks = 0", add, "SET foreign_key_checks = 1"],
+                orphan_query(table_name, foreign_key))
+    return [], orphan_query(table_name, foreign_key)
+
+
+def drop_foreign_key_statement(sgbd, table_name, name):
+    if sgbd == "MySQL":
+        return f"ALTER TABLE {table_name} DROP FOREIGN KEY {name}"
+    return f"ALTER TABLE {table_name} DROP CONSTRAINT {name}"
+
+
+# ALTER TABLE commits by itself there: rollback() cannot take back a foreign key
+# added before its validation failed, it has to be dropped
+AUTOCOMMIT_DDL = {"MySQL", "Oracle"}
+
+
+class ConstraintBuilder:
+    """Build keys, indexes and foreign keys of loaded tables.
+
+    connect is a callable returning a new target connection. Primary keys and
+    indexes are independent of each other and built concurrently on workers
+    connections; foreign keys follow once every key they reference exists.
+    A failed statement is reported through on_event(name, status, detail)
+    with status "built" or "failed" and does not stop the others.
+    """
+
+    def __init__(self, connect, sgbd, workers=DEFAULT_BUILD_WORKERS, on_event=None):
+        self.connect = connect
+        self.sgbd = sgbd
+        # SQLite locks the whole file for each build
+        self.workers = 1 if sgbd == "SQLite" else max(1, workers)
+        self.on_event = on_event
+        self.errors = {}
+
+    def _notify(self, name, status, detail=None):
+        if self.on_event:
+            self.on_event(name, status, detail)
+
+    def _execute(self, task):
+        name, statements, check, undo = task
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            try:
+                for statement in statements:
+                    cursor.execute(statement)
+                if check:
+                    cursor.execute(check)
+                    orphans = cursor.fetchone()[0]
+                    if orphans:
+                        raise ValueError(f"{orphans} rows reference a missing parent row")
+            finally:
+                cursor.close()
+            conn.commit()
+            self._notify(name, "built")
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            if undo:
+                # Fails harmlessly when the error came before the constraint was added
+                self._run_quietly(conn, undo)
+            self.errors[name] = e
+            self._notify(name, "failed", e)
+        finally:
+            if self.sgbd == "MySQL":
+                # Never hand a connection back with foreign key checks still off
+                self._run_quietly(conn, "SET foreign_key_checks = 1")
+            conn.close()
+
+    @staticmethod
+    def _run_quietly(conn, statement):
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(statement)
+            finally:
+                cursor.close()
+            conn.commit()
+        except Exception:
+            pass
+
+    def _run(self, tasks):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._execute, tasks))
+
+    def key_tasks(self, table_name, constraints):
+        tasks = []
+        if constraints["primary_key"]:
+            name, columns = constraints["primary_key"]
+            tasks.append((name, [primary_key_statement(self.sgbd, table_name, name, columns)], None, None))
+        for index in constraints["indexes"]:
+            tasks.append((index["name"], [index_statement(table_name, index)], None, None))
+        return tasks
+
+    def foreign_key_tasks(self, table_name, constraints):
+        tasks = []
+        for foreign_key in constraints["foreign_keys"]:
+            statements, check = foreign_key_statements(self.sgbd, table_name, foreign_key)
+            undo = (drop_foreign_key_statement(self.sgbd, table_name, foreign_key["name"])
+                    if self.sgbd in AUTOCOMMIT_DDL else None)
+            tasks.append((foreign_key["name"], statements, check, undo))
+        return tasks
+
+    def build(self, tables, existing=None):
+        """Build the constraints of {target table: read_constraints(...)}; returns {name: error}.
+
+        Foreign keys are only added when the parent is in tables or existing.
+        """
+        self._run([task for table_name, constraints in tables.items()
+                   for task in self.key_tasks(table_name, constraints)])
+        loaded = {table_name.lower() for table_name in list(tables) + list(existing or [])}
+        self._run([task for table_name, constraints in tables.items()
+                   for task in self.foreign_key_tasks(table_name, dict(
+                       constraints, foreign_keys=[fk for fk in constraints["foreign_keys"]
+                                                  if fk["ref_table"].lower() in loaded]))])
+        return self.errors
@@ -1,5 +1,6 @@
 import pandas as pd
 import tkinter as tk
+from csv_index import CsvRowIndex, sniff_delimiter
 from tkinter import filedialog, messagebox
 from tkinterdnd2 import DND_FILES, TkinterDnD
 
@@ -17,9 +18,16 @@ def importer_et_afficher(fichier=None):
     
     try:
         if fichier.endswith('.csv'):
-            df = pd.read_csv(fichier)
+            # L'index des lignes évite de charger tout le fichier pour l'aperçu et le comptage
+            # Séparateur deviné (",", ";", tabulation ou "|") : les exports Excel français utilisent ";"
+            with CsvRowIndex(fichier, errors="replace", delimiter=sniff_delimiter(fichier)) as index:
+                largeur = len(index.header)
+                lignes = [(ligne + [""] * largeur)[:largeur] for ligne in index.rows(0, 100)]
+                df = pd.DataFrame(lignes, columns=index.header)
+                total = len(index)
         elif fichier.endswith('.xlsx'):
             df = pd.read_excel(fichier)
+            total = len(df)
         else:
             messagebox.showerror("Erreur", "Format de fichier non supporté")
             return
@@ -29,7 +37,7 @@ def importer_et_afficher(fichier=None):
         apercu_text.insert(tk.END, df.head(100).to_string())
         
         # Afficher le nombre total d'enregistrements
-        count_label.config(text=f"Nombre total d'enregistrements : {len(df)}")
+        count_label.config(text=f"Nombre total d'enregistrements : {total}")
     except Exception as e:
         messagebox.showerror("Erreur", f"Une erreur est survenue : {str(e)}")
 
@@ -0,0 +1,201 @@
+"""Random access to the rows of a CSV file through an index of row byte offsets.
+
+The file is memory-mapped and scanned once for record starts; the offsets
+are kept in an array (8 bytes per row) and cached beside the file as
+<file>.rowidx, valid while the file keeps its size and modification time.
+Previews, sampling, parallel chunk parsing and resuming from a row then seek
+straight to the rows they need.
+"""
+
+import csv
+import io
+import mmap
+import os
+import random
+import re
+import struct
+from array import array
+
+CSV_ENCODING = "utf-8-sig"
+
+# Bumped when the offsets change meaning, so older caches are rebuilt
+_CACHE_MAGIC = b"CSVIDX3\n"
+_CACHE_HEADER = struct.Struct("<8sQqQc")  # magic, file size, mtime (ns), offset count, delimiter
+# Field separators sniff_delimiter() chooses from
+DELIMITERS = ",;\t|"
+_NEWLINE = re.compile(rb"\n")
+
+
+def _quote_state(line, in_quotes, delimiter=b","):
+    """Whether a record is still inside a quoted field at the end of line.
+
+    Follows the csv module: a quote opens a quoted field only at the start of
+    a field (after delimiter), "" inside a quoted field is a literal quote,
+    and any other quote (5'10" in an unquoted field) is plain data.
+    """
+    position = line.find(b'"')
+    while position >= 0:
+        if in_quotes:
+            if line[position + 1:position + 2] == b'"':
+                position = line.find(b'"', position + 2)
+                continue
+            in_quotes = False
+        elif position == 0 or line[position - 1:position] == delimiter:
+            in_quotes = True
+        position = line.find(b'"', position + 1)
+    return in_quotes
+
+
+def _record_offsets(data, delimiter=b","):
+    """Byte offset of every record start, header included, plus the end of data.
+
+    A line break inside a quoted field does not start a record (see
+    _quote_state()). Files without any quote skip the quote tracking.
+    """
+    offsets = array("Q")
+    size = len(data)
+    position = 0
+    if data.find(b'"') < 0:
+        for match in _NEWLINE.finditer(data):
+            end = match.end()
+            if end - position > 2 or data[position:end].strip():
+                offsets.append(position)
+            position = end
+        if position < size and data[position:size].strip():
+            offsets.append(position)
+        offsets.append(size)
+        return offsets
+
+    in_quotes = False
+    while position < size:
+        end = data.find(b"\n", position)
+        end = size if end < 0 else end + 1
+        line = data[position:end]
+        if not in_quotes and line.strip():
+            offsets.append(position)
+        in_quotes = _quote_state(line, in_quotes, delimiter)
+        position = end
+    offsets.append(size)
+    return offsets
+
+
+def sniff_delimiter(path, encoding=CSV_ENCODING, sample_bytes=64 * 1024):
+    """Field separator of a CSV file among DELIMITERS, guessed from its start; "," when unsure."""
+    with open(path, encoding=encoding, errors="replace", newline="") as file:
+        sample = file.read(sample_bytes)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def cache_path(path):
+    return path + ".rowidx"
+
+
+def _load_cache(path, stat, delimiter):
+    try:
+        with open(cache_path(path), "rb") as cache:
+            magic, size, mtime, count, cached_delimiter = _CACHE_HEADER.unpack(cache.read(_CACHE_HEADER.size))
+            if (magic != _CACHE_MAGIC or size != stat.st_size or mtime != stat.st_mtime_ns
+                    or cached_delimiter != delimiter):
+                return None
+            offsets = array("Q")
+            offsets.frombytes(cache.read(count * offsets.itemsize))
+    except (OSError, struct.error, ValueError):
+        return None
+    return offsets if len(offsets) == count else None
+
+
+def _save_cache(path, stat, offsets, delimiter):
+    temp_path = cache_path(path) + ".tmp"
+    try:
+        with open(temp_path, "wb") as cache:
+            cache.write(_CACHE_HEADER.pack(_CACHE_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets), delimiter))
+            offsets.tofile(cache)
+        os.replace(temp_path, cache_path(path))
+    except OSError:
+        # Read-only directory: the index works, it is just rebuilt next time
+        pass
+
+
+class CsvRowIndex:
+    """Row offsets of a CSV file: any row is read by one seek, whatever the file size.
+
+    Row 0 is the first data row; the header is parsed once into .header.
+    delimiter is the field separator, a single ASCII character (see
+    sniff_delimiter()). Reads go through a shared read-only memory map and
+    are safe from several threads. Bytes that do not decode raise ValueError;
+    previews may pass errors="replace" to show them as U+FFFD instead.
+    """
+
+    def __init__(self, path, encoding=CSV_ENCODING, use_cache=True, errors="strict", delimiter=","):
+        if len(delimiter) != 1 or not delimiter.isascii():
+            raise ValueError(f"CSV delimiter must be one ASCII character, not {delimiter!r}")
+        self.path = path
+        self.encoding = encoding
+        self.errors = errors
+        self.delimiter = delimiter
+        delimiter_byte = delimiter.encode("ascii")
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        # An empty file cannot be mapped
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self.offsets = _load_cache(path, stat, delimiter_byte) if use_cache else None
+        if self.offsets is None:
+            self.offsets = _record_offsets(self._data, delimiter_byte)
+            if use_cache:
+                _save_cache(path, stat, self.offsets, delimiter_byte)
+        self.header = self._parse(0, 1)[0] if len(self.offsets) > 1 else []
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return max(len(self.offsets) - 2, 0)
+
+    def byte_offset(self, row):
+        """Position of a data row in the file; len(self) gives the end of the last row."""
+        return self.offsets[min(max(row, 0), len(self)) + 1]
+
+    def _parse(self, first_record, last_record):
+        start, end = self.offsets[first_record], self.offsets[last_record]
+        # Only the start of the file can carry a byte order mark
+        encoding = self.encoding if start == 0 else self.encoding.replace("-sig", "")
+        try:
+            text = self._data[start:end].decode(encoding, errors=self.errors)
+        except UnicodeDecodeError as e:
+            raise ValueError(f"{self.path}: bytes at offset {start + e.start} are not valid {self.encoding}") from e
+        return [row for row in csv.reader(io.StringIO(text, newline=""), delimiter=self.delimiter) if row]
+
+    def rows(self, start, stop):
+        """Data rows start to stop (excluded), parsed from one slice of the map."""
+        start, stop = max(start, 0), min(stop, len(self))
+        if start >= stop:
+            return []
+        return self._parse(start + 1, stop + 1)
+
+    def row(self, number):
+        return self.rows(number, number + 1)[0]
+
+    def sample(self, count, seed=None):
+        """Up to count rows drawn at random over the whole file, in file order."""
+        numbers = sorted(random.Random(seed).sample(range(len(self)), min(count, len(self))))
+        return [self.row(number) for number in numbers]
+
+    def chunk_ranges(self, chunk_rows, start=0):
+        """(start, stop) row ranges covering the file from row start, for parallel parsing."""
+        return [(first, min(first + chunk_rows, len(self))) for first in range(max(start, 0), len(self), chunk_rows)]
+
+    def iter_chunks(self, chunk_rows, start=0):
+        """Lists of parsed rows from row start on, e.g. to resume an interrupted import."""
+        for first, stop in self.chunk_ranges(chunk_rows, start):
+            yield self.rows(first, stop)
@@ -0,0 +1,65 @@
+"""Chunked CSV to table loading through the bulk loaders."""
+
+import csv
+
+from connections import connection_manager
+from csv_index import CsvRowIndex
+from loaders import make_loader
+from streaming import DEFAULT_CHUNK_SIZE
+
+CSV_ENCODING = "utf-8-sig"
+
+
+def read_header(path, delimiter=","):
+    with open(path, newline="", encoding=CSV_ENCODING) as file:
+        return next(csv.reader(file, delimiter=delimiter), [])
+
+
+def count_csv_rows(path, delimiter=","):
+    """Data rows of a CSV file, from its row index (built once, then cached beside the file)."""
+    # Counting needs the offsets only: the header may be in any encoding
+    with CsvRowIndex(path, CSV_ENCODING, errors="replace", delimiter=delimiter) as index:
+        return len(index)
+
+
+def csv_chunks(path, mapping, chunk_size=DEFAULT_CHUNK_SIZE, start_row=0, encoding=CSV_ENCODING, delimiter=","):
+    """Yield lists of rows holding the mapped columns only, in mapping order.
+
+    mapping is {CSV column: table column}. Empty fields become NULL, so they
+    load into typed columns. start_row skips the data rows already loaded:
+    the row index seeks straight to it instead of parsing the rows before.
+    Bytes that are not valid in encoding raise ValueError, never load altered.
+    """
+    with CsvRowIndex(path, encoding, delimiter=delimiter) as index:
+        header = index.header
+        missing = [col for col in mapping if col not in header]
+        if missing:
+            raise ValueError(f"Columns not found in the CSV file: {', '.join(missing)}")
+        indexes = [header.index(col) for col in mapping]
+        for rows in index.iter_chunks(chunk_size, start_row):
+            yield [tuple((row[i] if i < len(row) and row[i] != "" else None) for i in indexes) for row in rows]
+
+
+def load_csv(job, path, target, table_name, mapping, chunk_size=DEFAULT_CHUNK_SIZE, load_method="auto",
+             on_chunk=None, start_row=0, encoding=CSV_ENCODING, delimiter=","):
+    """Job function (see jobs.JobEngine): append the mapped CSV columns to an existing table.
+
+    target is a (sgbd, details) endpoint. Each chunk is committed by the
+    fastest loader of the target (COPY, LOAD DATA, executemany) before
+    on_chunk(job, total, chunk) is called. Returns the rows loaded; an
+    interrupted load resumes with start_row set to the rows already loaded.
+    A file that is not UTF-8 (e.g. Latin-1) needs its encoding named, one
+    separated by ";" or tabs its delimiter (see csv_index.sniff_delimiter()).
+    """
+    if not mapping:
+        raise ValueError("No CSV column is mapped to a table column.")
+    sgbd = target[0]
+    total = 0
+    with connection_manager.acquire(*target) as conn:
+        loader = make_loader(conn, sgbd, table_name, list(mapping.values()), load_method)
+        for chunk in csv_chunks(path, mapping, chunk_size, start_row, encoding, delimiter):
+            total += loader.load(chunk)
+            if on_chunk:
+                on_chunk(job, total, chunk)
+            job.check_cancelled()
+    return total
@@ -0,0 +1,510 @@
+"""Offline parser for Oracle DDL exports (SQL Developer style) into a cached schema model.
+
+The model is a plain dict:
+
+    {"schema": "CAMEROUNID",
+     "tables": {name: {"name", "columns", "primary_key", "indexes", "foreign_keys", "comment"}},
+     "sequences": {name: {"name", "start", "increment", "min", "max", "cache", "cycle"}},
+     "triggers": {name: {"name", "table", "timing", "events", "body", "enabled", "sequence", "column"}}}
+
+Columns have the same keys as schema.get_columns() on an Oracle source (plus
+"default" and "comment"), and each table carries the keys of
+constraints.read_constraints(), so type mapping, target DDL and the
+constraint build all work from the model without an Oracle connection.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+from identities import identity_references, keyed_identities, model_identity_columns, without_inline_key
+from schema import column_definitions, column_types
+
+# Bump when the model layout changes so stale caches are rebuilt
+MODEL_VERSION = 2
+
+_NAME = r'(?:"[^"]+"|[A-Za-z_][\w$#]*)'
+_QUALIFIED = rf"{_NAME}(?:\s*\.\s*{_NAME})?"
+_PLSQL_START = re.compile(r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:EDITIONABLE\s+)?"
+                          r"(?:TRIGGER|PROCEDURE|FUNCTION|PACKAGE|TYPE)\b", re.I)
+_COLUMN_STOP = re.compile(r"\s+(?:DEFAULT|NOT\s+NULL|NULL|CONSTRAINT|PRIMARY\s+KEY|UNIQUE|REFERENCES|CHECK|"
+                          r"ENABLE|DISABLE|GENERATED|VISIBLE|INVISIBLE)\b", re.I)
+
+
+def _unquote(name):
+    name = name.strip()
+    if name.startswith('"') and name.endswith('"'):
+        return name[1:-1]
+    return name.upper()
+
+
+def _split_qualified(text):
+    """'"OWNER"."NAME"' -> ("OWNER", "NAME"); a bare name has no owner."""
+    parts = re.findall(_NAME, text)
+    if len(parts) >= 2:
+        return _unquote(parts[0]), _unquote(parts[1])
+    return None, _unquote(parts[0])
+
+
+def _name_list(text):
+    return [_unquote(name) for name in re.findall(_NAME, text)]
+
+
+def _split_top_level(text, separator=","):
+    """Split on separator outside parentheses and quotes."""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _parenthesized(text, start):
+    """Return (content, end) of the parenthesised group opening at or after start."""
+    open_at = text.index("(", start)
+    depth, quote = 0, None
+    for i in range(open_at, len(text)):
+        char = text[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_at + 1:i], i + 1
+    raise ValueError("Unbalanced parentheses")
+
+
+def split_statements(text):
+    """Split an export into statements: ';' terminated SQL and '/' terminated PL/SQL blocks."""
+    statements, buffer, in_plsql = [], [], False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        if not buffer and _PLSQL_START.match(stripped):
+            in_plsql = True
+        if in_plsql:
+            if stripped == "/":
+                statements.append("\n".join(buffer).strip())
+                buffer, in_plsql = [], False
+            else:
+                buffer.append(line)
+            continue
+        if stripped.startswith("--"):
+            continue
+        buffer.append(line)
+        # A statement ends on a ';' outside quotes at the end of a line
+        joined = "\n".join(buffer)
+        if stripped.endswith(";") and joined.count("'") % 2 == 0:
+            statements.append(joined.strip()[:-1].strip())
+            buffer = []
+    if buffer:
+        statements.append("\n".join(buffer).strip().rstrip(";"))
+    return [statement for statement in statements if statement]
+
+
+def parse_column(definition):
+    """Parse '"ID" NUMBER(*,0) DEFAULT 0 NOT NULL' into a column metadata dict."""
+    match = re.match(rf"\s*({_NAME})\s+(.*)$", definition, re.S)
+    name, rest = _unquote(match.group(1)), match.group(2).strip()
+    stop = _COLUMN_STOP.search(" " + rest)
+    type_text = (rest[:stop.start() - 1] if stop else rest).strip()
+    options = rest[len(type_text):]
+
+    type_match = re.match(r"([A-Za-z][A-Za-z0-9_ ]*?)\s*(?:\(([^)]*)\))?\s*(WITH\s+(?:LOCAL\s+)?TIME\s+ZONE)?\s*$",
+                          type_text, re.I)
+    base = re.sub(r"\s+", " ", type_match.group(1).upper()) if type_match else type_text.upper()
+    args = [arg.strip() for arg in type_match.group(2).split(",")] if type_match and type_match.group(2) else []
+    zone = type_match.group(3) if type_match else None
+
+    length = precision = scale = None
+    if base in ("NUMBER", "FLOAT", "DECIMAL", "NUMERIC"):
+        if args:
+            precision = None if args[0] == "*" else int(args[0])
+            scale = int(args[1]) if len(args) > 1 else 0 if base != "FLOAT" else None
+        if base == "FLOAT":
+            precision, scale = precision or 126, None
+        elif base in ("DECIMAL", "NUMERIC"):
+            base, scale = "NUMBER", scale or 0
+    elif base in ("INTEGER", "INT", "SMALLINT"):
+        # Stored by Oracle as NUMBER(*,0)
+        base, scale = "NUMBER", 0
+    elif base == "TIMESTAMP":
+        scale = int(args[0]) if args else 6
+        base = f"TIMESTAMP({scale})" + (" " + re.sub(r"\s+", " ", zone.upper()) if zone else "")
+    elif args:
+        length = int(args[0].split()[0])
+
+    default = None
+    default_match = re.search(r"\bDEFAULT\s+(.+?)(?=\s+(?:NOT\s+NULL|NULL|CONSTRAINT|ENABLE|DISABLE)\b|\s*$)",
+                              options, re.I | re.S)
+    if default_match:
+        default = default_match.group(1).strip()
+    column = {
+        "name": name,
+        "type": base,
+        "length": length,
+        "precision": precision,
+        "scale": scale,
+        "nullable": not re.search(r"\bNOT\s+NULL\b", options, re.I),
+        "column_type": None,
+        "default": default,
+        "comment": None,
+    }
+    return column, options
+
+
+def _table(model, owner, name):
+    model["schema"] = model["schema"] or owner
+    return model["tables"].setdefault(name, {
+        "name": name, "columns": [], "primary_key": None, "indexes": [], "foreign_keys": [], "comment": None,
+    })
+
+
+def _column_of(table, name):
+    for column in table["columns"]:
+        if column["name"] == name:
+            return column
+    return None
+
+
+def _parse_constraint(table, text):
+    """Apply an out-of-line constraint ('CONSTRAINT x PRIMARY KEY (...)', ...) to table."""
+    match = re.match(rf"(?:CONSTRAINT\s+({_NAME})\s+)?(PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK)\s*(.*)$",
+                     text, re.I | re.S)
+    if not match:
+        return
+    name = _unquote(match.group(1)) if match.group(1) else None
+    kind = re.sub(r"\s+", " ", match.group(2).upper())
+    rest = match.group(3)
+    if kind == "CHECK":
+        return
+    columns_text, end = _parenthesized(rest, 0)
+    columns = _name_list(columns_text)
+    if kind == "PRIMARY KEY":
+        table["primary_key"] = (name or f"PK_{table['name']}", columns)
+    elif kind == "UNIQUE":
+        table["indexes"].append({"name": name or f"UX_{table['name']}_{len(table['indexes'])}",
+                                 "columns": columns, "unique": True})
+    else:
+        ref = re.match(rf"\s*REFERENCES\s+({_QUALIFIED})\s*", rest[end:], re.I)
+        ref_columns_text, ref_end = _parenthesized(rest[end:], ref.end())
+        table["foreign_keys"].append({
+            "name": name or f"FK_{table['name']}_{len(table['foreign_keys'])}",
+            "columns": columns,
+            "ref_table": _split_qualified(ref.group(1))[1],
+            "ref_columns": _name_list(ref_columns_text),
+            "enabled": not re.search(r"\bDISABLE\b", rest[end + ref_end:], re.I),
+        })
+
+
+def _parse_create_table(model, statement):
+    match = re.match(rf"CREATE\s+(?:GLOBAL\s+TEMPORARY\s+)?TABLE\s+({_QUALIFIED})\s*", statement, re.I)
+    owner, name = _split_qualified(match.group(1))
+    table = _table(model, owner, name)
+    body, _ = _parenthesized(statement, match.end())
+    for item in _split_top_level(body):
+        if re.match(r"(?:CONSTRAINT|PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK)\b", item, re.I):
+            _parse_constraint(table, item)
+            continue
+        column, options = parse_column(item)
+        table["columns"].append(column)
+        inline = re.search(rf"(?:CONSTRAINT\s+({_NAME})\s+)?PRIMARY\s+KEY", options, re.I)
+        if inline:
+            pk_name = _unquote(inline.group(1)) if inline.group(1) else f"PK_{name}"
+            table["primary_key"] = (pk_name, [column["name"]])
+
+
+def _parse_alter_table(model, statement):
+    match = re.match(rf"ALTER\s+TABLE\s+({_QUALIFIED})\s+(ADD|MODIFY)\s*(.*)$", statement, re.I | re.S)
+    if not match:
+        return
+    owner, name = _split_qualified(match.group(1))
+    table = _table(model, owner, name)
+    action, rest = match.group(2).upper(), match.group(3).strip()
+    if action == "ADD":
+        _parse_constraint(table, rest)
+        return
+    # MODIFY ("COL" NOT NULL ENABLE) or MODIFY ("A" ..., "B" ...)
+    content = _parenthesized(rest, 0)[0] if rest.startswith("(") else rest
+    for item in _split_top_level(content):
+        column_match = re.match(rf"({_NAME})\s*(.*)$", item, re.S)
+        column = _column_of(table, _unquote(column_match.group(1)))
+        if column is None:
+            continue
+        options = column_match.group(2)
+        if re.search(r"\bNOT\s+NULL\b", options, re.I):
+            column["nullable"] = False
+        elif re.search(r"\bNULL\b", options, re.I):
+            column["nullable"] = True
+
+
+def _parse_create_index(model, statement):
+    match = re.match(rf"CREATE\s+(UNIQUE\s+|BITMAP\s+)?INDEX\s+({_QUALIFIED})\s+ON\s+({_QUALIFIED})\s*",
+                     statement, re.I)
+    if not match:
+        return
+    owner, table_name = _split_qualified(match.group(3))
+    content, _ = _parenthesized(statement, match.end())
+    items = _split_top_level(content)
+    if not all(re.fullmatch(rf"{_NAME}(?:\s+(?:ASC|DESC))?", item, re.I) for item in items):
+        # Function-based index: does not translate to other dialects
+        return
+    _table(model, owner, table_name)["indexes"].append({
+        "name": _split_qualified(match.group(2))[1],
+        "columns": [_unquote(re.match(_NAME, item).group(0)) for item in items],
+        "unique": bool(match.group(1) and match.group(1).strip().upper() == "UNIQUE"),
+    })
+
+
+def _parse_create_sequence(model, statement):
+    match = re.match(rf"CREATE\s+SEQUENCE\s+({_QUALIFIED})(.*)$", statement, re.I | re.S)
+    owner, name = _split_qualified(match.group(1))
+    model["schema"] = model["schema"] or owner
+    options = match.group(2)
+
+    def number(keyword, default):
+        found = re.search(rf"\b{keyword}\s+(-?\d+)", options, re.I)
+        return int(found.group(1)) if found else default
+
+    model["sequences"][name] = {
+        "name": name,
+        "start": number("START WITH", 1),
+        "increment": number("INCREMENT BY", 1),
+        "min": number("MINVALUE", None),
+        "max": number("MAXVALUE", None),
+        "cache": number("CACHE", None),
+        "cycle": bool(re.search(r"\bCYCLE\b", options, re.I)) and not re.search(r"\bNOCYCLE\b", options, re.I),
+    }
+
+
+def _parse_create_trigger(model, statement):
+    match = re.match(rf"CREATE\s+(?:OR\s+REPLACE\s+)?(?:EDITIONABLE\s+)?TRIGGER\s+({_QUALIFIED})\s+"
+                     rf"(BEFORE|AFTER|INSTEAD\s+OF)\s+(.+?)\s+ON\s+({_QUALIFIED})", statement, re.I | re.S)
+    if not match:
+        return
+    owner, name = _split_qualified(match.group(1))
+    model["schema"] = model["schema"] or owner
+    nextval = re.search(rf":new\.({_NAME})\s*:=\s*(?:{_NAME}\s*\.\s*)?({_NAME})\s*\.\s*nextval", statement, re.I)
+    model["triggers"][name] = {
+        "name": name,
+        "table": _split_qualified(match.group(4))[1],
+        "timing": re.sub(r"\s+", " ", match.group(2).upper()),
+        "events": [event.upper() for event in re.findall(r"INSERT|UPDATE|DELETE", match.group(3), re.I)],
+        "body": statement,
+        "enabled": True,
+        # Trigger-maintained surrogate key: :new.<column> := <sequence>.nextval
+        "sequence": _unquote(nextval.group(2)) if nextval else None,
+        "column": _unquote(nextval.group(1)) if nextval else None,
+    }
+
+
+def _parse_alter_trigger(model, statement):
+    match = re.match(rf"ALTER\s+TRIGGER\s+({_QUALIFIED})\s+(ENABLE|DISABLE)", statement, re.I)
+    if match:
+        trigger = model["triggers"].get(_split_qualified(match.group(1))[1])
+        if trigger:
+            trigger["enabled"] = match.group(2).upper() == "ENABLE"
+
+
+def _parse_comment(model, statement):
+    match = re.match(rf"COMMENT\s+ON\s+(TABLE|COLUMN)\s+({_QUALIFIED}(?:\s*\.\s*{_NAME})?)\s+IS\s+'(.*)'$",
+                     statement, re.I | re.S)
+    if not match:
+        return
+    names = [_unquote(name) for name in re.findall(_NAME, match.group(2))]
+    text = match.group(3).replace("''", "'")
+    if match.group(1).upper() == "TABLE":
+        table = model["tables"].get(names[-1])
+        if table:
+            table["comment"] = text
+        return
+    table = model["tables"].get(names[-2])
+    column = _column_of(table, names[-1]) if table else None
+    if column:
+        column["comment"] = text
+
+
+_HANDLERS = [
+    (re.compile(r"CREATE\s+(?:GLOBAL\s+TEMPORARY\s+)?TABLE\b", re.I), _parse_create_table),
+    (re.compile(r"ALTER\s+TABLE\b", re.I), _parse_alter_table),
+    (re.compile(r"CREATE\s+(?:UNIQUE\s+|BITMAP\s+)?INDEX\b", re.I), _parse_create_index),
+    (re.compile(r"CREATE\s+SEQUENCE\b", re.I), _parse_create_sequence),
+    (re.compile(r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:EDITIONABLE\s+)?TRIGGER\b", re.I), _parse_create_trigger),
+    (re.compile(r"ALTER\s+TRIGGER\b", re.I), _parse_alter_trigger),
+    (re.compile(r"COMMENT\s+ON\b", re.I), _parse_comment),
+]
+
+
+def parse_ddl(text):
+    """Parse the text of an Oracle DDL export into a schema model."""
+    model = {"schema": None, "tables": {}, "sequences": {}, "triggers": {}}
+    for statement in split_statements(text):
+        for pattern, handler in _HANDLERS:
+            if pattern.match(statement):
+                handler(model, statement)
+                break
+    for table in model["tables"].values():
+        # Oracle exports the index backing each primary key as a separate CREATE UNIQUE INDEX
+        if table["primary_key"]:
+            pk_name, pk_columns = table["primary_key"]
+            table["indexes"] = [index for index in table["indexes"]
+                                if index["name"] != pk_name and not (index["unique"] and index["columns"] == pk_columns)]
+            for column in table["columns"]:
+                if column["name"] in pk_columns:
+                    column["nullable"] = False
+    return model
+
+
+def default_cache_path(ddl_path):
+    return ddl_path + ".model.json"
+
+
+def _model_from_json(model):
+    # JSON has no tuples: primary keys come back as (name, columns) like parse_ddl() builds them
+    for table in model["tables"].values():
+        if table["primary_key"]:
+            table["primary_key"] = tuple(table["primary_key"])
+    return model
+
+
+def load_schema_model(ddl_path, cache_path=None):
+    """Return the model of a DDL export, from the cache while the file is unchanged.
+
+    The cache is JSON, so reading it never runs code, and is keyed on the
+    SHA-256 of the export and the model version; any change to either
+    re-parses the export and rewrites the cache.
+    """
+    cache_path = cache_path or default_cache_path(ddl_path)
+    with open(ddl_path, "rb") as ddl:
+        data = ddl.read()
+    key = {"version": MODEL_VERSION, "sha256": hashlib.sha256(data).hexdigest()}
+    try:
+        with open(cache_path, encoding="utf-8") as cache:
+            cached = json.load(cache)
+        if cached.get("key") == key:
+            return _model_from_json(cached["model"])
+    except (OSError, ValueError, AttributeError, KeyError, TypeError):
+        pass
+
+    # Same text as reading the file in text mode: universal newlines
+    model = parse_ddl(data.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n"))
+    temp_path = cache_path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as cache:
+            json.dump({"key": key, "model": model}, cache)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # Read-only location: the model is still usable, just not cached
+        pass
+    return model
+
+
+def model_foreign_keys(model):
+    """(child, parent, enforced) tuples, as returned by schema.get_foreign_keys()."""
+    return [(table["name"], foreign_key["ref_table"], foreign_key["enabled"])
+            for table in model["tables"].values() for foreign_key in table["foreign_keys"]]
+
+
+def model_identities(model):
+    """{table: key column} of the trigger + sequence keys to create as identity columns."""
+    return keyed_identities(model_identity_columns(model), model["tables"])
+
+
+def model_identity_references(model):
+    """{table: [columns]} of the foreign key columns pointing at an identity key."""
+    return identity_references(model_identities(model), model["tables"])
+
+
+def create_table_statements(model, target_sgbd):
+    """Bare CREATE TABLE statements for the target, keys and indexes excluded.
+
+    Trigger-maintained keys become identity columns (see identities.py), and
+    the columns referencing them take the same integer type.
+    """
+    identities, references = model_identities(model), model_identity_references(model)
+    statements = []
+    for table in model["tables"].values():
+        definitions = column_definitions("Oracle", table["columns"], target_sgbd, identities.get(table["name"]),
+                                         references.get(table["name"], ()))
+        statements.append(f"CREATE TABLE {table['name']} ({definitions})")
+    return statements
+
+
+def foreign_key_type_mismatches(model, target_sgbd):
+    """Foreign key columns whose target type differs from the column they reference.
+
+    Returns (table, constraint, column, type, parent, parent column, parent
+    type) tuples; the target would refuse to create those foreign keys.
+    """
+    identities, references = model_identities(model), model_identity_references(model)
+    types = {table["name"]: dict(column_types("Oracle", table["columns"], target_sgbd, identities.get(table["name"]),
+                                              references.get(table["name"], ())))
+             for table in model["tables"].values()}
+    mismatches = []
+    for table in model["tables"].values():
+        for foreign_key in table["foreign_keys"]:
+            parent = types.get(foreign_key["ref_table"], {})
+            for column, ref_column in zip(foreign_key["columns"], foreign_key["ref_columns"]):
+                column_type, ref_type = types[table["name"]].get(column), parent.get(ref_column)
+                if column_type and ref_type and column_type != ref_type:
+                    mismatches.append((table["name"], foreign_key["name"], column, column_type,
+                                       foreign_key["ref_table"], ref_column, ref_type))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse an Oracle DDL export and print the target DDL.")
+    parser.add_argument("ddl_file")
+    parser.add_argument("--target", default="PostgreSQL", choices=["SQLite", "PostgreSQL", "MySQL", "Oracle"])
+    args = parser.parse_args()
+
+    from constraints import index_statement, primary_key_statement, foreign_key_statements
+    from scheduler import dependency_graph, chain_lengths
+
+    model = load_schema_model(args.ddl_file)
+    print(f"-- {len(model['tables'])} tables, {len(model['sequences'])} sequences, "
+          f"{len(model['triggers'])} triggers in schema {model['schema']}")
+    parents = dependency_graph(list(model["tables"]), model_foreign_keys(model))
+    print(f"-- Longest foreign key chain: {max(chain_lengths(parents).values(), default=0)} tables")
+    for statement in create_table_statements(model, args.target):
+        print(statement + ";")
+    identities = model_identities(model)
+    for table in model["tables"].values():
+        if table["name"] in identities:
+            table = without_inline_key(args.target, table)
+        if table["primary_key"]:
+            print(primary_key_statement(args.target, table["name"], *table["primary_key"]) + ";")
+        for index in table["indexes"]:
+            print(index_statement(table["name"], index) + ";")
+    for table in model["tables"].values():
+        for foreign_key in table["foreign_keys"]:
+            for statement in foreign_key_statements(args.target, table["name"], foreign_key)[0]:
+                print(statement + ";")
+    for table_name, column in identities.items():
+        print(f"-- After the load: restart {table_name}.{column} at MAX({column}) + 1")
+    for table_name, name, column, column_type, parent, ref_column, ref_type in \
+            foreign_key_type_mismatches(model, args.target):
+        print(f"-- WARNING: {name} links {table_name}.{column} ({column_type}) to {parent}.{ref_column} ({ref_type})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Headless migration core: jobs run in a background thread and report progress events.
+
+Front ends never copy rows themselves. They add jobs, start the engine and
+subscribe to its events; the same engine runs unattended from the command
+line (python engine.py --help).
+
+An event is a dict with "job" and "status" ("started", "progress", "message",
+"done", "failed", "cancelled" or "timeout"); progress events also carry
+"rows", "bytes" (estimated), "rate" (rows per second), "total" (source row
+count, when counted, or None) and "eta" (seconds or None). Subscribers are called from the
+engine threads: GUI front ends drain an EventQueue from their own thread.
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+from csv_loader import count_csv_rows, load_csv
+from jobs import DEFAULT_JOB_THREADS, JobEngine, copy_table, count_rows, verify_table
+from loaders import LOAD_METHODS
+
+# Rows sampled per chunk to estimate the bytes moved
+BYTES_SAMPLE = 50
+
+
+def estimate_bytes(chunk, sample=BYTES_SAMPLE):
+    """Approximate size of a chunk of rows, from a sample of its first rows."""
+    rows = chunk[:sample]
+    if not rows:
+        return 0
+    size = 0
+    for row in rows:
+        for value in row:
+            if value is None:
+                continue
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                size += len(value)
+            elif hasattr(value, "size") and hasattr(value, "read"):
+                # LOB handle: its length is known without reading it
+                size += value.size()
+            else:
+                size += len(str(value))
+    return size * len(chunk) // len(rows)
+
+
+class EventQueue:
+    """Subscriber buffering events for a GUI thread to drain with poll()."""
+
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def __call__(self, event):
+        self.events.put(event)
+
+    def poll(self):
+        """Events received since the last poll, oldest first."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class MigrationEngine:
+    """Queue table copies, verifications and other jobs; run them off the calling thread."""
+
+    def __init__(self, threads=DEFAULT_JOB_THREADS, endpoint_limits=None):
+        self.jobs = JobEngine(threads, endpoint_limits, on_event=self._job_event)
+        self.subscribers = []
+        self.thread = None
+        self.results = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    def emit(self, job_name, status, **fields):
+        event = dict(fields, job=job_name, status=status)
+        for callback in self.subscribers:
+            callback(event)
+
+    def notify(self, job, message):
+        """Free text from inside a job function, shown as a log line by the front ends."""
+        self.emit(job.name, "message", message=message)
+
+    def _job_event(self, job, status):
+        if status == "running":
+            self.emit(job.name, "started")
+        elif status == "done":
+            self.emit(job.name, "done", result=job.result)
+        else:
+            self.emit(job.name, status, error=job.error)
+
+    def add_copy(self, name, source, target, source_table, target_table=None, count=False, timeout=None, **options):
+        """Copy source_table; options are those of jobs.copy_table().
+
+        count=True runs a COUNT(*) on the source first, for an ETA: one more
+        scan of the source, so progress only reports rows moved by default.
+        """
+        return self.jobs.submit(name, self._copy, source, target, source_table, target_table, count, options,
+                                endpoints=[source, target], timeout=timeout)
+
+    def add_verify(self, name, source, target, source_table, target_table=None):
+        return self.jobs.submit(name, verify_table, source, target, source_table, target_table,
+                                endpoints=[source, target])
+
+    def add_task(self, name, func, *args, endpoints=(), timeout=None, **kwargs):
+        """Run func(job, *args, **kwargs); it may report through notify(job, message)."""
+        return self.jobs.submit(name, func, *args, endpoints=endpoints, timeout=timeout, **kwargs)
+
+    def add_csv_load(self, name, path, target, table_name, mapping, timeout=None, **options):
+        """Append a CSV file to a table; options are those of csv_loader.load_csv()."""
+        return self.jobs.submit(name, self._load_csv, path, target, table_name, mapping, options,
+                                endpoints=[target], timeout=timeout)
+
+    def _progress(self, total):
+        """on_chunk(job, rows, chunk) callback emitting progress events."""
+        started = time.monotonic()
+        moved = {"bytes": 0}
+
+        def on_chunk(job, rows, chunk):
+            moved["bytes"] += estimate_bytes(chunk)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            rate = rows / elapsed
+            eta = max(total - rows, 0) / rate if total is not None and rate else None
+            self.emit(job.name, "progress", rows=rows, bytes=moved["bytes"], rate=rate, total=total, eta=eta)
+
+        return on_chunk
+
+    def _copy(self, job, source, target, source_table, target_table, count, options):
+        total = count_rows(source, source_table) if count else None
+        return copy_table(job, source, target, source_table, target_table, on_chunk=self._progress(total), **options)
+
+    def _load_csv(self, job, path, target, table_name, mapping, options):
+        total = max(count_csv_rows(path, options.get("delimiter", ",")) - options.get("start_row", 0), 0)
+        return load_csv(job, path, target, table_name, mapping, on_chunk=self._progress(total), **options)
+
+    def start(self):
+        """Run the queued jobs in a background thread; returns at once."""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def run(self):
+        """Run the queued jobs in the calling thread; returns the jobs that ran."""
+        self.results = self.jobs.run()
+        return self.results
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def wait(self, timeout=None):
+        if self.thread:
+            self.thread.join(timeout)
+        return self.results
+
+    def cancel(self):
+        self.jobs.cancel()
+
+
+def format_event(event):
+    """One log line for an event."""
+    name, status = event["job"], event["status"]
+    if status == "progress":
+        line = f"{name}: {event['rows']} rows, {event['bytes'] / 1048576:.1f} MB, {event['rate']:.0f} rows/s"
+        if event["eta"] is not None:
+            line += f", {event['rows'] * 100 // max(event['total'], 1)}% done, ETA {event['eta']:.0f}s"
+        return line
+    if status == "message":
+        return f"{name}: {event['message']}"
+    if status == "done":
+        return f"{name}: done ({event['result']})"
+    if status == "started":
+        return f"{name}: started"
+    return f"{name}: {status} ({event.get('error')})"
+
+
+def parse_endpoint(url):
+    """(sgbd, details) from sqlite:///path.db, postgresql://user:pw@host:port/db, mysql://... or oracle://..."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme == "sqlite":
+        path = url.split(":", 1)[1]
+        return "SQLite", {"path": path[2:] if path.startswith("//") else path}
+    sgbd = {"postgresql": "PostgreSQL", "postgres": "PostgreSQL", "mysql": "MySQL", "oracle": "Oracle"}.get(scheme)
+    if sgbd is None:
+        raise ValueError(f"Unsupported database URL: {url}")
+    return sgbd, {
+        "host": parts.hostname,
+        "port": str(parts.port) if parts.port else "",
+        "database": parts.path.lstrip("/"),
+        "user": unquote(parts.username or ""),
+        "password": unquote(parts.password or ""),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copy tables between databases without a display.")
+    parser.add_argument("--source", required=True, help="source database URL, e.g. oracle://user:pw@host:1521/service")
+    parser.add_argument("--target", required=True, help="target database URL, e.g. sqlite:///copy.db")
+    parser.add_argument("tables", nargs="+", help="tables or views to copy, as NAME or NAME=TARGET_NAME")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--lob-chunk-size", type=int, default=None)
+    parser.add_argument("--load-method", choices=LOAD_METHODS, default="auto")
+    parser.add_argument("--threads", type=int, default=DEFAULT_JOB_THREADS)
+    parser.add_argument("--replace", action="store_true", help="drop existing target tables first")
+    parser.add_argument("--verify", action="store_true", help="compare row counts once every table is copied")
+    parser.add_argument("--count", action="store_true", help="count source rows first to report an ETA (one more scan)")
+    parser.add_argument("--json", action="store_true", help="print events as JSON lines")
+    args = parser.parse_args(argv)
+
+    source, target = parse_endpoint(args.source), parse_endpoint(args.target)
+    options = {"load_method": args.load_method, "replace": args.replace}
+    if args.chunk_size:
+        options["chunk_size"] = args.chunk_size
+    if args.lob_chunk_size:
+        options["lob_chunk_size"] = args.lob_chunk_size
+
+    engine = MigrationEngine(threads=args.threads)
+    if args.json:
+        engine.subscribe(lambda event: print(json.dumps(event, default=str), flush=True))
+    else:
+        engine.subscribe(lambda event: print(format_event(event), flush=True))
+    pairs = [table.split("=", 1) if "=" in table else (table, table) for table in args.tables]
+    for source_table, target_table in pairs:
+        engine.add_copy(source_table, source, target, source_table, target_table, count=args.count, **options)
+    failed = [job for job in engine.run() if job.status != "done"]
+
+    if args.verify and not failed:
+        verifier = MigrationEngine(threads=args.threads)
+        verifier.subscribers = engine.subscribers
+        for source_table, target_table in pairs:
+            verifier.add_verify(f"verify {target_table}", source, target, source_table, target_table)
+        failed = [job for job in verifier.run() if job.status != "done" or not job.result["match"]]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Oracle trigger + sequence surrogate keys translated to native identity columns.
+
+A BEFORE INSERT trigger doing ":new.id := SEQ_X_ID.nextval" costs a trigger
+call and a sequence round trip per row. The target gets an identity column
+instead, which accepts the explicit IDs of the bulk load, and its counter is
+re-based once from MAX(ID) after the rows are in. The triggers themselves are
+never recreated on the target.
+"""
+
+import re
+
+NEXTVAL = re.compile(r':new\.("?[\w$#]+"?)\s*:=\s*(?:"?[\w$#]+"?\s*\.\s*)?("?[\w$#]+"?)\s*\.\s*nextval', re.I)
+
+# Targets whose identity column is declared as the primary key (see schema.IDENTITY_TYPES)
+INLINE_KEY_TARGETS = {"MySQL", "SQLite"}
+
+
+def _unquote(name):
+    return name[1:-1] if name.startswith('"') else name.upper()
+
+
+def trigger_identity(body):
+    """(column, sequence) assigned by a trigger body, or None."""
+    match = NEXTVAL.search(body or "")
+    if not match:
+        return None
+    return _unquote(match.group(1)), _unquote(match.group(2))
+
+
+def get_identity_columns(conn, sgbd, schema=None):
+    """{table: column} filled from a sequence by an enabled BEFORE INSERT trigger.
+
+    Only Oracle sources emulate identities this way; other sources return {}.
+    """
+    if sgbd != "Oracle":
+        return {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT table_name, trigger_body FROM all_triggers "
+            "WHERE table_owner = NVL(:1, USER) AND status = 'ENABLED' "
+            "AND trigger_type = 'BEFORE EACH ROW' AND triggering_event LIKE '%INSERT%'",
+            [schema.upper() if schema else None])
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    identities = {}
+    for table_name, body in rows:
+        found = trigger_identity(body)
+        if found:
+            identities[table_name] = found[0]
+    return identities
+
+
+def model_identity_columns(model):
+    """{table: column} of a ddl_parser schema model."""
+    return {trigger["table"]: trigger["column"] for trigger in model["triggers"].values()
+            if trigger["enabled"] and trigger["sequence"] and trigger["timing"] == "BEFORE"
+            and "INSERT" in trigger["events"]}
+
+
+def keyed_identities(identities, constraints):
+    """Keep the identity columns that are their table's whole primary key.
+
+    constraints is {table: constraints.read_constraints(...)}. Any other
+    column keeps its plain type: an identity must be a key on MySQL and SQLite.
+    """
+    keyed = {}
+    for table_name, column in identities.items():
+        primary_key = constraints.get(table_name, {}).get("primary_key")
+        if primary_key and [col.lower() for col in primary_key[1]] == [column.lower()]:
+            keyed[table_name] = column
+    return keyed
+
+
+def identity_references(identities, constraints):
+    """{table: [columns]} of the foreign key columns pointing at an identity key.
+
+    Those columns must take the identity's integer type (see
+    schema.IDENTITY_KEY_TYPES) or the foreign key cannot be created.
+    """
+    keys = {(table_name.lower(), column.lower()) for table_name, column in identities.items()}
+    references = {}
+    for table_name, table_constraints in constraints.items():
+        for foreign_key in table_constraints.get("foreign_keys", []):
+            for column, ref_column in zip(foreign_key["columns"], foreign_key["ref_columns"]):
+                if (foreign_key["ref_table"].lower(), (ref_column or "").lower()) in keys:
+                    references.setdefault(table_name, []).append(column)
+    return references
+
+
+def without_inline_key(sgbd, constraints):
+    """Constraints left to build once the identity column already carries the primary key."""
+    if sgbd in INLINE_KEY_TARGETS:
+        return dict(constraints, primary_key=None)
+    return constraints
+
+
+def rebase_identity(conn, sgbd, table_name, column):
+    """Move the identity counter past the loaded rows; returns the next value."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table_name}")
+        next_value = int(cursor.fetchone()[0])
+        if sgbd == "PostgreSQL":
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, %s), %s, false)",
+                           (table_name.lower(), column.lower(), next_value))
+        elif sgbd == "MySQL":
+            cursor.execute(f"ALTER TABLE {table_name} AUTO_INCREMENT = {next_value}")
+        elif sgbd == "Oracle":
+            cursor.execute(f"ALTER TABLE {table_name} MODIFY ({column} GENERATED BY DEFAULT ON NULL "
+                           f"AS IDENTITY (START WITH {next_value}))")
+        # SQLite numbers an INTEGER PRIMARY KEY from MAX(rowid) by itself
+    finally:
+        cursor.close()
+    conn.commit()
+    return next_value
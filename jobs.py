@@ -0,0 +1,261 @@
+"""Asyncio job engine: table migrations, previews and verifications run concurrently.
+
+The DB-API drivers block, so each job runs in a thread of one bounded
+executor while the event loop only schedules: a slow network wait on one
+table overlaps the others without one thread per table. Every job names
+the endpoints it uses and holds one slot of each endpoint's semaphore while
+it runs, which caps the load put on any single database.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from checkpoints import ResumableMigration
+from connections import connection_manager, endpoint_key
+from loaders import make_loader
+from lobs import DEFAULT_LOB_CHUNK_SIZE, lob_columns, lob_reader
+from schema import column_definitions, get_columns
+from streaming import DEFAULT_CHUNK_SIZE, StreamReader
+
+DEFAULT_JOB_THREADS = 8
+DEFAULT_ENDPOINT_LIMIT = 4
+# SQLite serialises writers on the file lock, more jobs would only wait on it
+SQLITE_ENDPOINT_LIMIT = 1
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function that noticed its job was cancelled."""
+
+
+class Job:
+    """One unit of work submitted to a JobEngine.
+
+    status goes from "pending" to "running", then to "done", "failed",
+    "cancelled" or "timeout". A job function cannot be interrupted in the
+    middle of a driver call: long ones poll check_cancelled() between chunks.
+    """
+
+    def __init__(self, name, func, args, kwargs, endpoints, timeout):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.endpoints = endpoints
+        self.timeout = timeout
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.task = None
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.task and not self.task.done():
+            self.task.get_loop().call_soon_threadsafe(self.task.cancel)
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled(self.name)
+
+    def __repr__(self):
+        return f"<Job {self.name} {self.status}>"
+
+
+class JobEngine:
+    """Run jobs on an event loop over a bounded thread pool.
+
+    endpoint_limits maps endpoint_key(sgbd, details) to the number of jobs
+    allowed on that database at once; others get DEFAULT_ENDPOINT_LIMIT (1 for
+    SQLite). on_event(job, status) is called on the loop thread whenever a job
+    changes status.
+    """
+
+    def __init__(self, threads=DEFAULT_JOB_THREADS, endpoint_limits=None, on_event=None):
+        self.threads = max(1, threads)
+        self.endpoint_limits = dict(endpoint_limits or {})
+        self.on_event = on_event
+        self.jobs = []
+        self._semaphores = {}
+        self._executor = None
+        self._calls = []
+
+    def submit(self, name, func, *args, endpoints=(), timeout=None, **kwargs):
+        """Queue func(job, *args, **kwargs); endpoints is a list of (sgbd, details) it connects to."""
+        job = Job(name, func, args, kwargs, list(endpoints), timeout)
+        self.jobs.append(job)
+        return job
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def _semaphore(self, sgbd, details):
+        key = endpoint_key(sgbd, details)
+        if key not in self._semaphores:
+            default = SQLITE_ENDPOINT_LIMIT if sgbd == "SQLite" else DEFAULT_ENDPOINT_LIMIT
+            self._semaphores[key] = asyncio.Semaphore(self.endpoint_limits.get(key, default))
+        return key, self._semaphores[key]
+
+    def _set_status(self, job, status):
+        job.status = status
+        if self.on_event:
+            self.on_event(job, status)
+
+    def _call(self, job):
+        # A job cancelled while it waited for a free thread never starts
+        job.check_cancelled()
+        return job.func(job, *job.args, **job.kwargs)
+
+    @staticmethod
+    def _thread_done(call, acquired):
+        if not call.cancelled():
+            # Retrieved here, as nobody awaits the thread of a timed out job
+            call.exception()
+        for semaphore in acquired:
+            semaphore.release()
+
+    async def _run_job(self, job):
+        # Always take the endpoint slots in the same order: two jobs sharing
+        # two endpoints cannot each hold one and wait for the other
+        slots = sorted({self._semaphore(sgbd, details) for sgbd, details in job.endpoints},
+                       key=lambda slot: slot[0])
+        acquired = []
+        call = None
+        try:
+            for _, semaphore in slots:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+            job.check_cancelled()
+            self._set_status(job, "running")
+            call = asyncio.get_running_loop().run_in_executor(self._executor, self._call, job)
+            # After a timeout or a cancel the thread goes on until its next
+            # check_cancelled(), still connected: its slots are freed only then
+            call.add_done_callback(lambda done: self._thread_done(done, acquired))
+            self._calls.append(call)
+            job.result = await asyncio.wait_for(asyncio.shield(call), job.timeout)
+            self._set_status(job, "done")
+        except asyncio.TimeoutError as e:
+            job.cancel_event.set()
+            job.error = e
+            self._set_status(job, "timeout")
+        except (asyncio.CancelledError, JobCancelled) as e:
+            job.cancel_event.set()
+            job.error = JobCancelled(job.name) if isinstance(e, asyncio.CancelledError) else e
+            self._set_status(job, "cancelled")
+        except Exception as e:
+            job.error = e
+            self._set_status(job, "failed")
+        finally:
+            if call is None:
+                for semaphore in acquired:
+                    semaphore.release()
+        return job
+
+    async def run_async(self):
+        """Run every pending job; returns the jobs once all of them ended and their threads stopped."""
+        pending = [job for job in self.jobs if job.status == "pending"]
+        self._semaphores = {}
+        self._calls = []
+        self._executor = ThreadPoolExecutor(max_workers=self.threads)
+        try:
+            for job in pending:
+                job.task = asyncio.ensure_future(self._run_job(job))
+            await asyncio.gather(*(job.task for job in pending))
+            # Timed out and cancelled jobs report at once, but their threads
+            # still hold connections until they reach check_cancelled()
+            await asyncio.gather(*self._calls, return_exceptions=True)
+        finally:
+            self._executor.shutdown(wait=False)
+        return pending
+
+    def run(self):
+        """Blocking form of run_async(), for callers without an event loop."""
+        return asyncio.run(self.run_async())
+
+
+def copy_table(job, source, target, source_table, target_table=None, chunk_size=DEFAULT_CHUNK_SIZE,
+               lob_chunk_size=DEFAULT_LOB_CHUNK_SIZE, load_method="auto", key=None, replace=False,
+               checkpoints=None, checkpoint_name=None, on_chunk=None):
+    """Job function: create target_table from the source columns and copy every row.
+
+    source and target are (sgbd, details) endpoints; connections come from
+    the shared connection manager. An existing target table is an error,
+    as a second run would append a second copy: replace drops it first.
+    With a key and a checkpoints store the copy runs in key order and resumes
+    where a previous run under checkpoint_name stopped. on_chunk(job, total,
+    chunk) follows each committed chunk.
+    """
+    source_sgbd, target_sgbd = source[0], target[0]
+    target_table = target_table or source_table
+    with connection_manager.acquire(*source) as source_conn, connection_manager.acquire(*target) as target_conn:
+        columns = get_columns(source_conn, source_sgbd, source_table)
+        if lob_columns(columns):
+            chunk_size = lob_chunk_size
+        migration = None
+        if checkpoints is not None and key:
+            migration = ResumableMigration(source_conn, source_sgbd, target_conn, target_sgbd, source_table,
+                                           target_table, key, checkpoint_name, chunk_size, store=checkpoints)
+            reader = migration.open_reader()
+        elif lob_columns(columns):
+            reader = lob_reader(source_conn, source_sgbd, source_table, columns, key, chunk_size)
+        else:
+            reader = StreamReader(source_conn, source_sgbd, f"SELECT * FROM {source_table}", chunk_size=chunk_size)
+
+        with reader:
+            if not (migration and migration.resuming):
+                cursor = target_conn.cursor()
+                try:
+                    if replace:
+                        cursor.execute(f"DROP TABLE IF EXISTS {target_table}")
+                    if columns:
+                        definitions = column_definitions(source_sgbd, columns, target_sgbd)
+                    else:
+                        # Not visible in the catalog (synonym, other owner...): keep everything as text
+                        definitions = ", ".join(f"{col} TEXT" for col in reader.columns)
+                    cursor.execute(f"CREATE TABLE {target_table} ({definitions})")
+                finally:
+                    cursor.close()
+                target_conn.commit()
+            loader = make_loader(target_conn, target_sgbd, target_table, reader.columns, load_method)
+            if migration:
+                loader = migration.wrap_loader(loader, reader.columns)
+            total = 0
+            for chunk in reader:
+                total += loader.load(chunk)
+                if on_chunk:
+                    on_chunk(job, total, chunk)
+                job.check_cancelled()
+        if migration:
+            migration.finish()
+        return total
+
+
+def preview_table(job, endpoint, table_name, limit=100):
+    """Job function: (column names, first rows) of a table."""
+    with connection_manager.acquire(*endpoint) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT * FROM {table_name}")
+            rows = cursor.fetchmany(limit)
+            return [description[0] for description in cursor.description], rows
+        finally:
+            cursor.close()
+
+
+def count_rows(endpoint, table_name):
+    with connection_manager.acquire(*endpoint) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+
+def verify_table(job, source, target, source_table, target_table=None):
+    """Job function: {"source": rows, "target": rows, "match": bool} for a copied table."""
+    source_rows = count_rows(source, source_table)
+    job.check_cancelled()
+    target_rows = count_rows(target, target_table or source_table)
+    return {"source": source_rows, "target": target_rows, "match": source_rows == target_rows}
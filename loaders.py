@@ -0,0 +1,541 @@
+"""Bulk loaders used to write extracted chunks into a target database."""
+
+import datetime
+import io
+import json
+import os
+import struct
+import tempfile
+
+from streaming import insert_statement, placeholder
+
+LOAD_METHODS = ["auto", "insert", "copy", "copy-binary", "load-data", "multi-insert"]
+
+# Bytes (or characters, for CLOBs) read from a LOB per round trip
+LOB_PIECE_SIZE = 1024 * 1024
+
+
+class ExecutemanyLoader:
+    """Portable loader: one executemany() and one commit per chunk."""
+
+    def __init__(self, conn, sgbd, table_name, col_names):
+        self.conn = conn
+        self.query = insert_statement(sgbd, table_name, col_names)
+
+    def load(self, rows):
+        if any(is_lob(value) for row in rows for value in row):
+            rows = [[_read_lob(value) for value in row] for row in rows]
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.query, rows)
+        finally:
+            cursor.close()
+        self.conn.commit()
+        return len(rows)
+
+
+def _read_lob(value):
+    # cx_Oracle LOB locators expose read(); everything else is already a value
+    return value.read() if hasattr(value, "read") else value
+
+
+def is_lob(value):
+    """True for values read on demand: cx_Oracle LOBs and lobs.PostgresLob."""
+    return hasattr(value, "read") and hasattr(value, "size")
+
+
+def lob_pieces(value, piece_size=LOB_PIECE_SIZE):
+    """Yield a LOB in pieces of at most piece_size, so it is never held whole."""
+    size = value.size()
+    offset = 1
+    while offset <= size:
+        piece = value.read(offset, piece_size)
+        if not piece:
+            break
+        yield piece
+        offset += len(piece)
+
+
+def _escape_copy_text(text):
+    return (text.replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copy_text_value(value):
+    value = _read_lob(value)
+    if value is None:
+        return "\\N"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea hex input; the backslash itself must be escaped in COPY text
+        return "\\\\x" + bytes(value).hex()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        # json/jsonb values decoded by the source driver
+        value = json.dumps(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return _escape_copy_text(str(value))
+
+
+def encode_copy_text(rows):
+    """Encode rows in PostgreSQL COPY text format into an in-memory buffer."""
+    buf = io.BytesIO()
+    for row in rows:
+        line = "\t".join(_copy_text_value(value) for value in row) + "\n"
+        buf.write(line.encode("utf-8"))
+    buf.seek(0)
+    return buf
+
+
+def _copy_text_lob(value):
+    first = True
+    for piece in lob_pieces(value):
+        if isinstance(piece, str):
+            yield _escape_copy_text(piece).encode("utf-8")
+        else:
+            if first:
+                yield b"\\\\x"
+            yield piece.hex().encode("ascii")
+        first = False
+    if first:
+        # Empty LOB: an empty string is valid for both text and bytea
+        yield b""
+
+
+class CopyTextStream:
+    """File-like COPY text source that encodes rows as COPY reads them.
+
+    LOB values are pulled piece by piece from the source while COPY consumes
+    the stream, so memory depends on the piece size rather than the LOB size.
+    """
+
+    def __init__(self, rows):
+        self._parts = self._encode(rows)
+        self._buffer = bytearray()
+
+    def _encode(self, rows):
+        for row in rows:
+            for i, value in enumerate(row):
+                if i:
+                    yield b"\t"
+                if is_lob(value):
+                    yield from _copy_text_lob(value)
+                else:
+                    yield _copy_text_value(value).encode("utf-8")
+            yield b"\n"
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._parts)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+PG_EPOCH = datetime.datetime(2000, 1, 1)
+PG_EPOCH_DATE = PG_EPOCH.date()
+
+
+def _binary_text(value):
+    return str(value).encode("utf-8")
+
+
+def _binary_bytea(value):
+    return bytes(value)
+
+
+def _binary_bool(value):
+    return b"\x01" if value else b"\x00"
+
+
+def _binary_timestamp(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    delta = value - PG_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return struct.pack("!q", micros)
+
+
+def _binary_date(value):
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return struct.pack("!i", (value - PG_EPOCH_DATE).days)
+
+
+BINARY_ENCODERS = {
+    "smallint": lambda v: struct.pack("!h", int(v)),
+    "integer": lambda v: struct.pack("!i", int(v)),
+    "bigint": lambda v: struct.pack("!q", int(v)),
+    "real": lambda v: struct.pack("!f", float(v)),
+    "double precision": lambda v: struct.pack("!d", float(v)),
+    "boolean": _binary_bool,
+    "bytea": _binary_bytea,
+    "date": _binary_date,
+    "timestamp without time zone": _binary_timestamp,
+    "timestamp with time zone": _binary_timestamp,
+    "text": _binary_text,
+    "character varying": _binary_text,
+    "character": _binary_text,
+}
+
+COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+
+
+def encode_copy_binary(rows, encoders):
+    """Encode rows in PostgreSQL COPY binary format, one encoder per column."""
+    buf = io.BytesIO()
+    buf.write(COPY_BINARY_HEADER)
+    field_count = struct.pack("!h", len(encoders))
+    null_field = struct.pack("!i", -1)
+    for row in rows:
+        buf.write(field_count)
+        for value, encode in zip(row, encoders):
+            value = _read_lob(value)
+            if value is None:
+                buf.write(null_field)
+            else:
+                data = encode(value)
+                buf.write(struct.pack("!i", len(data)))
+                buf.write(data)
+    buf.write(struct.pack("!h", -1))
+    buf.seek(0)
+    return buf
+
+
+def get_postgres_column_types(conn, table_name):
+    """Return {column: base type name} for a PostgreSQL table."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT attname, format_type(atttypid, NULL) FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped",
+            (table_name,))
+        return {name.lower(): type_name for name, type_name in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+class PostgresCopyLoader:
+    """Stream each chunk to PostgreSQL through COPY ... FROM STDIN.
+
+    With binary=True the chunk is sent in COPY binary format when every target
+    column type has a binary encoder, otherwise the text format is used.
+    """
+
+    def __init__(self, conn, table_name, col_names, binary=False):
+        self.conn = conn
+        self.encoders = None
+        if binary:
+            column_types = get_postgres_column_types(conn, table_name)
+            types = [column_types.get(col.lower()) for col in col_names]
+            if all(t in BINARY_ENCODERS for t in types):
+                self.encoders = [BINARY_ENCODERS[t] for t in types]
+        copy_format = "binary" if self.encoders else "text"
+        self.query = f"COPY {table_name} ({', '.join(col_names)}) FROM STDIN WITH (FORMAT {copy_format})"
+        self.text_query = f"COPY {table_name} ({', '.join(col_names)}) FROM STDIN WITH (FORMAT text)"
+
+    def load(self, rows):
+        query = self.query
+        if any(is_lob(value) for row in rows for value in row):
+            # Stream LOB-bearing chunks instead of building them in memory
+            buf, query = CopyTextStream(rows), self.text_query
+        elif self.encoders:
+            buf = encode_copy_binary(rows, self.encoders)
+        else:
+            buf = encode_copy_text(rows)
+        cursor = self.conn.cursor()
+        try:
+            cursor.copy_expert(query, buf, size=LOB_PIECE_SIZE)
+        finally:
+            cursor.close()
+        self.conn.commit()
+        return len(rows)
+
+
+MYSQL_ESCAPES = {
+    ord("\\"): b"\\\\", ord("\t"): b"\\t", ord("\n"): b"\\n",
+    ord("\r"): b"\\r", 0: b"\\0", 26: b"\\Z",
+}
+
+
+def _load_data_value(value):
+    value = _read_lob(value)
+    if value is None:
+        return b"\\N"
+    if isinstance(value, bool):
+        return b"1" if value else b"0"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+    elif isinstance(value, datetime.datetime):
+        data = value.isoformat(sep=" ").encode("utf-8")
+    elif isinstance(value, (dict, list)):
+        data = json.dumps(value).encode("utf-8")
+    else:
+        data = str(value).encode("utf-8")
+    return _escape_load_data(data)
+
+
+def _escape_load_data(data):
+    if any(byte in MYSQL_ESCAPES for byte in data):
+        data = b"".join(MYSQL_ESCAPES.get(byte, bytes((byte,))) for byte in data)
+    return data
+
+
+def encode_load_data(rows, out):
+    """Write rows to out in the default LOAD DATA format (tab separated, \\N for NULL).
+
+    LOB values are copied to out piece by piece.
+    """
+    for row in rows:
+        for i, value in enumerate(row):
+            if i:
+                out.write(b"\t")
+            if is_lob(value):
+                for piece in lob_pieces(value):
+                    out.write(_escape_load_data(piece.encode("utf-8") if isinstance(piece, str) else piece))
+            else:
+                out.write(_load_data_value(value))
+        out.write(b"\n")
+
+
+# Server (1148, 3948) or client (2068) refusing LOAD DATA LOCAL INFILE
+LOCAL_INFILE_DISABLED = {1148, 2068, 3948}
+
+
+def _local_infile_refused(error):
+    return getattr(error, "errno", None) in LOCAL_INFILE_DISABLED
+
+
+class MySQLBulkLoader:
+    """Load chunks into MySQL with LOAD DATA LOCAL INFILE.
+
+    Each chunk is spooled to a temporary file and sent in one statement. If the
+    server or the driver refuses LOCAL INFILE the loader falls back to
+    multi-row INSERT statements sized to max_allowed_packet; any other error
+    is raised. LOAD DATA LOCAL implies IGNORE, so a chunk whose load leaves
+    warnings (duplicate key, truncated or unconverted value) is rolled back
+    and raised as ValueError instead of being kept with rows dropped or changed.
+    """
+
+    def __init__(self, conn, table_name, col_names, use_load_data=True):
+        self.conn = conn
+        self.table_name = table_name
+        self.col_names = col_names
+        self.use_load_data = use_load_data
+        self.max_packet = None
+
+    def load(self, rows):
+        if self.use_load_data:
+            try:
+                self._load_data(rows)
+                self.conn.commit()
+                return len(rows)
+            except Exception as e:
+                self.conn.rollback()
+                if not _local_infile_refused(e):
+                    raise
+                self.use_load_data = False
+        self._multi_insert(rows)
+        self.conn.commit()
+        return len(rows)
+
+    def _load_data(self, rows):
+        spool = tempfile.NamedTemporaryFile(suffix=".tsv", delete=False)
+        try:
+            with spool:
+                encode_load_data(rows, spool)
+            path = spool.name.replace("\\", "/")
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {self.table_name} "
+                    "CHARACTER SET binary FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                    f"LINES TERMINATED BY '\\n' ({', '.join(self.col_names)})")
+                # LOCAL implies IGNORE: duplicate keys, truncated or unconverted values only leave warnings
+                cursor.execute("SHOW COUNT(*) WARNINGS")
+                count = int(cursor.fetchone()[0])
+                if count:
+                    cursor.execute("SHOW WARNINGS LIMIT 3")
+                    messages = "; ".join(str(row[2]) for row in cursor.fetchall())
+                    raise ValueError(f"LOAD DATA into {self.table_name} left {count} warnings: {messages}")
+            finally:
+                cursor.close()
+        finally:
+            os.remove(spool.name)
+
+    def _get_max_packet(self, cursor):
+        if self.max_packet is None:
+            cursor.execute("SELECT @@max_allowed_packet")
+            self.max_packet = int(cursor.fetchone()[0])
+        return self.max_packet
+
+    def _multi_insert(self, rows):
+        cursor = self.conn.cursor()
+        try:
+            # Leave headroom for escaping done by the driver
+            budget = self._get_max_packet(cursor) // 2
+            head = f"INSERT INTO {self.table_name} ({', '.join(self.col_names)}) VALUES "
+            row_marker = "(" + ", ".join(["%s"] * len(self.col_names)) + ")"
+            batch, params, size = [], [], len(head)
+            for row in rows:
+                row = [_read_lob(value) for value in row]
+                row_size = len(row_marker) + sum(len(str(value)) + 3 for value in row)
+                if batch and size + row_size > budget:
+                    cursor.execute(head + ", ".join(batch), params)
+                    batch, params, size = [], [], len(head)
+                batch.append(row_marker)
+                params.extend(row)
+                size += row_size
+            if batch:
+                cursor.execute(head + ", ".join(batch), params)
+        finally:
+            cursor.close()
+
+
+def upsert_statement(sgbd, table_name, col_names, key):
+    """Build an INSERT-or-UPDATE statement keyed on key for the target dialect."""
+    updates = [col for col in col_names if col.lower() != key.lower()]
+    cols = ", ".join(col_names)
+    if sgbd == "Oracle":
+        source = ", ".join(f":{i + 1} AS {col}" for i, col in enumerate(col_names))
+        query = (f"MERGE INTO {table_name} t USING (SELECT {source} FROM dual) s ON (t.{key} = s.{key}) "
+                 f"WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({', '.join('s.' + col for col in col_names)})")
+        if updates:
+            query += f" WHEN MATCHED THEN UPDATE SET {', '.join(f't.{col} = s.{col}' for col in updates)}"
+        return query
+    if sgbd == "PostgreSQL":
+        # execute_values expands the single %s into a multi-row VALUES list
+        values = "%s"
+    else:
+        values = "(" + ", ".join([placeholder(sgbd)] * len(col_names)) + ")"
+    query = f"INSERT INTO {table_name} ({cols}) VALUES {values}"
+    if sgbd == "MySQL":
+        if updates:
+            return query + " ON DUPLICATE KEY UPDATE " + ", ".join(f"{col} = VALUES({col})" for col in updates)
+        return query + f" ON DUPLICATE KEY UPDATE {key} = {key}"
+    if updates:
+        return query + f" ON CONFLICT ({key}) DO UPDATE SET " + ", ".join(f"{col} = excluded.{col}" for col in updates)
+    return query + f" ON CONFLICT ({key}) DO NOTHING"
+
+
+class UpsertLoader:
+    """Apply each chunk as one batched upsert keyed on the primary key."""
+
+    def __init__(self, conn, sgbd, table_name, col_names, key, page_size=1000):
+        self.conn = conn
+        self.sgbd = sgbd
+        self.page_size = page_size
+        self.query = upsert_statement(sgbd, table_name, col_names, key)
+
+    def load(self, rows):
+        rows = [[_read_lob(value) for value in row] for row in rows]
+        cursor = self.conn.cursor()
+        try:
+            if self.sgbd == "PostgreSQL":
+                from psycopg2.extras import execute_values
+                execute_values(cursor, self.query, rows, page_size=self.page_size)
+            else:
+                cursor.executemany(self.query, rows)
+        finally:
+            cursor.close()
+        self.conn.commit()
+        return len(rows)
+
+
+def insert_ignore_statement(sgbd, table_name, col_names, key):
+    """Build an INSERT that skips rows whose key already exists, for the target dialect.
+
+    Only a conflict on key is skipped: a row breaking another unique index,
+    NOT NULL or a type still raises (INSERT IGNORE would turn those into warnings).
+    """
+    cols = ", ".join(col_names)
+    if sgbd == "Oracle":
+        source = ", ".join(f":{i + 1} AS {col}" for i, col in enumerate(col_names))
+        return (f"MERGE INTO {table_name} t USING (SELECT {source} FROM dual) s ON (t.{key} = s.{key}) "
+                f"WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({', '.join('s.' + col for col in col_names)})")
+    if sgbd == "PostgreSQL":
+        # execute_values expands the single %s; RETURNING counts the rows actually inserted
+        return f"INSERT INTO {table_name} ({cols}) VALUES %s ON CONFLICT ({key}) DO NOTHING RETURNING 1"
+    if sgbd == "MySQL":
+        # ON DUPLICATE KEY would also swallow conflicts on any other unique index
+        source = ", ".join(f"%s AS {col}" for col in col_names)
+        return (f"INSERT INTO {table_name} ({cols}) SELECT {cols} FROM (SELECT {source}) s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE t.{key} = s.{key})")
+    values = "(" + ", ".join([placeholder(sgbd)] * len(col_names)) + ")"
+    return f"INSERT INTO {table_name} ({cols}) VALUES {values} ON CONFLICT ({key}) DO NOTHING"
+
+
+# Oracle accepts at most 1000 expressions in an IN list
+KEY_BATCH_SIZE = 1000
+
+
+class InsertIgnoreLoader:
+    """Insert each chunk as one batch, leaving out rows whose key is already in the table.
+
+    load() returns the rows inserted; self.skipped counts the rows left out.
+    Any other error (NOT NULL, bad value, another unique index) is raised.
+    Outside PostgreSQL (RETURNING) the rows inserted are the chunk's keys
+    counted in the table after the batch minus before it, since rowcount
+    depends on the driver and its flags.
+    """
+
+    def __init__(self, conn, sgbd, table_name, col_names, key, page_size=1000):
+        self.conn = conn
+        self.sgbd = sgbd
+        self.table_name = table_name
+        self.key = key
+        self.key_index = [col.lower() for col in col_names].index(key.lower())
+        self.page_size = page_size
+        self.query = insert_ignore_statement(sgbd, table_name, col_names, key)
+        self.skipped = 0
+
+    def _count_keys(self, cursor, keys):
+        total = 0
+        for start in range(0, len(keys), KEY_BATCH_SIZE):
+            batch = keys[start:start + KEY_BATCH_SIZE]
+            if self.sgbd == "Oracle":
+                markers = ", ".join(f":{i + 1}" for i in range(len(batch)))
+            else:
+                markers = ", ".join([placeholder(self.sgbd)] * len(batch))
+            cursor.execute(f"SELECT COUNT(*) FROM {self.table_name} WHERE {self.key} IN ({markers})", batch)
+            total += cursor.fetchone()[0]
+        return total
+
+    def load(self, rows):
+        rows = [[_read_lob(value) for value in row] for row in rows]
+        cursor = self.conn.cursor()
+        try:
+            if self.sgbd == "PostgreSQL":
+                from psycopg2.extras import execute_values
+                inserted = len(execute_values(cursor, self.query, rows, page_size=self.page_size, fetch=True))
+            else:
+                keys = list(dict.fromkeys(row[self.key_index] for row in rows if row[self.key_index] is not None))
+                before = self._count_keys(cursor, keys)
+                cursor.executemany(self.query, rows)
+                inserted = self._count_keys(cursor, keys) - before
+        finally:
+            cursor.close()
+        self.conn.commit()
+        self.skipped += len(rows) - inserted
+        return inserted
+
+
+def make_loader(conn, sgbd, table_name, col_names, method="auto"):
+    """Pick the bulk loader for sgbd; "auto" selects the fastest available path."""
+    if sgbd == "PostgreSQL" and method in ("auto", "copy"):
+        return PostgresCopyLoader(conn, table_name, col_names)
+    if sgbd == "PostgreSQL" and method == "copy-binary":
+        return PostgresCopyLoader(conn, table_name, col_names, binary=True)
+    if sgbd == "MySQL" and method in ("auto", "load-data"):
+        return MySQLBulkLoader(conn, table_name, col_names)
+    if sgbd == "MySQL" and method == "multi-insert":
+        return MySQLBulkLoader(conn, table_name, col_names, use_load_data=False)
+    return ExecutemanyLoader(conn, sgbd, table_name, col_names)
@@ -0,0 +1,122 @@
+"""LOB-aware extraction for BLOB/CLOB heavy tables (FINGERPRINTS, BIOMETRICS, ...)."""
+
+import uuid
+
+from streaming import StreamReader
+
+# Rows per chunk for tables carrying LOB columns: a chunk holds LOB handles,
+# and at most one piece of one LOB is in memory on the writer side
+DEFAULT_LOB_CHUNK_SIZE = 100
+
+LOB_TYPES = {
+    "BLOB", "CLOB", "NCLOB", "LONG RAW", "BYTEA",
+    "TINYBLOB", "MEDIUMBLOB", "LONGBLOB", "MEDIUMTEXT", "LONGTEXT",
+}
+
+
+def lob_columns(columns):
+    """Names of the LOB columns among schema.get_columns() metadata."""
+    return [column["name"] for column in columns if column["type"] in LOB_TYPES]
+
+
+class PostgresLob:
+    """A bytea value left on the server and read in pieces with substring().
+
+    Offers the read(offset, amount) / size() interface of cx_Oracle LOBs, so
+    the loaders stream both the same way. Reading from the start in pieces of
+    one size (as loaders.lob_pieces() does) goes through one query on a
+    dedicated server-side cursor: the row is looked up once and each fetch
+    returns the next piece. Any other read is a query of its own.
+    """
+
+    def __init__(self, conn, table_name, column, key, key_value, length):
+        self.conn = conn
+        self.table_name = table_name
+        self.column = column
+        self.key = key
+        self.key_value = key_value
+        self.length = length
+        self._pieces = None  # (named cursor, offset of its next piece, piece size)
+
+    def size(self):
+        return self.length
+
+    def _open_pieces(self, amount):
+        cursor = self.conn.cursor(name=f"lob_{uuid.uuid4().hex}")
+        cursor.execute(f"SELECT substring(t.{self.column} FROM o FOR %s) FROM {self.table_name} t "
+                       f"CROSS JOIN generate_series(1, %s, %s) AS o WHERE t.{self.key} = %s ORDER BY o",
+                       (amount, self.length, amount, self.key_value))
+        self._pieces = (cursor, 1, amount)
+
+    def close(self):
+        if self._pieces is not None:
+            cursor, self._pieces = self._pieces[0], None
+            cursor.close()
+
+    def read(self, offset=1, amount=None):
+        if amount is None:
+            amount = self.length - offset + 1
+        if offset == 1 and amount < self.length:
+            self.close()
+            self._open_pieces(amount)
+        if self._pieces is not None and self._pieces[1:] == (offset, amount):
+            cursor = self._pieces[0]
+            row = cursor.fetchone()
+            self._pieces = (cursor, offset + amount, amount)
+            if row is None or offset + amount > self.length:
+                self.close()
+        else:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(f"SELECT substring({self.column} FROM %s FOR %s) FROM {self.table_name} "
+                               f"WHERE {self.key} = %s", (offset, amount, self.key_value))
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        return bytes(row[0]) if row and row[0] is not None else b""
+
+
+class PostgresLobReader(StreamReader):
+    """Stream a PostgreSQL table whose bytea columns are fetched on demand.
+
+    The scan returns octet_length() in place of each LOB column; rows carry a
+    PostgresLob handle instead, read later by the writer piece by piece. The
+    key identifies the row a piece belongs to.
+    """
+
+    def __init__(self, conn, table_name, col_names, lob_names, key, chunk_size):
+        lob_names = {name.lower() for name in lob_names}
+        select = ", ".join(f"octet_length({col}) AS {col}" if col.lower() in lob_names else col
+                           for col in col_names)
+        super().__init__(conn, "PostgreSQL", f"SELECT {select} FROM {table_name}", chunk_size=chunk_size)
+        self.table_name = table_name
+        self.key = key
+        self.key_index = [col.lower() for col in col_names].index(key.lower())
+        self.lob_indexes = [i for i, col in enumerate(col_names) if col.lower() in lob_names]
+        self.col_names = col_names
+
+    def __iter__(self):
+        for chunk in super().__iter__():
+            rows = []
+            for row in chunk:
+                row = list(row)
+                for i in self.lob_indexes:
+                    if row[i] is not None:
+                        row[i] = PostgresLob(self.conn, self.table_name, self.col_names[i],
+                                             self.key, row[self.key_index], row[i])
+                rows.append(tuple(row))
+            yield rows
+
+
+def lob_reader(conn, sgbd, table_name, columns, key, chunk_size=DEFAULT_LOB_CHUNK_SIZE):
+    """Reader for a LOB-bearing table that never materialises whole LOBs.
+
+    Oracle already returns LOB locators, read in pieces by the loaders.
+    PostgreSQL bytea is replaced by PostgresLob handles when a key is given.
+    Elsewhere LOBs arrive whole, and only the smaller chunk size bounds memory.
+    """
+    lob_names = lob_columns(columns)
+    if sgbd == "PostgreSQL" and key and lob_names:
+        return PostgresLobReader(conn, table_name, [column["name"] for column in columns],
+                                 lob_names, key, chunk_size)
+    return StreamReader(conn, sgbd, f"SELECT * FROM {table_name}", chunk_size=chunk_size)
@@ -2,8 +2,12 @@
 
 import pandas as pd
 from sqlalchemy import create_engine
-from sqlalchemy.exc import IntegrityError
 import os
+from loaders import InsertIgnoreLoader
+
+BATCH_SIZE = 10000
+
+DB_SGBD = {"mysql": "MySQL", "postgres": "PostgreSQL", "oracle": "Oracle", "sqlite": "SQLite"}
 
 def get_db_engine(db_type, user, password, host, port, database):
     if db_type == "mysql":
@@ -26,24 +30,33 @@ def read_file(file_path):
     else:
         raise ValueError("Format de fichier non supporté. Utilisez un fichier CSV ou XLSX.")
 
-def import_file_to_db(file_path, table_name, column_mapping, db_type, user, password, host, port, database):
+def import_file_to_db(file_path, table_name, column_mapping, db_type, user, password, host, port, database,
+                      key="ID", batch_size=BATCH_SIZE):
+    """Insère le fichier par lots ; les lignes dont la clé existe déjà sont ignorées.
+
+    Une seule requête par lot (ON CONFLICT DO NOTHING, INSERT IGNORE,
+    INSERT OR IGNORE ou MERGE selon le SGBD) au lieu d'une par ligne.
+    """
     try:
         df = read_file(file_path)
         missing_cols = [col for col in column_mapping.keys() if col not in df.columns]
         if missing_cols:
             raise ValueError(f"Colonnes manquantes dans le fichier : {missing_cols}")
         
-        df.rename(columns=column_mapping, inplace=True)
+        df = df[list(column_mapping.keys())].rename(columns=column_mapping)
+        data = df.astype(object).where(df.notna(), None)
         engine = get_db_engine(db_type, user, password, host, port, database)
         
-        with engine.connect() as conn:
-            for _, row in df.iterrows():
-                try:
-                    row.to_frame().T.to_sql(table_name, con=engine, if_exists='append', index=False)
-                except IntegrityError:
-                    print(f"L'ID {row['ID']} existe déjà. Ignoré.")
+        inserted = 0
+        raw_conn = engine.raw_connection()
+        try:
+            loader = InsertIgnoreLoader(raw_conn, DB_SGBD[db_type], table_name, list(df.columns), key)
+            for start in range(0, len(data), batch_size):
+                inserted += loader.load(list(data.iloc[start:start + batch_size].itertuples(index=False, name=None)))
+        finally:
+            raw_conn.close()
         
-        print("Importation réussie !")
+        print(f"Importation réussie ! {inserted} lignes insérées, {loader.skipped} ignorées ({key} déjà présent).")
     except Exception as e:
         print(f"Erreur lors de l'importation : {e}")
 
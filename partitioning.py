@@ -0,0 +1,244 @@
+"""Parallel extraction of a table split into key ranges."""
+
+import decimal
+import queue
+import threading
+
+from streaming import DEFAULT_CHUNK_SIZE, StreamReader
+
+_DONE = object()
+
+
+def marker(sgbd, position):
+    """Parameter marker for the position-th (1-based) bind value."""
+    if sgbd == "SQLite":
+        return "?"
+    if sgbd == "Oracle":
+        return f":{position}"
+    return "%s"
+
+
+def range_predicate(sgbd, key, low, high):
+    """Return (sql, params) selecting low <= key < high; None means unbounded.
+
+    A range unbounded below also takes the rows whose key is NULL, so a set
+    of ranges covering every key value covers every row.
+    """
+    clauses, params = [], []
+    if low is not None:
+        params.append(low)
+        clauses.append(f"{key} >= {marker(sgbd, len(params))}")
+    if high is not None:
+        params.append(high)
+        if low is None:
+            clauses.append(f"({key} < {marker(sgbd, len(params))} OR {key} IS NULL)")
+        else:
+            clauses.append(f"{key} < {marker(sgbd, len(params))}")
+    return (" AND ".join(clauses) or "1 = 1"), params
+
+
+def _bounds_to_ranges(bounds):
+    # Open the first and last range so no key can fall outside of them
+    bounds = sorted(set(bounds))
+    if not bounds:
+        return [(None, None)]
+    lows = [None] + bounds
+    highs = bounds + [None]
+    return list(zip(lows, highs))
+
+
+def minmax_ranges(conn, table_name, key, partitions):
+    """Split [MIN(key), MAX(key)] into equal-width ranges; the key must be numeric."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MIN({key}), MAX({key}) FROM {table_name}")
+        low, high = cursor.fetchone()
+    finally:
+        cursor.close()
+    if low is None or partitions < 2:
+        return [(None, None)]
+    if isinstance(low, bool) or not isinstance(low, (int, float, decimal.Decimal)):
+        raise TypeError(f"Equal-width ranges need a numeric key: {table_name}.{key} holds "
+                        f"{type(low).__name__} values, use quantile_ranges()")
+    low, high = int(low), int(high)
+    step = max(1, (high - low + 1) // partitions)
+    return _bounds_to_ranges(range(low + step, high + 1, step)[:partitions - 1])
+
+
+def _ntile_upper_bounds(conn, source, key, partitions):
+    query = (f"SELECT MAX(k) FROM (SELECT {key} AS k, NTILE({partitions}) OVER (ORDER BY {key}) AS bucket "
+             f"FROM {source} WHERE {key} IS NOT NULL) buckets GROUP BY bucket ORDER BY 1")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def quantile_ranges(conn, sgbd, table_name, key, partitions, sample_percent=1):
+    """Split the table into ranges holding roughly the same number of rows.
+
+    Boundaries are the NTILE upper bounds of the key, computed server side on a
+    block sample where the dialect supports one (PostgreSQL and Oracle tables)
+    and on the whole key column elsewhere, views included. Works when keys are
+    unevenly distributed.
+    """
+    if partitions < 2:
+        return [(None, None)]
+    upper_bounds = []
+    if sgbd in ("PostgreSQL", "Oracle"):
+        if sgbd == "PostgreSQL":
+            source = f"{table_name} TABLESAMPLE SYSTEM ({sample_percent})"
+        else:
+            source = f"{table_name} SAMPLE BLOCK ({sample_percent})"
+        try:
+            upper_bounds = _ntile_upper_bounds(conn, source, key, partitions)
+        except Exception:
+            # Views cannot be sampled
+            conn.rollback()
+    if len(upper_bounds) < 2:
+        upper_bounds = _ntile_upper_bounds(conn, table_name, key, partitions)
+    if len(upper_bounds) < 2:
+        # At most one keyed row: nothing to split
+        return [(None, None)]
+    # Ranges are half-open, so each bucket ends just before the next one starts
+    return _bounds_to_ranges(upper_bounds[:-1])
+
+
+def export_snapshot(conn):
+    """Open a REPEATABLE READ transaction on conn and export its snapshot id."""
+    conn.set_session(isolation_level="REPEATABLE READ")
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_export_snapshot()")
+    snapshot_id = cursor.fetchone()[0]
+    cursor.close()
+    return snapshot_id
+
+
+def import_snapshot(conn, snapshot_id):
+    """Make the next transaction on conn see the exported snapshot."""
+    conn.set_session(isolation_level="REPEATABLE READ")
+    cursor = conn.cursor()
+    cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+    cursor.close()
+
+
+class PartitionedReader:
+    """Read key ranges of a table concurrently over several source connections.
+
+    connect is a callable returning a new source connection. Chunks from every
+    range are merged into one bounded queue, so the reader can be handed to a
+    Pipeline exactly like a StreamReader. On PostgreSQL every worker imports
+    the snapshot exported by a coordinator connection, so all ranges are read
+    as of the same instant.
+    """
+
+    def __init__(self, connect, sgbd, table_name, key, ranges, workers=4,
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_chunks=8):
+        self.connect = connect
+        self.sgbd = sgbd
+        self.table_name = table_name
+        self.key = key
+        self.ranges = ranges
+        self.workers = max(1, min(workers, len(ranges)))
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.columns = []
+        self.rows_read = 0
+        self._connections = []
+        self._coordinator = None
+        self._chunks = None
+        self._stop = threading.Event()
+        self._errors = []
+
+    def open(self):
+        snapshot_id = None
+        if self.sgbd == "PostgreSQL":
+            self._coordinator = self.connect()
+            snapshot_id = export_snapshot(self._coordinator)
+        for _ in range(self.workers):
+            conn = self.connect()
+            if snapshot_id is not None:
+                import_snapshot(conn, snapshot_id)
+            self._connections.append(conn)
+
+        cursor = self._connections[0].cursor()
+        cursor.execute(f"SELECT * FROM {self.table_name} WHERE 1 = 0")
+        self.columns = [desc[0] for desc in cursor.description]
+        cursor.fetchall()
+        cursor.close()
+        return self
+
+    def _worker(self, conn, tasks):
+        try:
+            while not self._stop.is_set():
+                try:
+                    low, high = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                where, params = range_predicate(self.sgbd, self.key, low, high)
+                query = f"SELECT * FROM {self.table_name} WHERE {where}"
+                with StreamReader(conn, self.sgbd, query, params or None, self.chunk_size) as reader:
+                    for chunk in reader:
+                        if not self._put(chunk):
+                            return
+        except Exception as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            self._put(_DONE, force=True)
+
+    def _put(self, item, force=False):
+        while force or not self._stop.is_set():
+            try:
+                self._chunks.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                if force and self._stop.is_set():
+                    return False
+        return False
+
+    def __iter__(self):
+        if not self._connections:
+            self.open()
+        tasks = queue.Queue()
+        for key_range in self.ranges:
+            tasks.put(key_range)
+        self._chunks = queue.Queue(maxsize=self.max_chunks)
+        threads = [threading.Thread(target=self._worker, args=(conn, tasks), daemon=True)
+                   for conn in self._connections]
+        for thread in threads:
+            thread.start()
+
+        running = len(threads)
+        while running:
+            try:
+                chunk = self._chunks.get(timeout=0.2)
+            except queue.Empty:
+                if self._errors:
+                    raise self._errors[0]
+                continue
+            if chunk is _DONE:
+                running -= 1
+                continue
+            self.rows_read += len(chunk)
+            yield chunk
+        if self._errors:
+            raise self._errors[0]
+
+    def close(self):
+        self._stop.set()
+        for conn in self._connections + ([self._coordinator] if self._coordinator else []):
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._connections = []
+        self._coordinator = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
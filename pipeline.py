@@ -0,0 +1,128 @@
+"""Concurrent extract / transform / load pipeline over bounded queues."""
+
+import queue
+import threading
+
+DEFAULT_QUEUE_SIZE = 4
+
+_DONE = object()
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class Pipeline:
+    """Run a reader thread, an optional transform thread and writer threads.
+
+    Stages exchange chunks through bounded queues, so a fast reader blocks
+    once max_chunks chunks are waiting for the writer (backpressure). The
+    first error raised by any stage cancels the others and is re-raised by
+    run(). cancel() may be called from any thread. loader may be a list of
+    loaders (each with its own target connection) to run one writer per loader.
+    """
+
+    def __init__(self, reader, loader, transform=None, max_chunks=DEFAULT_QUEUE_SIZE, on_chunk=None):
+        self.reader = reader
+        self.loaders = loader if isinstance(loader, list) else [loader]
+        self.transform = transform
+        self.max_chunks = max_chunks
+        self.on_chunk = on_chunk
+        self.cancelled = threading.Event()
+        self.error = None
+        self.rows_read = 0
+        self.rows_written = 0
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _fail(self, error):
+        with self._lock:
+            if self.error is None:
+                self.error = error
+        self.cancel()
+
+    def _put(self, q, item):
+        # Wake up regularly so a blocked producer notices cancellation
+        while not self.cancelled.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, q):
+        while not self.cancelled.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _read(self, out_q):
+        try:
+            for chunk in self.reader:
+                self.rows_read += len(chunk)
+                if not self._put(out_q, chunk):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            try:
+                self.reader.close()
+            except Exception as e:
+                self._fail(e)
+            self._put(out_q, _DONE)
+
+    def _transform(self, in_q, out_q):
+        try:
+            while True:
+                chunk = self._get(in_q)
+                if chunk is _DONE:
+                    break
+                if not self._put(out_q, self.transform(chunk)):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(out_q, _DONE)
+
+    def _write(self, loader, in_q):
+        try:
+            while True:
+                chunk = self._get(in_q)
+                if chunk is _DONE:
+                    # Hand the end marker on to the other writers
+                    self._put(in_q, _DONE)
+                    break
+                written = loader.load(chunk)
+                with self._lock:
+                    self.rows_written += written
+                if self.on_chunk:
+                    self.on_chunk(self.rows_written)
+        except Exception as e:
+            self._fail(e)
+
+    def run(self):
+        """Run every stage to completion and return the number of rows written."""
+        read_q = queue.Queue(maxsize=self.max_chunks)
+        threads = [threading.Thread(target=self._read, args=(read_q,), daemon=True)]
+        write_q = read_q
+        if self.transform is not None:
+            write_q = queue.Queue(maxsize=self.max_chunks)
+            threads.append(threading.Thread(target=self._transform, args=(read_q, write_q), daemon=True))
+        for loader in self.loaders:
+            threads.append(threading.Thread(target=self._write, args=(loader, write_q), daemon=True))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.error is not None:
+            raise self.error
+        if self.cancelled.is_set():
+            raise PipelineCancelled(f"Pipeline cancelled after {self.rows_written} rows")
+        return self.rows_written
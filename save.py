@@ -1,7 +1,8 @@
 import pandas as pd
 import psycopg2
 import logging
-from psycopg2.extras import execute_values
+from staging import dedupe_staging, drop_staging_table, find_conflicts, merge_staging, stage_rows, summarize_conflicts
+from validation import split_valid, table_domains, table_rules
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,69 +26,105 @@ COLUMN_MAPPING = {
 PRIMARY_KEY = "id"  # Clé primaire de la table
 TABLE_NAME = "etudiant"  # Nom de la table
 CSV_FILE_PATH = "etudiants.csv"
+LOAD_METHOD = "copy"  # Remplissage de la table temporaire : "copy" (COPY FROM STDIN) ou "insert" (executemany)
+CHUNK_SIZE = 10000
+ON_INVALID = "reject"  # "reject" (lignes écartées, écrites dans REJECTS_FILE_PATH) ou "abort"
+REJECTS_FILE_PATH = "etudiants_rejets.csv"
+DATE_FORMAT = None  # ex. "%d/%m/%Y" ; None laisse pandas reconnaître le format
+COMPARE_COLUMNS = True  # Détailler les colonnes qui diffèrent pour les clés déjà présentes
+CONFLICT_SAMPLE = 20  # Nombre de conflits détaillés dans le journal
 
 # Connexion à la base de données
 conn = psycopg2.connect(**DB_CONFIG)
 cursor = conn.cursor()
 
-def get_existing_records(primary_keys):
-    """Récupère les enregistrements existants dans la base de données."""
-    query = f"SELECT * FROM {TABLE_NAME} WHERE {PRIMARY_KEY} = ANY(%s)"
-    cursor.execute(query, (list(primary_keys),))
-    return {row[0]: row for row in cursor.fetchall()}  # Dictionnaire clé primaire -> tuple
+def get_existing_records(staging, columns):
+    """Résumé des lignes de la table temporaire dont la clé existe déjà dans la table.
 
-def validate_data(df):
-    """Valide les types de données avant l'importation."""
-    if 'age' in df.columns:
-        df['age'] = pd.to_numeric(df['age'], errors='coerce')  # Convertir en nombre
-        if df['age'].isnull().any():
-            raise ValueError("Erreur de conversion : certaines valeurs de 'age' ne sont pas des nombres valides.")
+    La jointure se fait côté serveur : seules les clés en conflit (et les
+    colonnes qui diffèrent) reviennent, au fil de l'eau.
+    """
+    compared = [col for col in columns if col != PRIMARY_KEY] if COMPARE_COLUMNS else []
+    return summarize_conflicts(find_conflicts(conn, "PostgreSQL", TABLE_NAME, staging, PRIMARY_KEY, compared),
+                               CONFLICT_SAMPLE)
+
+def validate_data(df, rules, domains):
+    """Sépare les lignes conformes au schéma de la table des lignes rejetées (colonne "reason").
+
+    Longueurs, précisions, dates, NOT NULL et codes des tables référencées
+    sont vérifiés sur tout le bloc en une passe, avant le chargement.
+    """
+    return split_valid(df, rules, domains, DATE_FORMAT)
+
+def report_rejects(rejected):
+    """Journalise les lignes rejetées, puis les écrit dans REJECTS_FILE_PATH ou annule l'importation."""
+    rejected = pd.concat(rejected)
+    for reason, count in rejected["reason"].value_counts().items():
+        logging.warning(f"{count} ligne(s) rejetée(s) : {reason}")
+    if ON_INVALID == "abort":
+        raise ValueError(f"{len(rejected)} ligne(s) invalide(s) dans le fichier CSV.")
+    rejected.to_csv(REJECTS_FILE_PATH, index=False)
+    logging.warning(f"{len(rejected)} ligne(s) écartée(s), détail dans {REJECTS_FILE_PATH}")
+
+def read_csv_chunks(columns, rules, domains, rejected):
+    """Blocs de lignes du CSV, renommées et validées, prêts pour le chargement en masse.
+
+    Le fichier est lu par CHUNK_SIZE lignes, en texte : c'est la base qui
+    convertit les valeurs. Les lignes rejetées s'ajoutent à rejected.
+    """
+    for chunk in pd.read_csv(CSV_FILE_PATH, usecols=list(COLUMN_MAPPING.keys()), dtype=str, chunksize=CHUNK_SIZE):
+        chunk = chunk.rename(columns=COLUMN_MAPPING)
+        valid, invalid = validate_data(chunk, rules, domains)
+        if not invalid.empty:
+            rejected.append(invalid)
+        data = valid[columns].astype(object).where(valid[columns].notna(), None)
+        yield list(data.itertuples(index=False, name=None))
 
 def import_csv_to_postgres():
-    logging.info("Chargement du fichier CSV...")
-    df = pd.read_csv(CSV_FILE_PATH)
-    
     # Vérifier les colonnes requises
-    missing_columns = [col for col in COLUMN_MAPPING.keys() if col not in df.columns]
+    header = pd.read_csv(CSV_FILE_PATH, nrows=0).columns
+    missing_columns = [col for col in COLUMN_MAPPING.keys() if col not in header]
     if missing_columns:
         raise ValueError(f"Colonnes manquantes dans le CSV: {missing_columns}")
     
-    df.rename(columns=COLUMN_MAPPING, inplace=True)
+    columns = list(COLUMN_MAPPING.values())
+    rules = table_rules(conn, "PostgreSQL", TABLE_NAME)
+    domains = table_domains(conn, "PostgreSQL", TABLE_NAME)
     
-    if PRIMARY_KEY in df.columns:
-        df.drop_duplicates(subset=[PRIMARY_KEY], keep="last", inplace=True)
+    # Le fichier passe par une table temporaire : rien n'est écrit dans la table avant le MERGE final
+    logging.info("Chargement du fichier CSV dans une table temporaire...")
+    rejected = []
+    staging, staged = stage_rows(conn, "PostgreSQL", TABLE_NAME, columns,
+                                 read_csv_chunks(columns, rules, domains, rejected), load_method=LOAD_METHOD)
+    if rejected:
+        report_rejects(rejected)
     
-    validate_data(df)
+    # Une clé présente plusieurs fois dans le fichier : la dernière ligne l'emporte
+    duplicates = dedupe_staging(conn, "PostgreSQL", staging, PRIMARY_KEY)
+    logging.info(f"{staged} ligne(s) chargée(s) dans {staging}, {duplicates} doublon(s) de clé écarté(s).")
     
-    existing_records = get_existing_records(df[PRIMARY_KEY].tolist())
-    conflicts = df[df[PRIMARY_KEY].isin(existing_records.keys())]
+    conflicts = get_existing_records(staging, columns)
+    update_existing = True
     
-    if not conflicts.empty:
-        logging.warning("Conflits détectés entre le fichier CSV et la base de données :")
-        for index, row in conflicts.iterrows():
-            logging.warning(f"Dans le fichier CSV : {row.to_dict()}")
-            logging.warning(f"Dans la base de données : {existing_records[row[PRIMARY_KEY]]}")
+    if conflicts["keys"]:
+        logging.warning(f"Conflits détectés : {len(conflicts['keys'])} clé(s) du CSV existent déjà dans la base, "
+                        f"dont {conflicts['unchanged']} sans différence.")
+        for column, count in conflicts["columns"].items():
+            logging.warning(f"Colonne {column} : {count} valeur(s) différente(s)")
+        for key, changed in conflicts["sample"]:
+            logging.warning(f"{PRIMARY_KEY} = {key} : {', '.join(changed) or 'identique'}")
         user_choice = input("Voulez-vous (I) Ignorer, (U) Mettre à jour ou (A) Annuler l'importation ? ")
         if user_choice.upper() == "A":
+            drop_staging_table(conn, "PostgreSQL", staging)
             logging.info("Importation annulée.")
             return
         elif user_choice.upper() == "I":
-            df = df[~df[PRIMARY_KEY].isin(existing_records.keys())]
-    
-    columns = list(COLUMN_MAPPING.values())
-    values = [tuple(row) for row in df[columns].to_numpy()]
-    
-    insert_query = f"""
-        INSERT INTO {TABLE_NAME} ({', '.join(columns)})
-        VALUES %s
-        ON CONFLICT ({PRIMARY_KEY}) DO UPDATE
-        SET {', '.join(f'{col} = EXCLUDED.{col}' for col in columns if col != PRIMARY_KEY)}
-    """
+            update_existing = False
     
-    with conn:
-        with conn.cursor() as cur:
-            execute_values(cur, insert_query, values)
-            logging.info("Importation réussie !")
+    # Une seule requête ensembliste : INSERT ... SELECT ... ON CONFLICT depuis la table temporaire
+    inserted, updated = merge_staging(conn, "PostgreSQL", TABLE_NAME, staging, columns, PRIMARY_KEY, update_existing)
+    drop_staging_table(conn, "PostgreSQL", staging)
+    logging.info(f"Importation réussie ! {inserted} ligne(s) insérée(s), {updated} ligne(s) mise(s) à jour.")
 
 try:
     import_csv_to_postgres()
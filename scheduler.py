@@ -0,0 +1,149 @@
+"""Schema-level migration: tables run concurrently in foreign key order."""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_TABLE_WORKERS = 4
+
+
+class SkippedTable(Exception):
+    """A table was not migrated because a table it references failed."""
+
+
+def dependency_graph(tables, foreign_keys):
+    """Return {table: set of parent tables} for the enforced foreign keys.
+
+    Self references and parents outside of tables are ignored: they cannot
+    order the tables being migrated.
+    """
+    by_name = {table.lower(): table for table in tables}
+    parents = {table: set() for table in tables}
+    for child, parent, enforced in foreign_keys:
+        child, parent = by_name.get(child.lower()), by_name.get(parent.lower())
+        if enforced and child and parent and child != parent:
+            parents[child].add(parent)
+    return parents
+
+
+def find_cycle(parents):
+    """Return one foreign key cycle as a list of tables, or None."""
+    state = {}
+
+    def visit(table, path):
+        state[table] = "open"
+        path.append(table)
+        for parent in sorted(parents[table]):
+            if state.get(parent) == "open":
+                return path[path.index(parent):] + [parent]
+            if parent not in state:
+                cycle = visit(parent, path)
+                if cycle:
+                    return cycle
+        state[table] = "done"
+        path.pop()
+        return None
+
+    for table in sorted(parents):
+        if table not in state:
+            cycle = visit(table, [])
+            if cycle:
+                return cycle
+    return None
+
+
+def chain_lengths(parents):
+    """Length of the longest chain of dependent tables hanging below each table."""
+    children = {table: set() for table in parents}
+    for child, table_parents in parents.items():
+        for parent in table_parents:
+            children[parent].add(child)
+    lengths = {}
+
+    def length(table):
+        if table not in lengths:
+            lengths[table] = 1 + max((length(child) for child in children[table]), default=0)
+        return lengths[table]
+
+    for table in parents:
+        length(table)
+    return lengths
+
+
+class MigrationScheduler:
+    """Run migrate_table(table) for every table, parents before children.
+
+    A table starts as soon as every table it references is done, on up to
+    workers threads, so independent tables overlap and the total time follows
+    the longest dependency chain. Ready tables heading the longest chains start
+    first. When a table fails its descendants are skipped and the rest goes on.
+    on_event(table, status, detail) is called from worker threads with status
+    "started", "done", "failed" or "skipped".
+    """
+
+    def __init__(self, parents, migrate_table, workers=DEFAULT_TABLE_WORKERS, on_event=None):
+        cycle = find_cycle(parents)
+        if cycle:
+            raise ValueError("Foreign key cycle: " + " -> ".join(cycle))
+        self.parents = parents
+        self.migrate_table = migrate_table
+        self.workers = max(1, workers)
+        self.on_event = on_event
+        self.cancelled = threading.Event()
+        self.results = {}
+
+    def cancel(self):
+        """Start no new table; tables already running finish."""
+        self.cancelled.set()
+
+    def _notify(self, table, status, detail=None):
+        if self.on_event:
+            self.on_event(table, status, detail)
+
+    def _run_table(self, table):
+        self._notify(table, "started")
+        return self.migrate_table(table)
+
+    def run(self):
+        """Migrate every table and return {table: row count or exception}."""
+        lengths = chain_lengths(self.parents)
+        pending = {table: set(parents) for table, parents in self.parents.items()}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                ready = sorted((table for table, waiting in pending.items() if not waiting),
+                               key=lambda table: (-lengths[table], table))
+                while ready and len(running) < self.workers and not self.cancelled.is_set():
+                    table = ready.pop(0)
+                    del pending[table]
+                    running[executor.submit(self._run_table, table)] = table
+                if not running:
+                    # Cancelled, or nothing left that can start
+                    for table in pending:
+                        self.results[table] = SkippedTable("migration cancelled")
+                        self._notify(table, "skipped", self.results[table])
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    table = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        self.results[table] = future.result()
+                        self._notify(table, "done", self.results[table])
+                        for waiting in pending.values():
+                            waiting.discard(table)
+                    else:
+                        self.results[table] = error
+                        self._notify(table, "failed", error)
+                        self._skip_descendants(table, pending)
+        return self.results
+
+    def _skip_descendants(self, failed, pending):
+        blocked = [failed]
+        while blocked:
+            parent = blocked.pop()
+            for table in [table for table, waiting in pending.items() if parent in waiting]:
+                del pending[table]
+                self.results[table] = SkippedTable(f"{parent} was not migrated")
+                self._notify(table, "skipped", self.results[table])
+                blocked.append(table)
@@ -0,0 +1,706 @@
+"""Source schema metadata (tables, columns, foreign keys) and its translation to native target types."""
+
+import re
+
+# Room left for the row header and NULL bitmap under MySQL's 65535 byte row limit
+MYSQL_ROW_BUDGET = 60000
+
+
+def _split_name(table_name):
+    """Return (schema or None, name) for a possibly qualified table name."""
+    if "." in table_name:
+        schema, name = table_name.split(".", 1)
+        return schema, name
+    return None, table_name
+
+
+def _decoded(rows):
+    # Some MySQL connector versions return catalog strings as bytes
+    return [[value.decode("utf-8") if isinstance(value, (bytes, bytearray)) else value for value in row]
+            for row in rows]
+
+
+def _parse_declared(declared):
+    # "VARCHAR(68)" -> ("VARCHAR", 68, None); "NUMERIC(10, 2)" -> ("NUMERIC", 10, 2)
+    match = re.match(r"\s*([^(]*?)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*$", declared or "")
+    if not match:
+        return (declared or "").upper(), None, None
+    base, first, second = match.groups()
+    return base.upper(), int(first) if first else None, int(second) if second else None
+
+
+def _column(name, type_name, length=None, precision=None, scale=None, nullable=True, column_type=None):
+    return {
+        "name": name,
+        "type": type_name.upper(),
+        "length": length,
+        "precision": precision,
+        "scale": scale,
+        "nullable": nullable,
+        "column_type": column_type,
+    }
+
+
+def get_columns(conn, sgbd, table_name):
+    """Return the columns of a table or view, in order, as metadata dicts.
+
+    Each dict holds the source type name and its length, precision, scale and
+    nullability, as reported by the dialect's own catalog.
+    """
+    schema, name = _split_name(table_name)
+    cursor = conn.cursor()
+    try:
+        if sgbd == "SQLite":
+            cursor.execute(f"PRAGMA table_info({table_name})")
+            columns = []
+            for _, col_name, declared, notnull, _, _ in cursor.fetchall():
+                base, first, second = _parse_declared(declared)
+                columns.append(_column(col_name, base, length=first, precision=first, scale=second,
+                                       nullable=not notnull))
+            return columns
+        if sgbd == "PostgreSQL":
+            cursor.execute(
+                "SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale, "
+                "datetime_precision, is_nullable FROM information_schema.columns "
+                "WHERE table_schema = COALESCE(%s, current_schema()) AND table_name = %s "
+                "ORDER BY ordinal_position",
+                (schema, name.lower()))
+            return [_column(col_name, data_type, length=length,
+                            precision=precision if data_type == "numeric" else None,
+                            scale=datetime_precision if data_type.startswith("time") else scale,
+                            nullable=is_nullable == "YES")
+                    for col_name, data_type, length, precision, scale, datetime_precision, is_nullable
+                    in cursor.fetchall()]
+        if sgbd == "MySQL":
+            cursor.execute(
+                "SELECT column_name, data_type, character_maximum_length, numeric_precision, numeric_scale, "
+                "datetime_precision, is_nullable, column_type FROM information_schema.columns "
+                "WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s "
+                "ORDER BY ordinal_position",
+                (schema, name))
+            columns = []
+            for row in _decoded(cursor.fetchall()):
+                col_name, data_type, length, precision, scale, datetime_precision, is_nullable, column_type = row
+                columns.append(_column(col_name, data_type, length=length, precision=precision,
+                                       scale=datetime_precision if data_type in ("datetime", "timestamp", "time") else scale,
+                                       nullable=is_nullable == "YES", column_type=column_type.lower()))
+            return columns
+        if sgbd == "Oracle":
+            cursor.execute(
+                "SELECT column_name, data_type, char_length, data_length, data_precision, data_scale, nullable "
+                "FROM all_tab_columns WHERE owner = NVL(:1, USER) AND table_name = :2 ORDER BY column_id",
+                [schema.upper() if schema else None, name.upper()])
+            return [_column(col_name, data_type, length=char_length or data_length, precision=precision,
+                            scale=scale, nullable=nullable == "Y")
+                    for col_name, data_type, char_length, data_length, precision, scale, nullable
+                    in cursor.fetchall()]
+        raise ValueError(f"Unsupported SGBD: {sgbd}")
+    finally:
+        cursor.close()
+
+
+def _integer_kind(precision):
+    # Smallest integer type holding every value of NUMBER(precision, 0)
+    if precision is None or precision > 18:
+        return ("bigint",) if precision is None else ("decimal", precision, 0)
+    if precision <= 4:
+        return ("smallint",)
+    if precision <= 9:
+        return ("integer",)
+    return ("bigint",)
+
+
+def _sqlite_kind(base, first, second):
+    # Same rules as SQLite's own column affinity, plus the usual date names
+    if base == "DATE":
+        return ("date",)
+    if base in ("DATETIME", "TIMESTAMP"):
+        return ("datetime", None)
+    if base == "TIME":
+        return ("time",)
+    if base in ("BOOLEAN", "BOOL"):
+        return ("boolean",)
+    if "INT" in base:
+        return ("bigint",)
+    if base.startswith(("VARCHAR", "NVARCHAR", "CHARACTER VARYING", "VARYING CHARACTER")) and first:
+        return ("varchar", first)
+    if "CHAR" in base and first:
+        return ("char", first)
+    if "CHAR" in base or "CLOB" in base or "TEXT" in base or not base:
+        return ("text",)
+    if "BLOB" in base:
+        return ("blob",)
+    if "REAL" in base or "FLOA" in base or "DOUB" in base:
+        return ("double",)
+    if first is not None:
+        return ("decimal", first, second or 0)
+    return ("decimal", None, None)
+
+
+def _postgres_kind(column):
+    data_type = column["type"].lower()
+    if data_type in ("smallint", "integer", "bigint", "boolean", "date", "text", "uuid"):
+        return (data_type,)
+    if data_type == "numeric":
+        if column["precision"] is not None and not column["scale"]:
+            return _integer_kind(column["precision"])
+        return ("decimal", column["precision"], column["scale"])
+    if data_type == "real":
+        return ("float",)
+    if data_type == "double precision":
+        return ("double",)
+    if data_type == "character varying":
+        return ("varchar", column["length"]) if column["length"] else ("text",)
+    if data_type == "character":
+        return ("char", column["length"] or 1)
+    if data_type == "timestamp without time zone":
+        return ("datetime", column["scale"])
+    if data_type == "timestamp with time zone":
+        return ("datetimetz", column["scale"])
+    if data_type.startswith("time"):
+        return ("time",)
+    if data_type == "bytea":
+        return ("blob",)
+    if data_type in ("json", "jsonb"):
+        return ("json",)
+    # Arrays, enums, ranges, ... travel as their text form
+    return ("text",)
+
+
+def _mysql_kind(column):
+    data_type = column["type"].lower()
+    column_type = column["column_type"] or data_type
+    unsigned = "unsigned" in column_type
+    if data_type == "tinyint" and column_type.startswith("tinyint(1)"):
+        return ("boolean",)
+    if data_type in ("tinyint", "smallint"):
+        return ("integer",) if unsigned and data_type == "smallint" else ("smallint",)
+    if data_type in ("mediumint", "int", "integer"):
+        return ("bigint",) if unsigned and data_type != "mediumint" else ("integer",)
+    if data_type == "bigint":
+        return ("decimal", 20, 0) if unsigned else ("bigint",)
+    if data_type == "bit":
+        return ("boolean",) if column["precision"] == 1 else ("bigint",)
+    if data_type == "year":
+        return ("smallint",)
+    if data_type in ("decimal", "numeric"):
+        if not column["scale"]:
+            return _integer_kind(column["precision"])
+        return ("decimal", column["precision"], column["scale"])
+    if data_type == "float":
+        return ("float",)
+    if data_type in ("double", "real"):
+        return ("double",)
+    if data_type == "char":
+        return ("char", column["length"] or 1)
+    if data_type == "varchar":
+        return ("varchar", column["length"])
+    if data_type in ("enum", "set"):
+        return ("varchar", column["length"] or 255)
+    if data_type.endswith("text"):
+        return ("text",)
+    if data_type == "date":
+        return ("date",)
+    if data_type in ("datetime", "timestamp"):
+        return ("datetime", column["scale"])
+    if data_type == "time":
+        return ("time",)
+    if data_type in ("binary", "varbinary"):
+        return ("binary", column["length"])
+    if data_type.endswith("blob"):
+        return ("blob",)
+    if data_type == "json":
+        return ("json",)
+    return ("text",)
+
+
+def _oracle_kind(column):
+    data_type = column["type"]
+    if data_type == "NUMBER":
+        if column["scale"] == 0:
+            # NUMBER(*,0) and INTEGER have no precision but hold whole numbers only
+            return _integer_kind(column["precision"])
+        return ("decimal", column["precision"], column["scale"])
+    if data_type in ("FLOAT", "BINARY_DOUBLE"):
+        return ("double",)
+    if data_type == "BINARY_FLOAT":
+        return ("float",)
+    if data_type in ("VARCHAR2", "NVARCHAR2", "VARCHAR"):
+        return ("varchar", column["length"])
+    if data_type in ("CHAR", "NCHAR"):
+        return ("char", column["length"] or 1)
+    if data_type in ("CLOB", "NCLOB", "LONG", "XMLTYPE"):
+        return ("text",)
+    if data_type == "DATE":
+        # Oracle DATE carries a time of day down to the second
+        return ("datetime", 0)
+    if data_type.startswith("TIMESTAMP"):
+        kind = "datetimetz" if "TIME ZONE" in data_type else "datetime"
+        return (kind, column["scale"])
+    if data_type == "RAW":
+        return ("binary", column["length"])
+    if data_type in ("BLOB", "LONG RAW", "BFILE"):
+        return ("blob",)
+    if data_type in ("ROWID", "UROWID"):
+        return ("varchar", 18)
+    return ("text",)
+
+
+def generic_type(sgbd, column):
+    """Reduce a source column to a dialect-neutral (kind, *args) tuple."""
+    if sgbd == "SQLite":
+        return _sqlite_kind(column["type"], column["precision"], column["scale"])
+    if sgbd == "PostgreSQL":
+        return _postgres_kind(column)
+    if sgbd == "MySQL":
+        return _mysql_kind(column)
+    if sgbd == "Oracle":
+        return _oracle_kind(column)
+    raise ValueError(f"Unsupported SGBD: {sgbd}")
+
+
+def _decimal(name, precision, scale, max_precision):
+    if precision is None or precision > max_precision:
+        return None
+    if scale:
+        return f"{name}({precision},{min(scale, precision)})"
+    return f"{name}({precision})"
+
+
+def _postgres_type(kind, *args):
+    if kind in ("smallint", "integer", "bigint", "boolean", "date", "text", "uuid"):
+        return kind.upper()
+    if kind == "decimal":
+        return _decimal("NUMERIC", args[0], args[1], 1000) or "NUMERIC"
+    if kind == "float":
+        return "REAL"
+    if kind == "double":
+        return "DOUBLE PRECISION"
+    if kind == "char":
+        return f"CHAR({args[0]})"
+    if kind == "varchar":
+        return f"VARCHAR({args[0]})" if args[0] else "TEXT"
+    if kind == "datetime":
+        return "TIMESTAMP"
+    if kind == "datetimetz":
+        return "TIMESTAMPTZ"
+    if kind == "time":
+        return "TIME"
+    if kind in ("binary", "blob"):
+        return "BYTEA"
+    if kind == "json":
+        return "JSONB"
+    return "TEXT"
+
+
+def _mysql_type(kind, *args):
+    if kind == "smallint":
+        return "SMALLINT"
+    if kind == "integer":
+        return "INT"
+    if kind == "bigint":
+        return "BIGINT"
+    if kind == "boolean":
+        return "TINYINT(1)"
+    if kind == "decimal":
+        # Unconstrained numbers keep every digit they can have
+        return _decimal("DECIMAL", args[0], args[1], 65) or "DECIMAL(65,30)"
+    if kind == "float":
+        return "FLOAT"
+    if kind == "double":
+        return "DOUBLE"
+    if kind == "char":
+        return f"CHAR({args[0]})" if args[0] <= 255 else "TEXT"
+    if kind == "varchar":
+        return f"VARCHAR({args[0]})" if args[0] else "LONGTEXT"
+    if kind == "text":
+        return "LONGTEXT"
+    if kind == "date":
+        return "DATE"
+    if kind in ("datetime", "datetimetz"):
+        # DATETIME, not TIMESTAMP: no 2038 limit and no session time zone shift
+        return f"DATETIME({min(args[0], 6)})" if args[0] else "DATETIME"
+    if kind == "time":
+        return "TIME"
+    if kind == "binary":
+        return f"VARBINARY({args[0]})" if args[0] and args[0] <= 255 else "LONGBLOB"
+    if kind == "blob":
+        return "LONGBLOB"
+    if kind == "json":
+        return "JSON"
+    if kind == "uuid":
+        return "CHAR(36)"
+    return "LONGTEXT"
+
+
+def _oracle_type(kind, *args):
+    if kind == "smallint":
+        return "NUMBER(5)"
+    if kind == "integer":
+        return "NUMBER(10)"
+    if kind == "bigint":
+        return "NUMBER(19)"
+    if kind == "boolean":
+        return "NUMBER(1)"
+    if kind == "decimal":
+        return _decimal("NUMBER", args[0], args[1], 38) or "NUMBER"
+    if kind == "float":
+        return "BINARY_FLOAT"
+    if kind == "double":
+        return "BINARY_DOUBLE"
+    if kind == "char":
+        return f"CHAR({args[0]} CHAR)" if args[0] <= 2000 else "CLOB"
+    if kind == "varchar":
+        return f"VARCHAR2({args[0]} CHAR)" if args[0] and args[0] <= 4000 else "CLOB"
+    if kind == "date":
+        return "DATE"
+    if kind == "datetime":
+        return "DATE" if args[0] == 0 else "TIMESTAMP"
+    if kind == "datetimetz":
+        return "TIMESTAMP WITH TIME ZONE"
+    if kind == "time":
+        return "VARCHAR2(18 CHAR)"
+    if kind == "binary":
+        return f"RAW({args[0]})" if args[0] and args[0] <= 2000 else "BLOB"
+    if kind == "blob":
+        return "BLOB"
+    if kind == "uuid":
+        return "VARCHAR2(36 CHAR)"
+    return "CLOB"
+
+
+def _sqlite_type(kind, *args):
+    # Names chosen for the affinity SQLite derives from them
+    if kind in ("smallint", "integer", "bigint"):
+        return "INTEGER"
+    if kind == "boolean":
+        return "BOOLEAN"
+    if kind == "decimal":
+        return _decimal("NUMERIC", args[0], args[1], 1000) or "NUMERIC"
+    if kind in ("float", "double"):
+        return "REAL"
+    if kind == "char":
+        return f"CHAR({args[0]})"
+    if kind == "varchar":
+        return f"VARCHAR({args[0]})" if args[0] else "TEXT"
+    if kind == "date":
+        return "DATE"
+    if kind in ("datetime", "datetimetz"):
+        return "TIMESTAMP"
+    if kind == "time":
+        return "TIME"
+    if kind in ("binary", "blob"):
+        return "BLOB"
+    return "TEXT"
+
+
+TARGET_TYPES = {
+    "PostgreSQL": _postgres_type,
+    "MySQL": _mysql_type,
+    "Oracle": _oracle_type,
+    "SQLite": _sqlite_type,
+}
+
+
+def target_type(source_sgbd, column, target_sgbd):
+    """Native target type for a source column."""
+    return TARGET_TYPES[target_sgbd](*generic_type(source_sgbd, column))
+
+
+# Integer type of an identity key, shared by the foreign key columns pointing at it
+IDENTITY_KEY_TYPES = {
+    "PostgreSQL": "BIGINT",
+    "MySQL": "BIGINT",
+    "Oracle": "NUMBER(19)",
+    "SQLite": "INTEGER",
+}
+
+# Native auto-numbered key columns. MySQL and SQLite only number a key column,
+# so there the identity column is also declared as the primary key.
+IDENTITY_TYPES = {
+    "PostgreSQL": "BIGINT GENERATED BY DEFAULT AS IDENTITY",
+    "MySQL": "BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY",
+    "Oracle": "NUMBER(19) GENERATED BY DEFAULT ON NULL AS IDENTITY",
+    "SQLite": "INTEGER PRIMARY KEY",
+}
+
+
+def column_types(source_sgbd, columns, target_sgbd, identity=None, identity_references=()):
+    """Native target type of each column, in order, as (column, type name) pairs.
+
+    The identity column and the columns named in identity_references (foreign
+    keys pointing at an identity key, see identities.identity_references())
+    get IDENTITY_KEY_TYPES: PostgreSQL and MySQL refuse a foreign key between
+    NUMERIC and BIGINT columns.
+    """
+    references = {name.lower() for name in identity_references}
+    if identity:
+        references.add(identity.lower())
+    types = []
+    row_bytes = 0
+    for column in columns:
+        if column["name"].lower() in references:
+            types.append((column["name"], IDENTITY_KEY_TYPES[target_sgbd]))
+            continue
+        kind = generic_type(source_sgbd, column)
+        type_name = TARGET_TYPES[target_sgbd](*kind)
+        if target_sgbd == "MySQL" and type_name.startswith(("VARCHAR", "CHAR(", "VARBINARY")):
+            # Inline columns share one 65535 byte row: move the overflow off-row
+            length = 36 if kind[0] == "uuid" else kind[1]
+            size = length * (1 if kind[0] == "binary" else 4)
+            if row_bytes + size > MYSQL_ROW_BUDGET:
+                type_name = "LONGBLOB" if kind[0] == "binary" else "TEXT" if length <= 16383 else "MEDIUMTEXT"
+            else:
+                row_bytes += size
+        types.append((column["name"], type_name))
+    return types
+
+
+def column_definitions(source_sgbd, columns, target_sgbd, identity=None, identity_references=()):
+    """Column list of a CREATE TABLE statement on the target, e.g. "ID BIGINT NOT NULL, ...".
+
+    The identity column, when named, becomes a native identity accepting
+    explicit values, so the existing keys load unchanged.
+    """
+    definitions = []
+    types = column_types(source_sgbd, columns, target_sgbd, identity, identity_references)
+    for column, (name, type_name) in zip(columns, types):
+        if identity and name.lower() == identity.lower():
+            definitions.append(f"{name} {IDENTITY_TYPES[target_sgbd]}")
+            continue
+        definition = f"{name} {type_name}"
+        if not column["nullable"]:
+            definition += " NOT NULL"
+        definitions.append(definition)
+    return ", ".join(definitions)
+
+
+def get_tables(conn, sgbd, schema=None):
+    """Names of the base tables of a schema (the connection's own by default)."""
+    cursor = conn.cursor()
+    try:
+        if sgbd == "SQLite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        elif sgbd == "PostgreSQL":
+            cursor.execute(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_schema = COALESCE(%s, current_schema()) AND table_type = 'BASE TABLE' ORDER BY table_name",
+                (schema,))
+        elif sgbd == "MySQL":
+            cursor.execute(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_schema = COALESCE(%s, DATABASE()) AND table_type = 'BASE TABLE' ORDER BY table_name",
+                (schema,))
+        elif sgbd == "Oracle":
+            cursor.execute("SELECT table_name FROM all_tables WHERE owner = NVL(:1, USER) ORDER BY table_name",
+                           [schema.upper() if schema else None])
+        else:
+            raise ValueError(f"Unsupported SGBD: {sgbd}")
+        return [row[0] for row in _decoded(cursor.fetchall())]
+    finally:
+        cursor.close()
+
+
+def get_foreign_keys(conn, sgbd, schema=None):
+    """Foreign keys of a schema as (child table, parent table, enforced) tuples.
+
+    enforced is False for constraints the server does not check (disabled in
+    Oracle); those do not impose a load order. SQLite foreign keys are always
+    enforced: PRAGMA foreign_keys only describes the reading connection, the
+    target will check them.
+    """
+    cursor = conn.cursor()
+    try:
+        if sgbd == "SQLite":
+            foreign_keys = []
+            for table_name in get_tables(conn, sgbd):
+                cursor.execute(f"PRAGMA foreign_key_list({table_name})")
+                foreign_keys.extend((table_name, row[2], True) for row in cursor.fetchall())
+            return sorted(set(foreign_keys))
+        if sgbd == "PostgreSQL":
+            cursor.execute(
+                "SELECT DISTINCT child.relname, parent.relname, TRUE FROM pg_constraint c "
+                "JOIN pg_class child ON child.oid = c.conrelid JOIN pg_class parent ON parent.oid = c.confrelid "
+                "JOIN pg_namespace n ON n.oid = child.relnamespace "
+                "WHERE c.contype = 'f' AND n.nspname = COALESCE(%s, current_schema())",
+                (schema,))
+        elif sgbd == "MySQL":
+            cursor.execute(
+                "SELECT DISTINCT table_name, referenced_table_name, 1 FROM information_schema.referential_constraints "
+                "WHERE constraint_schema = COALESCE(%s, DATABASE())",
+                (schema,))
+        elif sgbd == "Oracle":
+            cursor.execute(
+                "SELECT DISTINCT c.table_name, p.table_name, CASE c.status WHEN 'ENABLED' THEN 1 ELSE 0 END "
+                "FROM all_constraints c JOIN all_constraints p "
+                "ON p.owner = c.r_owner AND p.constraint_name = c.r_constraint_name "
+                "WHERE c.constraint_type = 'R' AND c.owner = NVL(:1, USER)",
+                [schema.upper() if schema else None])
+        else:
+            raise ValueError(f"Unsupported SGBD: {sgbd}")
+        return [(child, parent, bool(enforced)) for child, parent, enforced in _decoded(cursor.fetchall())]
+    finally:
+        cursor.close()
+
+
+def _grouped(rows):
+    # [(name, value), ...] in order -> {name: [value, ...]} keeping first-seen order
+    groups = {}
+    for name, value in rows:
+        groups.setdefault(name, []).append(value)
+    return groups
+
+
+def get_primary_key(conn, sgbd, table_name):
+    """Return (constraint name, [columns]) of the primary key, or None."""
+    schema, name = _split_name(table_name)
+    cursor = conn.cursor()
+    try:
+        if sgbd == "SQLite":
+            cursor.execute(f"PRAGMA table_info({table_name})")
+            columns = [row[1] for row in sorted(cursor.fetchall(), key=lambda row: row[5]) if row[5]]
+            return (f"pk_{name}", columns) if columns else None
+        if sgbd == "PostgreSQL":
+            cursor.execute(
+                "SELECT c.conname, a.attname FROM pg_constraint c "
+                "CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, n) "
+                "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum "
+                "WHERE c.contype = 'p' AND c.conrelid = %s::regclass ORDER BY k.n",
+                (table_name,))
+        elif sgbd == "MySQL":
+            cursor.execute(
+                "SELECT constraint_name, column_name FROM information_schema.key_column_usage "
+                "WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s AND constraint_name = 'PRIMARY' "
+                "ORDER BY ordinal_position",
+                (schema, name))
+        elif sgbd == "Oracle":
+            cursor.execute(
+                "SELECT c.constraint_name, cc.column_name FROM all_constraints c "
+                "JOIN all_cons_columns cc ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name "
+                "WHERE c.constraint_type = 'P' AND c.owner = NVL(:1, USER) AND c.table_name = :2 "
+                "ORDER BY cc.position",
+                [schema.upper() if schema else None, name.upper()])
+        else:
+            raise ValueError(f"Unsupported SGBD: {sgbd}")
+        groups = _grouped(_decoded(cursor.fetchall()))
+    finally:
+        cursor.close()
+    for constraint_name, columns in groups.items():
+        if sgbd == "MySQL":
+            # Every MySQL primary key is called PRIMARY
+            constraint_name = f"pk_{name}"
+        return constraint_name, columns
+    return None
+
+
+def get_indexes(conn, sgbd, table_name):
+    """Plain column indexes other than the primary key's, as dicts (name, columns, unique).
+
+    Expression and partial indexes are left out: they do not translate across dialects.
+    """
+    schema, name = _split_name(table_name)
+    cursor = conn.cursor()
+    try:
+        if sgbd == "SQLite":
+            indexes = []
+            cursor.execute(f"PRAGMA index_list({table_name})")
+            for seq, index_name, unique, origin, partial in [row[:5] for row in cursor.fetchall()]:
+                if origin == "pk" or partial:
+                    continue
+                cursor.execute(f"PRAGMA index_info({index_name})")
+                columns = [row[2] for row in cursor.fetchall()]
+                if None in columns:
+                    continue
+                if index_name.startswith("sqlite_"):
+                    # Automatic index of a UNIQUE constraint: reserved name
+                    index_name = f"ux_{name}_{seq}"
+                indexes.append({"name": index_name, "columns": columns, "unique": bool(unique)})
+            return indexes
+        if sgbd == "PostgreSQL":
+            cursor.execute(
+                "SELECT i.relname, ix.indisunique, a.attname FROM pg_index ix "
+                "JOIN pg_class i ON i.oid = ix.indexrelid "
+                "CROSS JOIN LATERAL unnest(ix.indkey) WITH ORDINALITY AS k(attnum, n) "
+                "JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum "
+                "WHERE ix.indrelid = %s::regclass AND NOT ix.indisprimary "
+                "AND ix.indexprs IS NULL AND ix.indpred IS NULL ORDER BY i.relname, k.n",
+                (table_name,))
+        elif sgbd == "MySQL":
+            cursor.execute(
+                "SELECT index_name, non_unique = 0, column_name FROM information_schema.statistics "
+                "WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s AND index_name <> 'PRIMARY' "
+                "ORDER BY index_name, seq_in_index",
+                (schema, name))
+        elif sgbd == "Oracle":
+            cursor.execute(
+                "SELECT i.index_name, CASE i.uniqueness WHEN 'UNIQUE' THEN 1 ELSE 0 END, c.column_name "
+                "FROM all_indexes i JOIN all_ind_columns c ON c.index_owner = i.owner AND c.index_name = i.index_name "
+                "WHERE i.table_owner = NVL(:1, USER) AND i.table_name = :2 AND i.index_type = 'NORMAL' "
+                "AND i.index_name NOT IN (SELECT p.index_name FROM all_constraints p WHERE p.owner = i.table_owner "
+                "AND p.table_name = i.table_name AND p.constraint_type = 'P' AND p.index_name IS NOT NULL) "
+                "ORDER BY i.index_name, c.column_position",
+                [schema.upper() if schema else None, name.upper()])
+        else:
+            raise ValueError(f"Unsupported SGBD: {sgbd}")
+        rows = _decoded(cursor.fetchall())
+    finally:
+        cursor.close()
+    unique = {row[0]: bool(row[1]) for row in rows}
+    return [{"name": index_name, "columns": columns, "unique": unique[index_name]}
+            for index_name, columns in _grouped([(row[0], row[2]) for row in rows]).items()
+            if None not in columns]
+
+
+def get_table_foreign_keys(conn, sgbd, table_name):
+    """Foreign keys declared on a table, as dicts (name, columns, ref_table, ref_columns)."""
+    schema, name = _split_name(table_name)
+    cursor = conn.cursor()
+    try:
+        if sgbd == "SQLite":
+            cursor.execute(f"PRAGMA foreign_key_list({table_name})")
+            rows = [(f"fk_{name}_{row[0]}", (row[3], row[2], row[4])) for row in cursor.fetchall()]
+            foreign_keys = []
+            for fk_name, columns in _grouped(rows).items():
+                ref_table = columns[0][1]
+                ref_columns = [column[2] for column in columns]
+                if None in ref_columns:
+                    # REFERENCES parent without columns: the parent's primary key
+                    primary_key = get_primary_key(conn, sgbd, ref_table)
+                    ref_columns = primary_key[1] if primary_key else ref_columns
+                foreign_keys.append({"name": fk_name, "columns": [column[0] for column in columns],
+                                     "ref_table": ref_table, "ref_columns": ref_columns})
+            return foreign_keys
+        if sgbd == "PostgreSQL":
+            cursor.execute(
+                "SELECT c.conname, a.attname, p.relname, pa.attname FROM pg_constraint c "
+                "CROSS JOIN LATERAL unnest(c.conkey, c.confkey) WITH ORDINALITY AS k(attnum, refnum, n) "
+                "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum "
+                "JOIN pg_class p ON p.oid = c.confrelid "
+                "JOIN pg_attribute pa ON pa.attrelid = c.confrelid AND pa.attnum = k.refnum "
+                "WHERE c.contype = 'f' AND c.conrelid = %s::regclass ORDER BY c.conname, k.n",
+                (table_name,))
+        elif sgbd == "MySQL":
+            cursor.execute(
+                "SELECT constraint_name, column_name, referenced_table_name, referenced_column_name "
+                "FROM information_schema.key_column_usage WHERE table_schema = COALESCE(%s, DATABASE()) "
+                "AND table_name = %s AND referenced_table_name IS NOT NULL ORDER BY constraint_name, ordinal_position",
+                (schema, name))
+        elif sgbd == "Oracle":
+            cursor.execute(
+                "SELECT c.constraint_name, cc.column_name, p.table_name, pc.column_name FROM all_constraints c "
+                "JOIN all_cons_columns cc ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name "
+                "JOIN all_constraints p ON p.owner = c.r_owner AND p.constraint_name = c.r_constraint_name "
+                "JOIN all_cons_columns pc ON pc.owner = p.owner AND pc.constraint_name = p.constraint_name "
+                "AND pc.position = cc.position "
+                "WHERE c.constraint_type = 'R' AND c.owner = NVL(:1, USER) AND c.table_name = :2 "
+                "ORDER BY c.constraint_name, cc.position",
+                [schema.upper() if schema else None, name.upper()])
+        else:
+            raise ValueError(f"Unsupported SGBD: {sgbd}")
+        rows = _decoded(cursor.fetchall())
+    finally:
+        cursor.close()
+    groups = _grouped([(row[0], row[1:]) for row in rows])
+    return [{"name": fk_name, "columns": [column[0] for column in columns],
+             "ref_table": columns[0][1], "ref_columns": [column[2] for column in columns]}
+            for fk_name, columns in groups.items()]
@@ -0,0 +1,181 @@
+"""Session-private staging tables: incoming rows are bulk loaded next to the target and compared server-side.
+
+A staging table copies the target's column types, so the bulk loaders
+(COPY, LOAD DATA, executemany) fill it as fast as the target itself. It
+lives for the session only: TEMP tables on PostgreSQL (not WAL-logged),
+MySQL and SQLite, private temporary tables on Oracle (18c and later).
+"""
+
+from loaders import make_loader
+from streaming import DEFAULT_CHUNK_SIZE, StreamReader
+
+
+def staging_name(sgbd, table_name):
+    name = table_name.split(".")[-1]
+    # Oracle only accepts private temporary tables under its configured prefix
+    return f"ORA$PTT_{name}" if sgbd == "Oracle" else f"stg_{name}"
+
+
+def create_staging_table(conn, sgbd, table_name, col_names, name=None):
+    """Create an empty staging table with the types of col_names in table_name; returns its name."""
+    name = name or staging_name(sgbd, table_name)
+    select = f"SELECT {', '.join(col_names)} FROM {table_name} WHERE 1 = 0"
+    cursor = conn.cursor()
+    try:
+        if sgbd == "PostgreSQL":
+            cursor.execute(f"DROP TABLE IF EXISTS {name}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {name} AS {select}")
+        elif sgbd == "MySQL":
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {name}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {name} AS {select}")
+        elif sgbd == "SQLite":
+            cursor.execute(f"DROP TABLE IF EXISTS temp.{name}")
+            cursor.execute(f"CREATE TEMP TABLE {name} AS {select}")
+        elif sgbd == "Oracle":
+            cursor.execute("SELECT COUNT(*) FROM user_private_temp_tables WHERE table_name = :1", [name.upper()])
+            if cursor.fetchone()[0]:
+                cursor.execute(f"DROP TABLE {name}")
+            # PRESERVE DEFINITION keeps the table and its rows across the loaders' commits
+            cursor.execute(f"CREATE PRIVATE TEMPORARY TABLE {name} ON COMMIT PRESERVE DEFINITION AS {select}")
+        else:
+            raise ValueError(f"Unsupported SGBD: {sgbd}")
+    finally:
+        cursor.close()
+    conn.commit()
+    return name
+
+
+def drop_staging_table(conn, sgbd, name):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP TEMPORARY TABLE {name}" if sgbd == "MySQL" else f"DROP TABLE {name}")
+    finally:
+        cursor.close()
+    conn.commit()
+
+
+def stage_rows(conn, sgbd, table_name, col_names, chunks, name=None, load_method="auto"):
+    """Create a staging table for table_name and bulk load chunks of rows into it.
+
+    chunks yields lists of row tuples in col_names order; only one is held at
+    a time. Returns (staging table name, rows staged).
+    """
+    name = create_staging_table(conn, sgbd, table_name, col_names, name)
+    loader = make_loader(conn, sgbd, name, col_names, load_method)
+    total = 0
+    for chunk in chunks:
+        total += loader.load(chunk)
+    return name, total
+
+
+def dedupe_staging(conn, sgbd, name, key):
+    """Keep only the last staged row of each key, as applying the file in order would."""
+    if sgbd == "PostgreSQL":
+        query = f"DELETE FROM {name} a USING {name} b WHERE a.{key} = b.{key} AND a.ctid < b.ctid"
+    elif sgbd in ("SQLite", "Oracle"):
+        row_id = "rowid" if sgbd == "SQLite" else "ROWID"
+        query = f"DELETE FROM {name} WHERE {row_id} NOT IN (SELECT MAX({row_id}) FROM {name} GROUP BY {key})"
+    else:
+        # MySQL: ON DUPLICATE KEY UPDATE applies repeated keys in order, the last one wins
+        return 0
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        removed = cursor.rowcount
+    finally:
+        cursor.close()
+    conn.commit()
+    return removed
+
+
+def merge_statement(sgbd, table_name, name, col_names, key, update=True):
+    """One set-based statement applying every staged row to table_name.
+
+    Existing keys are updated, or left alone with update=False.
+    """
+    cols = ", ".join(col_names)
+    updates = [col for col in col_names if col.lower() != key.lower()] if update else []
+    if sgbd == "Oracle":
+        query = (f"MERGE INTO {table_name} t USING {name} s ON (t.{key} = s.{key}) "
+                 f"WHEN NOT MATCHED THEN INSERT ({cols}) VALUES ({', '.join('s.' + col for col in col_names)})")
+        if updates:
+            query += f" WHEN MATCHED THEN UPDATE SET {', '.join(f't.{col} = s.{col}' for col in updates)}"
+        return query
+    if sgbd == "MySQL":
+        if not updates:
+            return f"INSERT IGNORE INTO {table_name} ({cols}) SELECT {cols} FROM {name}"
+        return (f"INSERT INTO {table_name} ({cols}) SELECT {cols} FROM {name} "
+                "ON DUPLICATE KEY UPDATE " + ", ".join(f"{col} = VALUES({col})" for col in updates))
+    # The WHERE keeps SQLite from reading ON CONFLICT as a join constraint
+    query = f"INSERT INTO {table_name} ({cols}) SELECT {cols} FROM {name} WHERE 1 = 1 ON CONFLICT ({key}) "
+    if updates:
+        return query + "DO UPDATE SET " + ", ".join(f"{col} = excluded.{col}" for col in updates)
+    return query + "DO NOTHING"
+
+
+def merge_staging(conn, sgbd, table_name, name, col_names, key, update=True):
+    """Apply the staged rows to table_name in one statement and commit; returns (inserted, updated).
+
+    Counts come from joining the staged keys to the table just before the
+    merge, so they do not depend on how the driver reports affected rows.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(DISTINCT s.{key}), COUNT(DISTINCT t.{key}) FROM {name} s "
+                       f"LEFT JOIN {table_name} t ON t.{key} = s.{key}")
+        staged, matched = cursor.fetchone()
+        cursor.execute(merge_statement(sgbd, table_name, name, col_names, key, update))
+    finally:
+        cursor.close()
+    conn.commit()
+    return staged - matched, matched if update else 0
+
+
+def _differs(sgbd, column):
+    # NULL-safe inequality between the target (t) and the staged (s) value
+    if sgbd == "PostgreSQL":
+        return f"t.{column} IS DISTINCT FROM s.{column}"
+    if sgbd == "MySQL":
+        return f"NOT (t.{column} <=> s.{column})"
+    if sgbd == "SQLite":
+        return f"t.{column} IS NOT s.{column}"
+    return f"DECODE(t.{column}, s.{column}, 0, 1) = 1"
+
+
+def conflict_query(sgbd, table_name, name, key, compare_columns=()):
+    """Staged keys already in table_name, with one 0/1 flag per compared column that differs."""
+    flags = [f"CASE WHEN {_differs(sgbd, column)} THEN 1 ELSE 0 END" for column in compare_columns]
+    return (f"SELECT {', '.join([f's.{key}'] + flags)} FROM {name} s "
+            f"JOIN {table_name} t ON t.{key} = s.{key}")
+
+
+def find_conflicts(conn, sgbd, table_name, name, key, compare_columns=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (key, [compared columns whose value differs]) for each staged row whose key exists.
+
+    The join runs on the server and results are streamed, so the cost follows
+    the number of conflicts, not the number of staged rows.
+    """
+    with StreamReader(conn, sgbd, conflict_query(sgbd, table_name, name, key, compare_columns),
+                      chunk_size=chunk_size) as reader:
+        for chunk in reader:
+            for row in chunk:
+                yield row[0], [column for column, differs in zip(compare_columns, row[1:]) if differs]
+
+
+def summarize_conflicts(conflicts, sample_size=20):
+    """Totals over find_conflicts() output.
+
+    Returns {"keys": set of conflicting keys, "unchanged": rows identical on
+    every compared column, "columns": {column: rows differing}, "sample":
+    first (key, columns) pairs}.
+    """
+    summary = {"keys": set(), "unchanged": 0, "columns": {}, "sample": []}
+    for key, columns in conflicts:
+        summary["keys"].add(key)
+        if not columns:
+            summary["unchanged"] += 1
+        for column in columns:
+            summary["columns"][column] = summary["columns"].get(column, 0) + 1
+        if len(summary["sample"]) < sample_size:
+            summary["sample"].append((key, columns))
+    return summary
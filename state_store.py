@@ -0,0 +1,132 @@
+"""Small local SQLite store for migration state kept between runs."""
+
+import datetime
+import decimal
+import os
+import sqlite3
+import threading
+
+STATE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migration_state.db")
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return "datetime", value.isoformat()
+    if isinstance(value, datetime.date):
+        return "date", value.isoformat()
+    if isinstance(value, int):
+        return "int", str(value)
+    if isinstance(value, float):
+        return "float", repr(value)
+    if isinstance(value, decimal.Decimal):
+        return "decimal", str(value)
+    return "str", str(value)
+
+
+def _decode(kind, text):
+    if kind == "datetime":
+        return datetime.datetime.fromisoformat(text)
+    if kind == "date":
+        return datetime.date.fromisoformat(text)
+    if kind == "int":
+        return int(text)
+    if kind == "float":
+        return float(text)
+    if kind == "decimal":
+        return decimal.Decimal(text)
+    return text
+
+
+class WatermarkStore:
+    """Per-table high-water marks used by incremental syncs.
+
+    Values keep their Python type (datetime, date, int, ...) so they can be
+    bound straight back into the next incremental query.
+    """
+
+    def __init__(self, path=STATE_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                "name TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, "
+                "updated_at TEXT NOT NULL)")
+
+    def get(self, name):
+        with self.lock:
+            row = self.conn.execute("SELECT kind, value FROM watermarks WHERE name = ?", (name,)).fetchone()
+        return _decode(*row) if row else None
+
+    def set(self, name, value):
+        kind, text = _encode(value)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO watermarks (name, kind, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET kind = excluded.kind, value = excluded.value, "
+                "updated_at = excluded.updated_at",
+                (name, kind, text, datetime.datetime.now().isoformat()))
+
+    def clear(self, name):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM watermarks WHERE name = ?", (name,))
+
+    def close(self):
+        self.conn.close()
+
+
+class CheckpointStore:
+    """Chunk-level progress of keyed migrations, so an interrupted run can resume.
+
+    A job is "running" from start() until finish(); each save() records the
+    last key committed on the target and the chunk size the job runs with.
+    """
+
+    def __init__(self, path=STATE_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "job TEXT PRIMARY KEY, status TEXT NOT NULL, chunk_size INTEGER NOT NULL, "
+                "key_kind TEXT, last_key TEXT, rows_done INTEGER NOT NULL DEFAULT 0, "
+                "updated_at TEXT NOT NULL)")
+
+    def get(self, job):
+        """Return the checkpoint of job as a dict, or None if it never ran."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, chunk_size, key_kind, last_key, rows_done FROM checkpoints WHERE job = ?",
+                (job,)).fetchone()
+        if row is None:
+            return None
+        status, chunk_size, key_kind, last_key, rows_done = row
+        return {
+            "status": status,
+            "chunk_size": chunk_size,
+            "last_key": _decode(key_kind, last_key) if key_kind else None,
+            "rows_done": rows_done,
+        }
+
+    def start(self, job, chunk_size):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job, status, chunk_size, key_kind, last_key, rows_done, updated_at) "
+                "VALUES (?, 'running', ?, NULL, NULL, 0, ?)",
+                (job, chunk_size, datetime.datetime.now().isoformat()))
+
+    def save(self, job, last_key, rows_done):
+        kind, text = _encode(last_key)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE checkpoints SET key_kind = ?, last_key = ?, rows_done = ?, updated_at = ? WHERE job = ?",
+                (kind, text, rows_done, datetime.datetime.now().isoformat(), job))
+
+    def finish(self, job):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE checkpoints SET status = 'done', updated_at = ? WHERE job = ?",
+                (datetime.datetime.now().isoformat(), job))
+
+    def close(self):
+        self.conn.close()
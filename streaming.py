@@ -0,0 +1,103 @@
+"""Chunked, bounded-memory extraction shared by the migration front ends."""
+
+import uuid
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def open_stream_cursor(conn, sgbd, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Open a cursor that keeps the result set on the server side."""
+    if sgbd == "PostgreSQL":
+        # Named cursors are server-side: rows only travel on fetchmany()
+        cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cursor.itersize = chunk_size
+    elif sgbd == "MySQL":
+        # mysql.connector cursors are unbuffered unless asked otherwise
+        cursor = conn.cursor(buffered=False)
+    else:
+        # SQLite and Oracle fetch arraysize rows per round trip
+        cursor = conn.cursor()
+        cursor.arraysize = chunk_size
+    return cursor
+
+
+class StreamReader:
+    """Iterate over the result of a query one chunk of rows at a time."""
+
+    def __init__(self, conn, sgbd, query, params=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.conn = conn
+        self.sgbd = sgbd
+        self.query = query
+        self.params = params
+        self.chunk_size = chunk_size
+        self.cursor = None
+        self.columns = []
+        self._first_chunk = None
+
+    def open(self):
+        self.cursor = open_stream_cursor(self.conn, self.sgbd, self.chunk_size)
+        if self.params is None:
+            self.cursor.execute(self.query)
+        else:
+            self.cursor.execute(self.query, self.params)
+        # A named PostgreSQL cursor has no description until the first fetch
+        self._first_chunk = self.cursor.fetchmany(self.chunk_size)
+        self.columns = [desc[0] for desc in self.cursor.description]
+        return self
+
+    def close(self):
+        if self.cursor is not None:
+            try:
+                if self.sgbd == "MySQL":
+                    # Drain what is left so the connection can be reused, one chunk at a time
+                    while self.cursor.fetchmany(self.chunk_size):
+                        pass
+                self.cursor.close()
+            finally:
+                self.cursor = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        if self.cursor is None:
+            self.open()
+        chunk, self._first_chunk = self._first_chunk, None
+        while chunk:
+            yield [tuple(row) for row in chunk]
+            chunk = self.cursor.fetchmany(self.chunk_size)
+
+
+def placeholder(sgbd):
+    """Return the DB-API parameter marker used by the driver of sgbd."""
+    if sgbd == "SQLite":
+        return "?"
+    if sgbd == "Oracle":
+        return None
+    return "%s"
+
+
+def insert_statement(sgbd, table_name, col_names):
+    """Build a parameterised INSERT for the given target dialect."""
+    marker = placeholder(sgbd)
+    if marker is None:
+        values = ", ".join(f":{i + 1}" for i in range(len(col_names)))
+    else:
+        values = ", ".join([marker] * len(col_names))
+    return f"INSERT INTO {table_name} ({', '.join(col_names)}) VALUES ({values})"
+
+
+def copy_in_chunks(reader, loader, on_chunk=None):
+    """Write every chunk of reader through loader, one commit per chunk.
+
+    Only one chunk is held in memory at a time. Returns the number of rows copied.
+    """
+    total = 0
+    for chunk in reader:
+        total += loader.load(chunk)
+        if on_chunk:
+            on_chunk(total)
+    return total
@@ -0,0 +1,205 @@
+"""Lazy Qt table models: previews of any size materialise only the rows on screen.
+
+CsvTableModel reads pages of a CSV file through its row offset index;
+QueryTableModel reads pages of a database table in key order, each page
+starting after the last key of the one before (keyset paging). Both keep a
+few recently used pages, so memory stays constant whatever the number of rows.
+"""
+
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from connections import connection_manager
+from schema import get_primary_key
+from streaming import placeholder
+
+PAGE_ROWS = 200
+CACHED_PAGES = 8
+
+
+class PagedTableModel(QAbstractTableModel):
+    """Read-only model fetching fixed-size pages of rows on demand.
+
+    fetch_page(start, stop) returns the rows in that range; subclasses pass it
+    and set self.columns and self.row_count.
+    """
+
+    def __init__(self, fetch_page, page_rows=PAGE_ROWS, cached_pages=CACHED_PAGES, parent=None):
+        super().__init__(parent)
+        self.fetch_page = fetch_page
+        self.page_rows = page_rows
+        self.cached_pages = cached_pages
+        self.columns = []
+        self.row_count = 0
+        self._pages = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section] if section < len(self.columns) else None
+        return section + 1
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            start = number * self.page_rows
+            page = self.fetch_page(start, min(start + self.page_rows, self.row_count))
+            self._pages[number] = page
+            if len(self._pages) > self.cached_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        page = self._page(index.row() // self.page_rows)
+        offset = index.row() % self.page_rows
+        if offset >= len(page) or index.column() >= len(page[offset]):
+            return None
+        value = page[offset][index.column()]
+        return "" if value is None else str(value)
+
+
+class CsvTableModel(PagedTableModel):
+    """A CSV file through a csv_index.CsvRowIndex."""
+
+    def __init__(self, row_index, page_rows=PAGE_ROWS, cached_pages=CACHED_PAGES, parent=None):
+        super().__init__(row_index.rows, page_rows, cached_pages, parent)
+        self.row_index = row_index
+        self.columns = row_index.header
+        self.row_count = len(row_index)
+
+
+# Row identifiers ordering a table that has no primary key
+PSEUDO_KEYS = {"SQLite": "rowid", "PostgreSQL": "ctid", "Oracle": "ROWID"}
+
+
+def _markers(sgbd, count, first=1):
+    marker = placeholder(sgbd)
+    if marker is None:
+        return [f":{first + i}" for i in range(count)]
+    return [marker] * count
+
+
+def _after(sgbd, keys, bound):
+    """WHERE condition (and its parameters) for rows sorting after bound on keys.
+
+    Spelt out as (k1 > v1) OR (k1 = v1 AND k2 > v2) ...: Oracle has no row
+    value comparison.
+    """
+    params = [value for position in range(len(keys)) for value in bound[:position + 1]]
+    markers = iter(_markers(sgbd, len(params)))
+    terms = []
+    for position, key in enumerate(keys):
+        parts = [f"t.{previous} = {next(markers)}" for previous in keys[:position]]
+        parts.append(f"t.{key} > {next(markers)}")
+        terms.append("(" + " AND ".join(parts) + ")")
+    return " OR ".join(terms), params
+
+
+def _limit(sgbd, count, offset=0):
+    if sgbd == "Oracle":
+        return f" OFFSET {offset} ROWS FETCH NEXT {count} ROWS ONLY"
+    return f" LIMIT {count} OFFSET {offset}"
+
+
+def page_query(sgbd, table_name, keys, bound, count, offset=0, select="t.*"):
+    """SELECT of count rows in key order, from the first one after bound (None: from the start).
+
+    The key columns follow the selected ones, so the caller learns where the
+    next page starts. offset skips rows past bound.
+    """
+    key_columns = ", ".join(f"t.{key}" for key in keys)
+    query, params = f"SELECT {select}, {key_columns} FROM {table_name} t", []
+    if bound is not None:
+        condition, params = _after(sgbd, keys, bound)
+        query += f" WHERE {condition}"
+    return query + f" ORDER BY {key_columns}" + _limit(sgbd, count, offset), params
+
+
+class QueryTableModel(PagedTableModel):
+    """A database table, one page query per page, over pooled connections.
+
+    Pages are read in primary key order (rowid, ctid or ROWID without one),
+    each after the last key of the page before, so they neither repeat nor
+    skip rows and a deep page does not rescan the rows above it. Jumping far
+    ahead locates the page start with one scan of the keys only. A MySQL
+    table without primary key falls back to LIMIT/OFFSET ordered by every
+    column.
+    """
+
+    def __init__(self, sgbd, details, table_name, page_rows=PAGE_ROWS, cached_pages=CACHED_PAGES, parent=None):
+        super().__init__(self._fetch_page, page_rows, cached_pages, parent)
+        self.sgbd = sgbd
+        self.details = details
+        self.table_name = table_name
+        # Page number -> key of the last row before it (None for the first page)
+        self._bounds = {0: None}
+        with connection_manager.acquire(sgbd, details) as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT * FROM {table_name} WHERE 1 = 0")
+                cursor.fetchall()
+                self.columns = [description[0] for description in cursor.description]
+                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                self.row_count = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+            primary_key = get_primary_key(conn, sgbd, table_name)
+        if primary_key:
+            self.keys = primary_key[1]
+        elif sgbd in PSEUDO_KEYS:
+            self.keys = [PSEUDO_KEYS[sgbd]]
+        else:
+            self.keys = None
+
+    def _bound(self, cursor, number):
+        """Key of the last row before page number, found from the nearest known page above it.
+
+        Raises LookupError when the table no longer reaches that page.
+        """
+        if number not in self._bounds:
+            known = max(page for page in self._bounds if page < number)
+            query, params = page_query(self.sgbd, self.table_name, self.keys, self._bounds[known], 1,
+                                       (number - known) * self.page_rows - 1, select="1")
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            if row is None:
+                raise LookupError(number)
+            self._bounds[number] = tuple(row[1:])
+        return self._bounds[number]
+
+    def _fetch_page(self, start, stop):
+        width = len(self.columns)
+        with connection_manager.acquire(self.sgbd, self.details) as conn:
+            cursor = conn.cursor()
+            try:
+                if self.keys is None:
+                    order = ", ".join(f"t.{column}" for column in self.columns)
+                    cursor.execute(f"SELECT t.* FROM {self.table_name} t ORDER BY {order}"
+                                   + _limit(self.sgbd, stop - start, start))
+                    return cursor.fetchall()
+                number = start // self.page_rows
+                try:
+                    bound = self._bound(cursor, number)
+                except LookupError:
+                    # Rows deleted since the count: the page is past the end
+                    return []
+                query, params = page_query(self.sgbd, self.table_name, self.keys, bound, stop - start)
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        if len(rows) == stop - start:
+            self._bounds[number + 1] = tuple(rows[-1][width:])
+        return [row[:width] for row in rows]
@@ -1,12 +1,16 @@
 import sys
-import csv
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget,
                              QVBoxLayout, QFormLayout, QLineEdit, QPushButton,
-                             QComboBox, QLabel, QTableWidget, QTableWidgetItem,
+                             QComboBox, QLabel, QTableWidget, QTableView,
                              QProgressBar, QHBoxLayout, QFileDialog, QMessageBox, QAbstractItemView)
-from PyQt5.QtCore import Qt, QMimeData
+from PyQt5.QtCore import Qt, QMimeData, QTimer
 from PyQt5.QtGui import QDragEnterEvent, QDropEvent
+from connections import connection_manager
+from engine import EventQueue, MigrationEngine
+from csv_index import CsvRowIndex, sniff_delimiter
+from schema import get_tables
+from table_models import CsvTableModel, QueryTableModel
 
 class DragDropWidget(QWidget):
     def __init__(self, parent=None):
@@ -59,9 +63,15 @@ class DataMigrationApp(QMainWindow):
         self.tabs.addTab(self.migration_tab, "Migration")
         self.tabs.addTab(self.final_tab, "Final Validation")
 
-        self.imported_data = []
+        self.csv_index = None
         self.db_connected = False
+        self.db_type = None
+        self.db_details = None
         self.column_mapping = {}
+        self.csv_path = None
+        self.csv_header = []
+        self.engine = None
+        self.engine_events = EventQueue()
 
         # Disable tabs until prerequisites are met
         self.tabs.setTabEnabled(2, False)
@@ -75,7 +85,7 @@ class DataMigrationApp(QMainWindow):
 
         self.drag_drop_widget = DragDropWidget(self)
         self.import_status_label = QLabel("No file imported")
-        self.file_table = QTableWidget()
+        self.file_table = QTableView()
         self.file_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
 
         self.import_button = QPushButton("Import CSV")
@@ -95,31 +105,32 @@ class DataMigrationApp(QMainWindow):
             file_path, _ = QFileDialog.getOpenFileName(self, "Open CSV File", "", "CSV Files (*.csv);;All Files (*)", options=options)
 
         if file_path:
-            self.imported_data = []
+            previous, self.csv_index = self.csv_index, None
             try:
-                with open(file_path, "r") as file:
-                    reader = csv.reader(file)
-                    self.imported_data = list(reader)
-
-                if not self.imported_data:
+                # One pass over the file records row offsets; rows are parsed when shown
+                csv_index = CsvRowIndex(file_path, errors="replace", delimiter=sniff_delimiter(file_path))
+                if not csv_index.header:
                     raise ValueError("CSV file is empty.")
 
-                self.import_status_label.setText(f"Imported: {file_path}")
-                self.populate_table(self.file_table, self.imported_data)
+                self.csv_index = csv_index
+                self.csv_path, self.csv_header = file_path, csv_index.header
+                self.import_status_label.setText(f"Imported: {file_path} ({len(csv_index)} rows)")
+                self.file_table.setModel(CsvTableModel(csv_index, parent=self))
+                self.file_table_view.setModel(CsvTableModel(csv_index, parent=self))
 
                 # Enable the "Tables" tab if the connection is also validated
                 if self.db_connected:
                     self.tabs.setTabEnabled(2, True)
+                    self.load_db_table(self.db_table_combo.currentText())
             except Exception as e:
+                if self.csv_index is None:
+                    self.file_table.setModel(None)
+                    self.file_table_view.setModel(None)
                 QMessageBox.critical(self, "Error", f"Failed to read the file: {str(e)}")
-
-    def populate_table(self, table_widget, data):
-        table_widget.setRowCount(len(data))
-        table_widget.setColumnCount(len(data[0]))
-        table_widget.setHorizontalHeaderLabels(data[0])
-        for row_idx, row in enumerate(data[1:]):
-            for col_idx, cell in enumerate(row):
-                table_widget.setItem(row_idx, col_idx, QTableWidgetItem(cell))
+            finally:
+                # No view reads the previous file any more: release its memory map and handle
+                if previous is not None:
+                    previous.close()
 
     def create_connection_tab(self):
         tab = QWidget()
@@ -164,27 +175,25 @@ class DataMigrationApp(QMainWindow):
             password = self.password_input.text()
             database = self.database_input.text()
 
-            if db_type == "MySQL":
-                import pymysql
-                connection = pymysql.connect(host=host, port=int(port), user=user, password=password, database=database)
-            elif db_type == "PostgreSQL":
-                import psycopg2
-                connection = psycopg2.connect(host=host, port=port, user=user, password=password, dbname=database)
-            elif db_type == "SQLite":
-                import sqlite3
-                connection = sqlite3.connect(database)
+            if db_type == "SQLite":
+                details = {"path": database}
             else:
-                raise ValueError("Unsupported database type.")
+                details = {"host": host, "port": port, "user": user, "password": password, "database": database}
+            # The checked connection stays open in the pool for the migration
+            connection_manager.check(db_type, details)
+            self.db_type, self.db_details = db_type, details
+
+            with connection_manager.acquire(db_type, details) as connection:
+                tables = get_tables(connection, db_type)
 
             self.db_connected = True
+            self.db_table_combo.clear()
+            self.db_table_combo.addItems(tables)
             self.connect_status_label.setText("Connected Successfully")
             QMessageBox.information(self, "Connection", "Database connected successfully.")
 
-            if connection:
-                connection.close()
-
             # Enable the "Tables" tab if CSV is also imported
-            if self.imported_data:
+            if self.csv_index is not None:
                 self.tabs.setTabEnabled(2, True)
         except Exception as e:
             self.db_connected = False
@@ -196,13 +205,13 @@ class DataMigrationApp(QMainWindow):
         layout = QVBoxLayout()
 
         # File table
-        self.file_table_view = QTableWidget()
+        self.file_table_view = QTableView()
         self.file_table_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
 
         # Database table
         self.db_table_combo = QComboBox()
         self.db_table_combo.currentTextChanged.connect(self.load_db_table)
-        self.db_table_view = QTableWidget()
+        self.db_table_view = QTableView()
         self.db_table_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
 
         layout.addWidget(QLabel("Table importée (CSV):"))
@@ -218,36 +227,54 @@ class DataMigrationApp(QMainWindow):
     
     
     def load_db_table(self, table_name):
-        if self.db_connected:
-            try:
-                # Placeholder for database query logic
-                data = [[f"Row{i+1}Col{j+1}" for j in range(5)] for i in range(10)]
-                self.populate_table(self.db_table_view, [["ColA", "ColB", "ColC", "ColD", "ColE"]] + data)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to load table: {str(e)}")
+        """Preview the selected table and map the CSV columns onto its columns."""
+        if not self.db_connected or not table_name:
+            return
+        try:
+            # Pages of rows are queried as the view scrolls to them
+            model = QueryTableModel(self.db_type, self.db_details, table_name, parent=self)
+            self.db_table_view.setModel(model)
+            self.build_mapping(self.csv_header, list(model.columns))
+            self.tabs.setTabEnabled(3, True)
+            self.tabs.setTabEnabled(4, True)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load table: {str(e)}")
 
     def create_mapping_tab(self):
         tab = QWidget()
         layout = QVBoxLayout()
 
-        # Mapping widgets
+        # One row per CSV column, filled once a table is selected
+        layout.addWidget(QLabel("Map each CSV column to a table column (leave empty to skip it):"))
         self.mapping_layout = QVBoxLayout()
         self.mapping_widgets = []
-        for i in range(5):
+
+        layout.addLayout(self.mapping_layout)
+        tab.setLayout(layout)
+
+        return tab
+
+    def build_mapping(self, file_columns, db_columns):
+        while self.mapping_layout.count():
+            row = self.mapping_layout.takeAt(0).layout()
+            while row is not None and row.count():
+                widget = row.takeAt(0).widget()
+                if widget is not None:
+                    widget.deleteLater()
+        self.mapping_widgets = []
+        by_name = {col.lower(): col for col in db_columns}
+        for column in file_columns:
             mapping_row = QHBoxLayout()
-            file_col = QLabel(f"File Col {i+1}")
+            file_col = QLabel(column)
             db_col_combo = QComboBox()
-            db_col_combo.addItems(["ColA", "ColB", "ColC", "ColD", "ColE"])
+            db_col_combo.addItems([""] + db_columns)
+            # Same name, any case: mapped by default
+            db_col_combo.setCurrentText(by_name.get(column.strip().lower(), ""))
             mapping_row.addWidget(file_col)
             mapping_row.addWidget(db_col_combo)
             self.mapping_layout.addLayout(mapping_row)
             self.mapping_widgets.append((file_col, db_col_combo))
 
-        layout.addLayout(self.mapping_layout)
-        tab.setLayout(layout)
-
-        return tab
-
     def create_migration_tab(self):
         tab = QWidget()
         layout = QVBoxLayout()
@@ -266,8 +293,13 @@ class DataMigrationApp(QMainWindow):
         self.migrate_button = QPushButton("Start Migration")
         self.migrate_button.clicked.connect(self.start_migration)
         self.progress_bar = QProgressBar()
+        self.migration_status_label = QLabel("")
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(200)
+        self.progress_timer.timeout.connect(self.poll_migration)
         layout.addWidget(self.migrate_button)
         layout.addWidget(self.progress_bar)
+        layout.addWidget(self.migration_status_label)
 
         tab.setLayout(layout)
 
@@ -282,14 +314,44 @@ class DataMigrationApp(QMainWindow):
             QMessageBox.warning(self, "Migration", "Please connect to the database before migrating.")
             return
 
-        if not self.imported_data:
+        if self.csv_index is None:
             QMessageBox.warning(self, "Migration", "Please import a CSV file before migrating.")
             return
 
-        # Placeholder for migration logic
-        self.progress_bar.setValue(50)
-        QMessageBox.information(self, "Migration", "Migration completed successfully.")
-        self.progress_bar.setValue(100)
+        table_name = self.db_table_combo.currentText()
+        self.column_mapping = {file_col.text(): db_col_combo.currentText()
+                               for file_col, db_col_combo in self.mapping_widgets if db_col_combo.currentText()}
+        if not table_name or not self.column_mapping:
+            QMessageBox.warning(self, "Migration", "Please map at least one CSV column to a table column.")
+            return
+
+        # The load runs in the engine thread; the timer follows its committed rows
+        self.engine = MigrationEngine()
+        self.engine.subscribe(self.engine_events)
+        self.engine.add_csv_load(table_name, self.csv_path, (self.db_type, self.db_details), table_name,
+                                 self.column_mapping, delimiter=self.csv_index.delimiter)
+        self.progress_bar.setValue(0)
+        self.migration_status_label.setText("Migration started...")
+        self.migrate_button.setEnabled(False)
+        self.engine.start()
+        self.progress_timer.start()
+
+    def poll_migration(self):
+        # Checked first: every event of a finished engine is already queued
+        finished = not self.engine.running()
+        for event in self.engine_events.poll():
+            if event["status"] == "progress":
+                if event["total"]:
+                    self.progress_bar.setValue(min(100, event["rows"] * 100 // event["total"]))
+                self.migration_status_label.setText(f"{event['rows']} rows committed, {event['rate']:.0f} rows/s")
+            elif event["status"] == "done":
+                self.progress_bar.setValue(100)
+                QMessageBox.information(self, "Migration", f"Migration completed successfully: {event['result']} rows.")
+            elif event["status"] in ("failed", "cancelled", "timeout"):
+                QMessageBox.critical(self, "Migration", f"Migration failed: {event['error']}")
+        if finished:
+            self.progress_timer.stop()
+            self.migrate_button.setEnabled(True)
 
     def create_final_tab(self):
         tab = QWidget()
@@ -1,6 +1,7 @@
 #autre chose 
 
 import mysql.connector
+from connections import connection_manager
 from tkinter import Tk, Label, Button, ttk, Text, Scrollbar, VERTICAL, END
 
 class MySQLDatabaseViewerApp:
@@ -34,7 +35,7 @@ class MySQLDatabaseViewerApp:
     def connect_to_db(self):
         """Connect to the MySQL database and retrieve table names."""
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
+            self.connection = connection_manager.acquire("MySQL", self.db_config)
             self.refresh_tables()
         except mysql.connector.Error as e:
             self.text.insert(END, f"Erreur de connexion : {e}\n")
@@ -87,3 +88,4 @@ if __name__ == "__main__":
     root = Tk()
     app = MySQLDatabaseViewerApp(root, db_config)
     root.mainloop()
+    connection_manager.close_all()
@@ -87,13 +87,19 @@
 
 
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import create_engine, inspect
 import os
+from loaders import make_loader
+
+CHUNK_SIZE = 10000
+
+DB_SGBD = {"mysql": "MySQL", "postgresql": "PostgreSQL", "postgres": "PostgreSQL", "oracle": "Oracle", "sqlite": "SQLite"}
 
 def get_db_engine(db_type, user, password, host, port, database):
     if db_type == "mysql":
-        return create_engine(f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}")
+        # local_infile autorise le chargement rapide LOAD DATA LOCAL INFILE
+        return create_engine(f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}",
+                             connect_args={"local_infile": True})
     elif db_type == "postgresql" or db_type == "postgres":  # Correction ici
         return create_engine(f"postgresql://{user}:{password}@{host}:{port}/{database}")
     elif db_type == "oracle":
@@ -103,32 +109,90 @@ def get_db_engine(db_type, user, password, host, port, database):
     else:
         raise ValueError(f"Base de données non supportée : {db_type}")
 
-def read_file(file_path):
+def settle_dtypes(file_path, columns, chunksize=CHUNK_SIZE):
+    """Types des colonnes fixés d'après tout le fichier, réutilisés pour chaque bloc.
+
+    Le texte brut décide : que des entiers donne "Int64" (nullable, les vides
+    restent NULL et ne deviennent pas des 4.0), des nombres donnent "float64",
+    le reste (codes à zéros en tête, colonne vide) reste du texte. Le fichier
+    est parcouru en entier avant tout chargement : une décimale en fin de
+    fichier élargit la colonne au lieu de faire échouer read_csv une fois les
+    premiers blocs déjà validés en base.
+    """
+    kinds = dict.fromkeys(columns)  # None tant que la colonne n'a que des vides
+    for chunk in pd.read_csv(file_path, usecols=columns, dtype=str, chunksize=chunksize):
+        for col in columns:
+            values = chunk[col].dropna().str.strip()
+            if kinds[col] is object or values.empty:
+                continue
+            if kinds[col] != "float64" and values.str.fullmatch(r"[+-]?(0|[1-9]\d{0,17})").all():
+                kinds[col] = "Int64"
+            elif pd.to_numeric(values, errors="coerce").notna().all():
+                kinds[col] = "float64"
+            else:
+                kinds[col] = object
+    return {col: object if kind is None else kind for col, kind in kinds.items()}
+
+def read_file_chunks(file_path, columns, chunksize=CHUNK_SIZE):
+    """Blocs de chunksize lignes du fichier, limités aux colonnes utiles.
+
+    Un CSV est lu bloc par bloc avec des types fixés une fois pour toutes ;
+    un classeur Excel ne se lit pas par morceaux et est découpé après lecture.
+    """
     file_extension = os.path.splitext(file_path)[1].lower()
     if file_extension == ".csv":
-        return pd.read_csv(file_path)
+        header = pd.read_csv(file_path, nrows=0).columns
+        missing_cols = [col for col in columns if col not in header]
+        if missing_cols:
+            raise ValueError(f"Colonnes manquantes dans le fichier : {missing_cols}")
+        yield from pd.read_csv(file_path, usecols=columns, dtype=settle_dtypes(file_path, columns, chunksize),
+                               chunksize=chunksize)
     elif file_extension in [".xls", ".xlsx"]:
-        return pd.read_excel(file_path)
+        df = pd.read_excel(file_path)
+        missing_cols = [col for col in columns if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Colonnes manquantes dans le fichier : {missing_cols}")
+        df = df[columns]
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
     else:
         raise ValueError("Format de fichier non supporté. Utilisez un fichier CSV ou XLSX.")
 
-def import_file_to_db(file_path, table_name, column_mapping, db_type, user, password, host, port, database):
+def create_missing_table(engine, table_name, chunk, column_mapping):
+    """Crée la table absente d'après les types fixés du fichier, comme le faisait to_sql."""
+    if not inspect(engine).has_table(table_name):
+        chunk.head(0).rename(columns=column_mapping).to_sql(table_name, engine, index=False)
+
+def import_file_to_db(file_path, table_name, column_mapping, db_type, user, password, host, port, database,
+                      chunksize=CHUNK_SIZE):
+    """Charge le fichier par blocs : la mémoire reste bornée quelle que soit sa taille.
+
+    Chaque bloc passe par le chargement en masse du SGBD (COPY, LOAD DATA,
+    executemany) et est validé avant la lecture du suivant. Une table absente
+    est d'abord créée à partir des types du premier bloc.
+    """
+    total = 0
     try:
-        df = read_file(file_path)
-        missing_cols = [col for col in column_mapping.keys() if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Colonnes manquantes dans le fichier : {missing_cols}")
-        
-        df.rename(columns=column_mapping, inplace=True)
-        
         engine = get_db_engine(db_type, user, password, host, port, database)
+        columns = list(column_mapping.keys())
+        raw_conn = engine.raw_connection()
+        try:
+            loader = None
+            for chunk in read_file_chunks(file_path, columns, chunksize):
+                if loader is None:
+                    create_missing_table(engine, table_name, chunk[columns], column_mapping)
+                    loader = make_loader(raw_conn, DB_SGBD[db_type], table_name, list(column_mapping.values()))
+                data = chunk[columns].astype(object)
+                data = data.where(chunk[columns].notna(), None)
+                total += loader.load(list(data.itertuples(index=False, name=None)))
+                print(f"{total} lignes importées...")
+        finally:
+            raw_conn.close()
         
-        with engine.begin() as conn:  # Utilisation de transaction automatique
-            df.to_sql(table_name, con=conn, if_exists='append', index=False, method='multi')
-        
-        print("Importation réussie !")
+        print(f"Importation réussie ! ({total} lignes)")
     except Exception as e:
-        print(f"Erreur lors de l'importation : {e}")
+        # Les blocs déjà validés restent en base : la reprise part de la ligne suivante
+        print(f"Erreur lors de l'importation après {total} lignes validées : {e}")
 
 if __name__ == "__main__":
     file_path = "request_citizen.csv"
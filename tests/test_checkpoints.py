@@ -0,0 +1,65 @@
+import sqlite3
+
+from checkpoints import ResumableMigration
+from loaders import ExecutemanyLoader
+from state_store import CheckpointStore
+
+
+def databases():
+    source = sqlite3.connect(":memory:")
+    source.execute("CREATE TABLE items (id INTEGER, name TEXT)")
+    source.executemany("INSERT INTO items VALUES (?, ?)", [(i, f"item {i}") for i in range(1, 11)])
+    source.commit()
+    target = sqlite3.connect(":memory:")
+    target.execute("CREATE TABLE items (id INTEGER, name TEXT)")
+    return source, target
+
+
+def migration(source, target, store):
+    return ResumableMigration(source, "SQLite", target, "SQLite", "items", "items", "id", "items", 3, store=store)
+
+
+def test_resume_replays_the_uncheckpointed_chunk_without_duplicates(tmp_path):
+    source, target = databases()
+    store = CheckpointStore(str(tmp_path / "state.db"))
+
+    first = migration(source, target, store)
+    reader = first.open_reader()
+    plain = ExecutemanyLoader(target, "SQLite", "items", reader.columns)
+    loader = first.wrap_loader(plain, reader.columns)
+    chunks = iter(reader)
+    loader.load(next(chunks))
+    loader.load(next(chunks))
+    # The third chunk is committed but the run dies before its checkpoint is saved
+    plain.load(next(chunks))
+    reader.close()
+    assert store.get("items") == {"status": "running", "chunk_size": 3, "last_key": 6, "rows_done": 6}
+
+    second = migration(source, target, store)
+    reader = second.open_reader()
+    assert second.resuming
+    loader = second.wrap_loader(ExecutemanyLoader(target, "SQLite", "items", reader.columns), reader.columns)
+    for chunk in reader:
+        loader.load(chunk)
+    reader.close()
+    second.finish()
+
+    assert target.execute("SELECT id FROM items ORDER BY id").fetchall() == [(i,) for i in range(1, 11)]
+    assert store.get("items") == {"status": "done", "chunk_size": 3, "last_key": 10, "rows_done": 10}
+    store.close()
+
+
+def test_finished_job_starts_over(tmp_path):
+    source, target = databases()
+    store = CheckpointStore(str(tmp_path / "state.db"))
+    store.start("items", 3)
+    store.save("items", 6, 6)
+    store.finish("items")
+
+    job = migration(source, target, store)
+    reader = job.open_reader()
+    assert not job.resuming
+    assert next(iter(reader))[0] == (1, "item 1")
+    reader.close()
+    assert store.get("items")["last_key"] is None
+    store.close()
@@ -0,0 +1,51 @@
+from connections import ConnectionManager, ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, fail_reset=False):
+        self.fail_reset = fail_reset
+        self.resets = 0
+        self.closed = False
+
+    def rollback(self):
+        pass
+
+    def reset_session(self):
+        if self.fail_reset:
+            raise RuntimeError("COM_RESET_CONNECTION not supported")
+        self.resets += 1
+
+    def close(self):
+        self.closed = True
+
+
+def test_released_connection_is_reset_before_reuse():
+    pool = ConnectionPool("MySQL", {}, connect=lambda sgbd, details: FakeConnection())
+    first = pool.acquire()
+    raw = first.raw
+    first.close()
+    assert raw.resets == 1
+    assert pool.acquire().raw is raw
+
+
+def test_connection_that_cannot_be_reset_is_discarded():
+    pool = ConnectionPool("MySQL", {}, connect=lambda sgbd, details: FakeConnection(fail_reset=True))
+    first = pool.acquire()
+    raw = first.raw
+    first.close()
+    assert raw.closed
+    assert pool.acquire().raw is not raw
+
+
+def test_pool_opens_min_size_connections_when_created():
+    opened = []
+
+    def fake_connect(sgbd, details):
+        opened.append(details["password"])
+        return FakeConnection()
+
+    manager = ConnectionManager(min_size=2, connect=fake_connect)
+    details = {"host": "db", "database": "app", "user": "etl", "password": "old"}
+    manager.pool("MySQL", details)
+    assert opened == ["old", "old"]
+    assert manager.pool("MySQL", dict(details, password="new")) is not manager.pool("MySQL", details)
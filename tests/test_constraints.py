@@ -0,0 +1,62 @@
+from constraints import ConstraintBuilder
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, statement):
+        self.conn.statements.append(statement)
+        if statement.startswith("SELECT COUNT(*)"):
+            self.result = (self.conn.orphans,)
+        elif statement.startswith(self.conn.fail_on):
+            raise RuntimeError("statement failed")
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, orphans=0, fail_on="-"):
+        self.orphans = orphans
+        self.fail_on = fail_on
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+FOREIGN_KEY = {"name": "fk_city", "columns": ["city_id"], "ref_table": "city", "ref_columns": ["id"]}
+
+
+def build_foreign_key(conn):
+    builder = ConstraintBuilder(lambda: conn, "MySQL")
+    tables = {"person": {"primary_key": None, "indexes": [], "foreign_keys": [FOREIGN_KEY]}}
+    return builder.build(tables, existing=["city"])
+
+
+def test_mysql_foreign_key_with_orphans_is_dropped():
+    conn = FakeConnection(orphans=3)
+    errors = build_foreign_key(conn)
+    assert "fk_city" in errors
+    assert "ALTER TABLE person DROP FOREIGN KEY fk_city" in conn.statements
+    assert conn.statements[-1] == "SET foreign_key_checks = 1"
+
+
+def test_mysql_foreign_key_checks_restored_when_add_fails():
+    conn = FakeConnection(fail_on="ALTER TABLE person ADD")
+    errors = build_foreign_key(conn)
+    assert "fk_city" in errors
+    assert conn.statements[-1] == "SET foreign_key_checks = 1"
@@ -0,0 +1,59 @@
+import csv
+
+import pytest
+
+from csv_index import CsvRowIndex, sniff_delimiter
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_quote_inside_unquoted_field_is_data(tmp_path):
+    path = write(tmp_path / "heights.csv", b"id,name,height\n1,Ama,5'10\"\n2,Bob,6\n3,Cy,7\n")
+    with CsvRowIndex(path) as index:
+        assert len(index) == 3
+        assert index.rows(0, 1) == [["1", "Ama", "5'10\""]]
+        assert index.row(2) == ["3", "Cy", "7"]
+
+
+def test_offsets_match_csv_reader(tmp_path):
+    data = ('a,b\r\n1,"x\ny"\r\n\r\n2,"say ""hi""\n, ok"\r\n3,"a"b"c\n4,w').encode("utf-8-sig")
+    path = write(tmp_path / "quoted.csv", data)
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        expected = [row for row in csv.reader(file) if row]
+    with CsvRowIndex(path) as index:
+        assert [index.header] + index.rows(0, len(index)) == expected
+        assert [index.row(n) for n in range(len(index))] == expected[1:]
+
+
+def test_cache_is_reused(tmp_path):
+    path = write(tmp_path / "cached.csv", b"a\n1\n2\n")
+    with CsvRowIndex(path) as index:
+        assert len(index) == 2
+    with CsvRowIndex(path) as index:
+        assert list(index.iter_chunks(1, start=1)) == [[["2"]]]
+
+
+def test_bad_bytes_raise_unless_replaced(tmp_path):
+    path = write(tmp_path / "latin1.csv", "name\nNguéa\n".encode("latin-1"))
+    with CsvRowIndex(path) as index:
+        with pytest.raises(ValueError):
+            index.rows(0, 1)
+    with CsvRowIndex(path, errors="replace") as index:
+        assert index.rows(0, 1) == [["Ngu�a"]]
+    with CsvRowIndex(path, encoding="latin-1") as index:
+        assert index.rows(0, 1) == [["Nguéa"]]
+
+
+def test_semicolon_file_with_quoted_line_breaks(tmp_path):
+    data = b'id;note\n1;"a;b\nc"\n2;x,y\n3;"say ""hi"""\n'
+    path = write(tmp_path / "semicolon.csv", data)
+    assert sniff_delimiter(path) == ";"
+    with CsvRowIndex(path, delimiter=";") as index:
+        assert index.header == ["id", "note"]
+        assert index.rows(0, len(index)) == [["1", "a;b\nc"], ["2", "x,y"], ["3", 'say "hi"']]
+    # The cached offsets belong to one delimiter
+    with CsvRowIndex(path) as index:
+        assert index.header == ["id;note"]
@@ -0,0 +1,40 @@
+import json
+import os
+
+import pytest
+
+from ddl_parser import (create_table_statements, foreign_key_type_mismatches, load_schema_model,
+                        model_identity_references, parse_ddl)
+
+DDL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cameroonid_01.sql")
+
+
+@pytest.fixture(scope="module")
+def model():
+    with open(DDL_PATH, encoding="utf-8", errors="replace") as file:
+        return parse_ddl(file.read())
+
+
+@pytest.mark.parametrize("target", ["PostgreSQL", "MySQL", "Oracle", "SQLite"])
+def test_foreign_keys_match_referenced_types(model, target):
+    assert foreign_key_type_mismatches(model, target) == []
+
+
+def test_identity_references_take_the_key_type(model):
+    assert model_identity_references(model)["CITIZEN"] == ["IDREQUEST"]
+    citizen = next(statement for statement in create_table_statements(model, "PostgreSQL")
+                   if statement.startswith("CREATE TABLE CITIZEN "))
+    assert "IDREQUEST BIGINT" in citizen
+
+
+def test_model_cache_is_json_keyed_on_the_file_hash(tmp_path, model):
+    ddl_path = tmp_path / "export.sql"
+    ddl_path.write_bytes(open(DDL_PATH, "rb").read())
+    cache_path = str(ddl_path) + ".model.json"
+    assert load_schema_model(str(ddl_path)) == model
+    with open(cache_path, encoding="utf-8") as cache:
+        assert json.load(cache)["key"]["sha256"]
+    assert load_schema_model(str(ddl_path)) == model
+
+    ddl_path.write_text("CREATE TABLE OTHER (ID NUMBER(10));\n")
+    assert list(load_schema_model(str(ddl_path))["tables"]) == ["OTHER"]
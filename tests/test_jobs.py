@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from connections import connection_manager
+from jobs import JobEngine, copy_table
+
+
+@pytest.fixture(autouse=True)
+def close_pools():
+    yield
+    connection_manager.close_all()
+
+
+def sqlite_endpoint(path, rows=()):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER, name TEXT)")
+    conn.executemany("INSERT INTO items VALUES (?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return "SQLite", {"path": str(path)}
+
+
+def target_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_copy_refuses_existing_table_unless_replace(tmp_path):
+    source = sqlite_endpoint(tmp_path / "source.db", [(1, "a"), (2, "b")])
+    target = ("SQLite", {"path": str(tmp_path / "target.db")})
+    engine = JobEngine()
+    first = engine.submit("first", copy_table, source, target, "items", endpoints=[source, target])
+    engine.run()
+    second = engine.submit("second", copy_table, source, target, "items", endpoints=[source, target])
+    engine.run()
+    assert first.status == "done" and second.status == "failed"
+    assert target_rows(tmp_path / "target.db") == 2
+
+    third = engine.submit("third", copy_table, source, target, "items", replace=True, endpoints=[source, target])
+    engine.run()
+    assert third.status == "done"
+    assert target_rows(tmp_path / "target.db") == 2
+
+
+class Concurrency:
+    """Counts the jobs inside a block at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.lock:
+            self.current -= 1
+
+
+def insert_rows(job, endpoint, tracker, rows, pause, check=True):
+    """Insert rows one by one over a pooled connection, pausing between them."""
+    with tracker, connection_manager.acquire(*endpoint) as conn:
+        for value in range(rows):
+            conn.execute("INSERT INTO items VALUES (?, 'x')", (value,))
+            conn.commit()
+            time.sleep(pause)
+            if check:
+                job.check_cancelled()
+    return rows
+
+
+def test_sqlite_endpoint_runs_one_job_at_a_time(tmp_path):
+    endpoint = sqlite_endpoint(tmp_path / "limit.db")
+    tracker = Concurrency()
+    engine = JobEngine(threads=4)
+    jobs = [engine.submit(f"job {n}", insert_rows, endpoint, tracker, 3, 0.01, endpoints=[endpoint])
+            for n in range(3)]
+    engine.run()
+    assert [job.status for job in jobs] == ["done"] * 3
+    assert tracker.peak == 1
+    assert target_rows(tmp_path / "limit.db") == 9
+
+
+def test_endpoint_limit_holds_after_timeout(tmp_path):
+    endpoint = sqlite_endpoint(tmp_path / "timeout.db")
+    tracker = Concurrency()
+    engine = JobEngine(threads=4)
+    # The slow job never polls check_cancelled(): it keeps running after its timeout
+    slow = engine.submit("slow", insert_rows, endpoint, tracker, 5, 0.05, check=False,
+                         endpoints=[endpoint], timeout=0.1)
+    fast = engine.submit("fast", insert_rows, endpoint, tracker, 1, 0, endpoints=[endpoint])
+    engine.run()
+    assert slow.status == "timeout" and fast.status == "done"
+    assert tracker.peak == 1
+    assert target_rows(tmp_path / "timeout.db") == 6
+
+
+def test_cancel_stops_running_and_pending_jobs(tmp_path):
+    endpoint = sqlite_endpoint(tmp_path / "cancel.db")
+    tracker = Concurrency()
+    engine = JobEngine(threads=4)
+    running = engine.submit("running", insert_rows, endpoint, tracker, 100, 0.01, endpoints=[endpoint])
+    waiting = engine.submit("waiting", insert_rows, endpoint, tracker, 100, 0.01, endpoints=[endpoint])
+    threading.Timer(0.1, engine.cancel).start()
+    started = time.monotonic()
+    engine.run()
+    assert running.status == "cancelled" and waiting.status == "cancelled"
+    assert time.monotonic() - started < 1
+    assert 0 < target_rows(tmp_path / "cancel.db") < 100
@@ -0,0 +1,168 @@
+import datetime
+import sqlite3
+import struct
+
+import pytest
+
+from loaders import (BINARY_ENCODERS, COPY_BINARY_HEADER, CopyTextStream, InsertIgnoreLoader, MySQLBulkLoader,
+                     PostgresCopyLoader, encode_copy_binary, encode_copy_text, insert_ignore_statement)
+
+
+class FakeMySQLCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def execute(self, statement, params=None):
+        self.conn.statements.append(statement)
+        if statement.startswith("LOAD DATA") and self.conn.refuse_infile:
+            error = RuntimeError("LOAD DATA LOCAL INFILE is disabled")
+            error.errno = 3948
+            raise error
+        if statement == "SHOW COUNT(*) WARNINGS":
+            self.result = [(len(self.conn.warnings),)]
+        elif statement.startswith("SHOW WARNINGS"):
+            self.result = self.conn.warnings
+        elif statement == "SELECT @@max_allowed_packet":
+            self.result = [(4 * 1024 * 1024,)]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeMySQLConnection:
+    def __init__(self, warnings=(), refuse_infile=False):
+        self.warnings = list(warnings)
+        self.refuse_infile = refuse_infile
+        self.statements = []
+        self.commits = self.rollbacks = 0
+
+    def cursor(self):
+        return FakeMySQLCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_load_data_warnings_roll_back_the_chunk():
+    conn = FakeMySQLConnection(warnings=[("Warning", 1062, "Duplicate entry '1' for key 'PRIMARY'")])
+    loader = MySQLBulkLoader(conn, "items", ["id", "name"])
+    with pytest.raises(ValueError, match="Duplicate entry"):
+        loader.load([(1, "a")])
+    assert (conn.commits, conn.rollbacks) == (0, 1)
+    assert loader.use_load_data
+
+
+def test_refused_local_infile_falls_back_to_insert():
+    conn = FakeMySQLConnection(refuse_infile=True)
+    loader = MySQLBulkLoader(conn, "items", ["id", "name"])
+    assert loader.load([(1, "a"), (2, "b")]) == 2
+    assert not loader.use_load_data
+    assert conn.statements[-1] == "INSERT INTO items (id, name) VALUES (%s, %s), (%s, %s)"
+
+
+def insert_ignore_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, code TEXT UNIQUE, name TEXT NOT NULL)")
+    conn.execute("INSERT INTO items VALUES (1, 'a', 'first')")
+    conn.commit()
+    return conn
+
+
+def test_insert_ignore_skips_existing_keys_only():
+    conn = insert_ignore_table()
+    loader = InsertIgnoreLoader(conn, "SQLite", "items", ["id", "code", "name"], "id")
+    assert loader.load([(1, "x", "again"), (2, "b", "second"), (2, "c", "repeated")]) == 1
+    assert loader.skipped == 2
+    assert conn.execute("SELECT name FROM items WHERE id = 1").fetchone() == ("first",)
+
+
+def test_insert_ignore_raises_on_other_unique_index():
+    conn = insert_ignore_table()
+    loader = InsertIgnoreLoader(conn, "SQLite", "items", ["id", "code", "name"], "id")
+    with pytest.raises(sqlite3.IntegrityError):
+        loader.load([(3, "a", "same code")])
+
+
+def test_mysql_insert_ignore_checks_the_key_only():
+    query = insert_ignore_statement("MySQL", "items", ["id", "name"], "id")
+    assert query == ("INSERT INTO items (id, name) SELECT id, name FROM (SELECT %s AS id, %s AS name) s "
+                     "WHERE NOT EXISTS (SELECT 1 FROM items t WHERE t.id = s.id)")
+
+
+class FakeLob:
+    def __init__(self, value):
+        self.value = value
+
+    def size(self):
+        return len(self.value)
+
+    def read(self, offset=1, amount=None):
+        amount = len(self.value) if amount is None else amount
+        return self.value[offset - 1:offset - 1 + amount]
+
+
+def test_copy_text_escapes_values():
+    rows = [(1, "tab\there", None, b"\x00\xff", True, datetime.datetime(2024, 5, 1, 8, 30)),
+            (2, "back\\slash\nline", "", b"", False, datetime.date(2024, 5, 1))]
+    assert encode_copy_text(rows).read() == (
+        b"1\ttab\\there\t\\N\t\\\\x00ff\tt\t2024-05-01 08:30:00\n"
+        b"2\tback\\\\slash\\nline\t\t\\\\x\tf\t2024-05-01\n")
+
+
+def test_copy_text_stream_reads_lobs_in_pieces():
+    rows = [(1, FakeLob("a\tb" * 1000), FakeLob(b"\x01\x02" * 1000)), (2, None, FakeLob(b""))]
+    # An empty LOB is sent as an empty field, valid input for text and bytea alike
+    plain = [(1, "a\tb" * 1000, b"\x01\x02" * 1000), (2, None, "")]
+    stream = CopyTextStream(rows)
+    data = b"".join(iter(lambda: stream.read(700), b""))
+    assert data == encode_copy_text(plain).read()
+
+
+def test_copy_binary_frames_every_field():
+    data = encode_copy_binary([(7, None, "é")], [BINARY_ENCODERS["integer"], BINARY_ENCODERS["text"],
+                                                 BINARY_ENCODERS["text"]]).read()
+    assert data.startswith(COPY_BINARY_HEADER)
+    body = data[len(COPY_BINARY_HEADER):]
+    assert body == (struct.pack("!h", 3) + struct.pack("!i", 4) + struct.pack("!i", 7) + struct.pack("!i", -1)
+                    + struct.pack("!i", 2) + "é".encode("utf-8") + struct.pack("!h", -1))
+
+
+class FakeCopyCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def copy_expert(self, query, buf, size=8192):
+        self.conn.copies.append((query, buf.read()))
+
+    def close(self):
+        pass
+
+
+class FakeCopyConnection:
+    def __init__(self):
+        self.copies = []
+        self.commits = 0
+
+    def cursor(self):
+        return FakeCopyCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_copy_loader_sends_one_copy_per_chunk():
+    conn = FakeCopyConnection()
+    loader = PostgresCopyLoader(conn, "items", ["id", "name"])
+    assert loader.load([(1, "a"), (2, None)]) == 2
+    assert conn.copies == [("COPY items (id, name) FROM STDIN WITH (FORMAT text)", b"1\ta\n2\t\\N\n")]
+    assert conn.commits == 1
@@ -0,0 +1,52 @@
+from loaders import lob_pieces
+from lobs import PostgresLob
+
+VALUE = bytes(range(256)) * 10
+
+
+class FakeCursor:
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        self.rows = []
+
+    def execute(self, query, params):
+        self.conn.queries.append((self.name, query))
+        if "generate_series" in query:
+            amount = params[0]
+            self.rows = [(VALUE[start:start + amount],) for start in range(0, len(VALUE), amount)]
+        else:
+            offset, amount = params[0], params[1]
+            self.rows = [(VALUE[offset - 1:offset - 1 + amount],)]
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def close(self):
+        self.conn.closed.append(self.name)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.queries = []
+        self.closed = []
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+
+def test_pieces_stream_through_one_query():
+    conn = FakeConnection()
+    lob = PostgresLob(conn, "fingerprints", "image", "id", 7, len(VALUE))
+    assert b"".join(lob_pieces(lob, piece_size=300)) == VALUE
+    assert len(conn.queries) == 1
+    assert conn.queries[0][0].startswith("lob_")
+    assert conn.closed == [conn.queries[0][0]]
+
+
+def test_random_read_is_a_single_substring():
+    conn = FakeConnection()
+    lob = PostgresLob(conn, "fingerprints", "image", "id", 7, len(VALUE))
+    assert lob.read(11, 5) == VALUE[10:15]
+    assert lob.read() == VALUE
+    assert [name for name, _ in conn.queries] == [None, None]
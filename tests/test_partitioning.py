@@ -0,0 +1,39 @@
+import sqlite3
+
+import pytest
+
+from partitioning import PartitionedReader, minmax_ranges, quantile_ranges
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / "source.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (code TEXT, amount INTEGER)")
+    conn.executemany("INSERT INTO items VALUES (?, ?)", [(f"c{i:04d}", i) for i in range(1000)])
+    conn.executemany("INSERT INTO items VALUES (?, ?)", [(None, -i) for i in range(1, 8)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def read_all(path, key, ranges):
+    reader = PartitionedReader(lambda: sqlite3.connect(path, check_same_thread=False), "SQLite", "items", key,
+                               ranges, workers=3, chunk_size=100)
+    with reader:
+        return sorted(row[1] for chunk in reader for row in chunk)
+
+
+def test_partitions_cover_every_row_including_null_keys(source):
+    conn = sqlite3.connect(source)
+    ranges = quantile_ranges(conn, "SQLite", "items", "code", 6)
+    conn.close()
+    assert len(ranges) == 6
+    assert read_all(source, "code", ranges) == sorted(list(range(1000)) + [-i for i in range(1, 8)])
+
+
+def test_minmax_ranges_refuse_a_text_key(source):
+    conn = sqlite3.connect(source)
+    with pytest.raises(TypeError, match="numeric key"):
+        minmax_ranges(conn, "items", "code", 4)
+    assert len(minmax_ranges(conn, "items", "amount", 4)) == 4
@@ -0,0 +1,71 @@
+import itertools
+import threading
+
+import pytest
+
+from pipeline import Pipeline, PipelineCancelled
+
+
+class ListReader:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+class ListLoader:
+    def __init__(self, fail_after=None):
+        self.rows = []
+        self.fail_after = fail_after
+
+    def load(self, rows):
+        if self.fail_after is not None and len(self.rows) >= self.fail_after:
+            raise RuntimeError("target went away")
+        self.rows.extend(rows)
+        return len(rows)
+
+
+def test_rows_flow_through_the_transform_to_every_writer():
+    reader = ListReader([[(i,), (i + 1,)] for i in range(0, 20, 2)])
+    loaders = [ListLoader(), ListLoader()]
+    progress = []
+    pipeline = Pipeline(reader, loaders, transform=lambda chunk: [(n * 10,) for (n,) in chunk], max_chunks=1,
+                        on_chunk=progress.append)
+    assert pipeline.run() == 20
+    assert sorted(loaders[0].rows + loaders[1].rows) == [(n * 10,) for n in range(20)]
+    assert pipeline.rows_read == 20
+    assert len(progress) == 10 and max(progress) == 20
+    assert reader.closed
+
+
+def test_writer_error_stops_the_reader_and_is_raised():
+    # The reader never ends on its own: only the cancellation can stop it
+    reader = ListReader([(n,)] for n in itertools.count())
+    loader = ListLoader(fail_after=3)
+    with pytest.raises(RuntimeError, match="target went away"):
+        Pipeline(reader, loader, max_chunks=2).run()
+    assert loader.rows == [(0,), (1,), (2,)]
+    assert reader.closed
+
+
+def test_cancel_raises_pipeline_cancelled():
+    reader = ListReader([(n,)] for n in itertools.count())
+    started = threading.Event()
+
+    class CountingLoader:
+        def load(self, rows):
+            started.set()
+            return len(rows)
+
+    pipeline = Pipeline(reader, CountingLoader())
+    thread = threading.Thread(target=lambda: started.wait() and pipeline.cancel())
+    thread.start()
+    with pytest.raises(PipelineCancelled):
+        pipeline.run()
+    thread.join()
+    assert reader.closed
@@ -0,0 +1,31 @@
+import sqlite3
+
+from scheduler import dependency_graph
+from schema import column_types, get_foreign_keys
+
+
+def test_sqlite_foreign_keys_order_the_load_with_pragma_off():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE city (id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TABLE person (id INTEGER PRIMARY KEY, city_id INTEGER REFERENCES city (id))")
+    foreign_keys = get_foreign_keys(conn, "SQLite")
+    assert foreign_keys == [("person", "city", True)]
+    assert dependency_graph(["city", "person"], foreign_keys)["person"] == {"city"}
+
+
+def postgres_column(name, data_type, length=None):
+    return {"name": name, "type": data_type, "length": length, "precision": None, "scale": None, "nullable": True}
+
+
+def test_postgres_uuid_maps_to_mysql_char():
+    columns = [postgres_column("id", "uuid"), postgres_column("label", "character varying", 40)]
+    assert column_types("PostgreSQL", columns, "MySQL") == [("id", "CHAR(36)"), ("label", "VARCHAR(40)")]
+
+
+def test_mysql_row_budget_counts_uuid_columns():
+    columns = [postgres_column("notes", "character varying", 14950)] + \
+        [postgres_column(f"ref_{number}", "uuid") for number in range(3)]
+    types = dict(column_types("PostgreSQL", columns, "MySQL"))
+    assert types["notes"] == "VARCHAR(14950)"
+    assert types["ref_0"] == "CHAR(36)"
+    assert types["ref_1"] == "TEXT"
@@ -0,0 +1,41 @@
+import sqlite3
+
+from staging import dedupe_staging, find_conflicts, merge_staging, stage_rows, summarize_conflicts
+
+COLUMNS = ["id", "name", "city"]
+
+
+def staged_target(chunks):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE person (id INTEGER PRIMARY KEY, name TEXT, city TEXT)")
+    conn.executemany("INSERT INTO person VALUES (?, ?, ?)", [(1, "ann", "PAR"), (2, "bob", None)])
+    conn.commit()
+    name, staged = stage_rows(conn, "SQLite", "person", COLUMNS, chunks)
+    return conn, name, staged
+
+
+def test_dedupe_keeps_the_last_row_of_each_key_and_merge_counts():
+    conn, name, staged = staged_target([[(3, "cid", "LYO"), (2, "bob", "PAR")], [(3, "cid", "NCE")]])
+    assert (name, staged) == ("stg_person", 3)
+    assert dedupe_staging(conn, "SQLite", name, "id") == 1
+    assert merge_staging(conn, "SQLite", "person", name, COLUMNS, "id") == (1, 1)
+    assert conn.execute("SELECT * FROM person ORDER BY id").fetchall() == [
+        (1, "ann", "PAR"), (2, "bob", "PAR"), (3, "cid", "NCE")]
+
+
+def test_merge_without_update_leaves_existing_rows():
+    conn, name, _ = staged_target([[(1, "ann", "LYO"), (4, "dan", None)]])
+    assert merge_staging(conn, "SQLite", "person", name, COLUMNS, "id", update=False) == (1, 0)
+    assert conn.execute("SELECT * FROM person ORDER BY id").fetchall() == [
+        (1, "ann", "PAR"), (2, "bob", None), (4, "dan", None)]
+
+
+def test_conflicts_report_the_differing_columns():
+    conn, name, _ = staged_target([[(1, "ann", "PAR"), (2, "bob", "LYO"), (5, "eve", None)]])
+    conflicts = list(find_conflicts(conn, "SQLite", "person", name, "id", ["name", "city"]))
+    assert sorted(conflicts) == [(1, []), (2, ["city"])]
+    summary = summarize_conflicts(conflicts, sample_size=1)
+    assert summary["keys"] == {1, 2}
+    assert summary["unchanged"] == 1
+    assert summary["columns"] == {"city": 1}
+    assert len(summary["sample"]) == 1
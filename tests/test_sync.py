@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+from state_store import WatermarkStore
+from sync import DiffSync, ensure_unique_key, incremental_sync
+
+
+def table(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO items VALUES (?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def contents(conn):
+    return conn.execute("SELECT id, name FROM items ORDER BY id").fetchall()
+
+
+def test_diff_sync_writes_only_the_differences():
+    source = table([(i, f"name {i}") for i in range(500)])
+    target = table([(i, f"name {i}") for i in range(500) if i % 50] + [(i, "old") for i in range(0, 500, 100)]
+                   + [(900, "gone")])
+    stats = DiffSync(source, "SQLite", target, "SQLite", "items", "items", "id", leaf_size=40, fanout=4).run()
+    assert contents(target) == contents(source)
+    assert (stats["inserted"], stats["updated"], stats["deleted"]) == (5, 5, 1)
+
+
+def test_empty_source_range_is_split_on_target_keys():
+    source = table([])
+    target = table([(i, "stale") for i in range(300)])
+    stats = DiffSync(source, "SQLite", target, "SQLite", "items", "items", "id", leaf_size=50, fanout=4).run()
+    assert contents(target) == []
+    assert stats["deleted"] == 300
+    assert stats["leaves"] > 1
+
+
+class FailingCursor:
+    def __init__(self, error):
+        self.error = error
+
+    def execute(self, statement):
+        raise self.error
+
+    def close(self):
+        pass
+
+
+class FailingConnection:
+    def __init__(self, error):
+        self.error = error
+
+    def cursor(self):
+        return FailingCursor(self.error)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def mysql_error(errno):
+    error = RuntimeError(f"MySQL error {errno}")
+    error.errno = errno
+    return error
+
+
+def test_ensure_unique_key_tolerates_only_an_existing_index():
+    ensure_unique_key(FailingConnection(mysql_error(1061)), "MySQL", "items", "id")
+    with pytest.raises(RuntimeError, match="1062"):
+        ensure_unique_key(FailingConnection(mysql_error(1062)), "MySQL", "items", "id")
+
+
+def dated_table(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE items (id INTEGER, name TEXT, CREATIONDATE TEXT, MODIFICATIONDATE TEXT)")
+    conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def test_incremental_sync_applies_rows_changed_since_the_watermark(tmp_path):
+    source = dated_table([(1, "a", "2024-01-01", None), (2, "b", "2024-01-02", "2024-03-01"),
+                          (3, "c", "2024-03-05", None)])
+    target = dated_table([(1, "a", "2024-01-01", None), (2, "old b", "2024-01-02", None)])
+    store = WatermarkStore(str(tmp_path / "state.db"))
+    assert incremental_sync(source, "SQLite", target, "SQLite", "items", "items", "id", store, "items") is None
+
+    store.set("items", "2024-02-01")
+    applied = incremental_sync(source, "SQLite", target, "SQLite", "items", "items", "id", store, "items")
+    assert applied == 2
+    assert target.execute("SELECT id, name FROM items ORDER BY id").fetchall() == [(1, "a"), (2, "b"), (3, "c")]
+    assert store.get("items") == "2024-03-05"
+    store.close()
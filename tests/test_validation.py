@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from validation import rejection_reasons, split_valid, table_domains, table_rules  # noqa: E402
+
+
+def person_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE city (code TEXT PRIMARY KEY)")
+    conn.executemany("INSERT INTO city VALUES (?)", [("PAR",), ("LYO",)])
+    conn.execute("CREATE TABLE person (id INTEGER NOT NULL, name VARCHAR(5) NOT NULL, born DATE, "
+                 "city TEXT REFERENCES city(code))")
+    conn.commit()
+    return conn
+
+
+def test_rejects_rows_breaking_the_target_schema():
+    conn = person_table()
+    rules = table_rules(conn, "SQLite", "person")
+    domains = table_domains(conn, "SQLite", "person")
+    df = pd.DataFrame({
+        "ID": ["1", "2", "x", "4", "5"],
+        "name": ["ann", "toolong", "bob", "", "eve"],
+        "born": ["2020-01-01", "2020-01-02", "2020-01-03", "nope", None],
+        "city": ["PAR", "PAR", "LYO", "PAR", "XXX"],
+    })
+    valid, rejected = split_valid(df, rules, domains, date_format="%Y-%m-%d")
+    assert list(valid["ID"]) == ["1"]
+    assert list(rejected["reason"]) == [
+        "name longer than 5 characters",
+        "ID is not a number",
+        "name is required; born is not a valid date",
+        "city is not a known code",
+    ]
+
+
+def test_numeric_rules():
+    rules = {"amount": {"kind": "decimal", "nullable": True, "length": None, "digits": 3, "limit": None,
+                        "whole": False},
+             "qty": {"kind": "integer", "nullable": True, "length": None, "digits": None, "limit": 2 ** 31 - 1,
+                     "whole": True}}
+    df = pd.DataFrame({"amount": [999.5, 1000, None], "qty": [1, 2.5, 2 ** 31]})
+    assert list(rejection_reasons(df, rules)) == [
+        "",
+        "amount has more than 3 integer digits; qty is not a whole number",
+        "qty is out of range",
+    ]
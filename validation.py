@@ -0,0 +1,130 @@
+"""Schema-driven validation of incoming rows, a whole chunk at a time.
+
+Rules come from the target columns, as returned by schema.get_columns() or
+found in a ddl_parser model table: character lengths (VARCHAR2(68 CHAR)),
+numeric precision (NUMBER(10,2)), integer ranges, dates, NOT NULL, plus the
+values of the code tables the foreign keys point to. Each rule is one pandas
+mask over the chunk, so bad rows are found in a single pass before the load
+instead of by failed inserts.
+"""
+
+import pandas as pd
+
+from schema import generic_type, get_columns, get_table_foreign_keys
+
+INTEGER_LIMITS = {"smallint": 2 ** 15 - 1, "integer": 2 ** 31 - 1, "bigint": 2 ** 63 - 1}
+TEXT_KINDS = ("varchar", "char")
+DATE_KINDS = ("date", "datetime", "datetimetz")
+NUMBER_KINDS = ("decimal", "float", "double") + tuple(INTEGER_LIMITS)
+# Code tables larger than this are not loaded as domains: the foreign key will check them
+DOMAIN_MAX_ROWS = 100000
+
+
+def column_rules(sgbd, columns):
+    """{column name: rule dict} from column metadata dicts of the target table."""
+    rules = {}
+    for column in columns:
+        kind, *args = generic_type(sgbd, column)
+        rule = {"kind": kind, "nullable": column["nullable"], "length": None, "digits": None, "limit": None,
+                "whole": False}
+        if kind in TEXT_KINDS:
+            rule["length"] = args[0]
+        elif kind in INTEGER_LIMITS:
+            rule["limit"], rule["whole"] = INTEGER_LIMITS[kind], True
+            if column["precision"] and column["scale"] == 0:
+                # Declared narrower than the integer type, e.g. NUMBER(5,0)
+                rule["digits"] = column["precision"]
+        elif kind == "decimal" and args[0] is not None:
+            rule["digits"] = args[0] - (args[1] or 0)
+        rules[column["name"]] = rule
+    return rules
+
+
+def table_rules(conn, sgbd, table_name):
+    return column_rules(sgbd, get_columns(conn, sgbd, table_name))
+
+
+def code_domains(conn, foreign_keys, max_rows=DOMAIN_MAX_ROWS):
+    """{column: set of allowed values as text} for the single-column foreign keys.
+
+    foreign_keys are dicts as returned by schema.get_table_foreign_keys() or
+    held in a ddl_parser model table. Parents over max_rows rows are skipped.
+    """
+    domains = {}
+    cursor = conn.cursor()
+    try:
+        for foreign_key in foreign_keys:
+            if len(foreign_key["columns"]) != 1:
+                continue
+            cursor.execute(f"SELECT DISTINCT {foreign_key['ref_columns'][0]} FROM {foreign_key['ref_table']}")
+            rows = cursor.fetchmany(max_rows + 1)
+            if len(rows) <= max_rows:
+                domains[foreign_key["columns"][0]] = {str(row[0]) for row in rows if row[0] is not None}
+    finally:
+        cursor.close()
+    return domains
+
+
+def table_domains(conn, sgbd, table_name, max_rows=DOMAIN_MAX_ROWS):
+    return code_domains(conn, get_table_foreign_keys(conn, sgbd, table_name), max_rows)
+
+
+def _as_text(values):
+    # The text the database receives: whole floats (integers read next to blanks) lose their ".0"
+    if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+        values = values.astype("Int64")
+    return values.astype(str)
+
+
+def _column_checks(name, values, rule, domain, date_format):
+    """(mask, reason) pairs for one column."""
+    missing = values.isna() | values.astype(str).str.strip().eq("")
+    present = ~missing
+    checks = []
+    if rule is not None and not rule["nullable"]:
+        checks.append((missing, f"{name} is required"))
+    if rule is not None and rule["length"]:
+        checks.append((present & _as_text(values).str.len().gt(rule["length"]),
+                       f"{name} longer than {rule['length']} characters"))
+    if rule is not None and rule["kind"] in NUMBER_KINDS:
+        numbers = pd.to_numeric(values.where(present), errors="coerce")
+        checks.append((present & numbers.isna(), f"{name} is not a number"))
+        if rule["whole"]:
+            checks.append((numbers.mod(1).ne(0) & numbers.notna(), f"{name} is not a whole number"))
+        if rule["digits"] is not None:
+            checks.append((numbers.abs().ge(10 ** rule["digits"]),
+                           f"{name} has more than {rule['digits']} integer digits"))
+        elif rule["limit"] is not None:
+            checks.append((numbers.abs().gt(rule["limit"]), f"{name} is out of range"))
+    if rule is not None and rule["kind"] in DATE_KINDS and not pd.api.types.is_datetime64_any_dtype(values):
+        dates = pd.to_datetime(values.where(present), format=date_format, errors="coerce")
+        checks.append((present & dates.isna(), f"{name} is not a valid date"))
+    if domain is not None:
+        checks.append((present & ~_as_text(values).isin(domain), f"{name} is not a known code"))
+    return checks
+
+
+def rejection_reasons(df, rules, domains=None, date_format=None):
+    """Series aligned on df: "" for valid rows, else the broken rules joined by "; ".
+
+    Columns are matched to rules without regard to case; columns of the table
+    missing from df are left to their defaults. date_format (strftime syntax)
+    is used for every date column; without it pandas infers the format.
+    """
+    rules = {name.lower(): rule for name, rule in rules.items()}
+    domains = {name.lower(): domain for name, domain in (domains or {}).items()}
+    reasons = pd.Series("", index=df.index, dtype=object)
+    for name in df.columns:
+        rule, domain = rules.get(str(name).lower()), domains.get(str(name).lower())
+        for mask, reason in _column_checks(name, df[name], rule, domain, date_format):
+            mask = mask.fillna(False).astype(bool)
+            if mask.any():
+                reasons[mask] = reasons[mask] + reason + "; "
+    return reasons.str[:-2]
+
+
+def split_valid(df, rules, domains=None, date_format=None):
+    """(valid rows, rejected rows with a "reason" column)."""
+    reasons = rejection_reasons(df, rules, domains, date_format)
+    rejected = reasons.ne("")
+    return df[~rejected], df[rejected].assign(reason=reasons[rejected])